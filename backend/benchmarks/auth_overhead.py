@@ -0,0 +1,66 @@
+"""
+Накладные расходы аутентификации на запрос.
+
+Сравнивает jwt.decode на каждый запрос с кэшем проверенных токенов
+(core.security.decode_access_token) и полный get_current_user при тёплом
+кэше пользователей. БД не нужна.
+
+Запуск (из папки backend):
+
+    python -m benchmarks.auth_overhead --requests 100000 --tokens 100
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from core.config import get_settings
+from core.dependencies import CurrentUser, get_current_user, user_cache
+from core.security import create_access_token, decode_access_token, token_cache
+
+settings = get_settings()
+
+
+def _report(name: str, seconds: float, requests: int) -> None:
+    print(f"{name:<36} {seconds / requests * 1e6:8.2f} us/request  {requests / seconds:12,.0f} req/s")
+
+
+def bench_decode(tokens, requests: int) -> None:
+    started = time.perf_counter()
+    for i in range(requests):
+        jwt.decode(tokens[i % len(tokens)], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    _report("jwt.decode (no cache)", time.perf_counter() - started, requests)
+
+    token_cache.clear()
+    started = time.perf_counter()
+    for i in range(requests):
+        decode_access_token(tokens[i % len(tokens)])
+    _report("decode_access_token (cache)", time.perf_counter() - started, requests)
+
+
+async def bench_dependency(tokens, requests: int) -> None:
+    for user_id in range(len(tokens)):
+        user_cache.set(user_id, CurrentUser(user_id, f"user{user_id}@example.com", "customer", True, True, None, None))
+    credentials = [HTTPAuthorizationCredentials(scheme="Bearer", credentials=t) for t in tokens]
+
+    started = time.perf_counter()
+    for i in range(requests):
+        await get_current_user(credentials[i % len(credentials)], session_maker=None)
+    _report("get_current_user (warm caches)", time.perf_counter() - started, requests)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Auth overhead benchmark")
+    parser.add_argument("--requests", type=int, default=100000, help="Decoded tokens per scenario")
+    parser.add_argument("--tokens", type=int, default=100, help="Distinct tokens (active sessions)")
+    args = parser.parse_args()
+
+    tokens = [create_access_token(i, f"user{i}@example.com", "customer") for i in range(args.tokens)]
+    bench_decode(tokens, args.requests)
+    asyncio.run(bench_dependency(tokens, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Нагрузочный тест оформления заказов.
+
+Много пользователей одновременно оформляют заказы на одни и те же "горячие"
+товары (корзины содержат их в случайном порядке). Скрипт проверяет, что нет
+оверселла и дедлоков, и считает оформленные заказы в секунду.
+
+Запуск (из папки backend, на PostgreSQL из DATABASE_URL):
+
+    python -m benchmarks.checkout_concurrency --users 500 --stock 200 --concurrency 100
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+
+from fastapi import HTTPException
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.config import get_settings
+from core.database import Base
+from core.models import (
+    UserModel,
+    ProductModel,
+    CartModel,
+    CartItemModel,
+    OrderModel,
+    OrderItemModel,
+    OrderStatusHistoryModel,
+)
+from core.schemas import AddressSchema
+from modules.orders.application.checkout import place_order
+
+ADDRESS = AddressSchema(
+    recipient_name="Benchmark",
+    phone="+79000000000",
+    city="Moscow",
+    street="Load Street",
+    building="1",
+    postal_code="000000"
+)
+
+
+async def setup(session_maker, run_id: str, users: int, products: int, stock: int):
+    """Создать горячие товары и пользователей с корзинами"""
+    async with session_maker() as session:
+        product_ids = (await session.execute(
+            insert(ProductModel).values([
+                {"name": f"Hot {i}", "slug": f"bench-{run_id}-{i}", "price": 1000 + i, "stock": stock}
+                for i in range(products)
+            ]).returning(ProductModel.id)
+        )).scalars().all()
+
+        user_ids = (await session.execute(
+            insert(UserModel).values([
+                {"email": f"bench-{run_id}-{i}@example.com", "password_hash": "x", "role": "customer"}
+                for i in range(users)
+            ]).returning(UserModel.id)
+        )).scalars().all()
+
+        cart_ids = (await session.execute(
+            insert(CartModel).values([{"user_id": uid} for uid in user_ids]).returning(CartModel.id)
+        )).scalars().all()
+
+        # Случайный порядок товаров в корзине - провоцирует дедлок без упорядоченных блокировок
+        items = []
+        for cart_id in cart_ids:
+            for product_id in random.sample(product_ids, k=random.randint(1, len(product_ids))):
+                items.append({
+                    "cart_id": cart_id,
+                    "product_id": product_id,
+                    "quantity": random.randint(1, 3),
+                    "unit_price": 1000,
+                })
+        await session.execute(insert(CartItemModel), items)
+        await session.commit()
+
+    return product_ids, user_ids
+
+
+async def checkout(session_maker, user_id: int, stats: Counter):
+    async with session_maker() as session:
+        try:
+            await place_order(session, user_id, ADDRESS)
+            await session.commit()
+            stats["placed"] += 1
+        except HTTPException:
+            await session.rollback()
+            stats["rejected"] += 1
+        except Exception as e:
+            await session.rollback()
+            stats["errors"] += 1
+            stats[f"error:{type(e).__name__}"] += 1
+
+
+async def verify(session_maker, product_ids, stock: int) -> bool:
+    """Проверить: продано не больше остатка и остатки сходятся с заказами"""
+    ok = True
+    async with session_maker() as session:
+        stocks = dict((await session.execute(
+            select(ProductModel.id, ProductModel.stock).where(ProductModel.id.in_(product_ids))
+        )).all())
+        sold = dict((await session.execute(
+            select(OrderItemModel.product_id, func.sum(OrderItemModel.quantity))
+            .where(OrderItemModel.product_id.in_(product_ids))
+            .group_by(OrderItemModel.product_id)
+        )).all())
+
+    for product_id in product_ids:
+        left, units = stocks[product_id], int(sold.get(product_id, 0))
+        consistent = left >= 0 and left + units == stock
+        ok = ok and consistent
+        print(f"  product {product_id}: sold={units} left={left} {'OK' if consistent else 'OVERSOLD'}")
+    return ok
+
+
+async def cleanup(session_maker, product_ids, user_ids):
+    async with session_maker() as session:
+        order_ids = select(OrderModel.id).where(OrderModel.user_id.in_(user_ids))
+        await session.execute(delete(OrderItemModel).where(OrderItemModel.order_id.in_(order_ids)))
+        await session.execute(delete(OrderStatusHistoryModel).where(OrderStatusHistoryModel.order_id.in_(order_ids)))
+        await session.execute(delete(OrderModel).where(OrderModel.user_id.in_(user_ids)))
+        cart_ids = select(CartModel.id).where(CartModel.user_id.in_(user_ids))
+        await session.execute(delete(CartItemModel).where(CartItemModel.cart_id.in_(cart_ids)))
+        await session.execute(delete(CartModel).where(CartModel.user_id.in_(user_ids)))
+        await session.execute(delete(UserModel).where(UserModel.id.in_(user_ids)))
+        await session.execute(delete(ProductModel).where(ProductModel.id.in_(product_ids)))
+        await session.commit()
+
+
+async def main(args) -> int:
+    pool_kwargs = {} if args.database_url.startswith("sqlite") else {
+        "pool_size": args.concurrency,
+        "max_overflow": 0,
+    }
+    engine = create_async_engine(args.database_url, **pool_kwargs)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    run_id = uuid.uuid4().hex[:8]
+    product_ids, user_ids = await setup(session_maker, run_id, args.users, args.products, args.stock)
+    print(f"Run {run_id}: {args.users} users, {args.products} hot products x {args.stock} units, "
+          f"concurrency {args.concurrency}")
+
+    stats = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited(user_id):
+        async with semaphore:
+            await checkout(session_maker, user_id, stats)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited(uid) for uid in user_ids))
+    elapsed = time.perf_counter() - started
+
+    print(f"Placed: {stats['placed']}, rejected (stock): {stats['rejected']}, errors: {stats['errors']}")
+    for key, value in stats.items():
+        if key.startswith("error:"):
+            print(f"  {key}: {value}")
+    print(f"Elapsed: {elapsed:.2f}s, {stats['placed'] / elapsed:.1f} checkouts/sec, "
+          f"{len(user_ids) / elapsed:.1f} attempts/sec")
+
+    ok = await verify(session_maker, product_ids, args.stock) and stats["errors"] == 0
+    if not args.keep:
+        await cleanup(session_maker, product_ids, user_ids)
+    await engine.dispose()
+
+    print("RESULT:", "OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent checkout benchmark")
+    parser.add_argument("--database-url", default=get_settings().DATABASE_URL)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--products", type=int, default=3)
+    parser.add_argument("--stock", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="Не удалять созданные данные")
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
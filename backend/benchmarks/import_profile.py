@@ -0,0 +1,79 @@
+"""
+Профиль времени импорта приложения.
+
+Запускает `python -X importtime -c "import core.app"` в отдельном процессе и
+печатает модули с наибольшим накопленным временем импорта и сумму
+собственного времени по пакетам верхнего уровня.
+
+Запуск (из папки backend):
+
+    python -m benchmarks.import_profile --top 30
+"""
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@dataclass
+class ImportRecord:
+    """Одна строка -X importtime (время в микросекундах)"""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def profile_imports(module: str = "core.app") -> List[ImportRecord]:
+    """Импортировать module в чистом интерпретаторе и разобрать отчёт -X importtime"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True, capture_output=True, text=True,
+    ).stderr
+    records = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append(ImportRecord(name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+def import_seconds(records: List[ImportRecord], module: str = "core.app") -> float:
+    """Накопленное время импорта module в секундах"""
+    return next(r.cumulative_us for r in records if r.module == module) / 1e6
+
+
+def by_package(records: List[ImportRecord]) -> Dict[str, int]:
+    """Собственное время импорта по пакетам верхнего уровня"""
+    totals: Dict[str, int] = defaultdict(int)
+    for record in records:
+        totals[record.module.split(".")[0]] += record.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import time profile")
+    parser.add_argument("--module", default="core.app", help="Module to import")
+    parser.add_argument("--top", type=int, default=25, help="Rows per table")
+    args = parser.parse_args()
+
+    records = profile_imports(args.module)
+    print(f"{args.module}: {import_seconds(records, args.module) * 1000:.1f} ms\n")
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for record in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:args.top]:
+        print(f"{record.cumulative_us / 1000:14.1f} {record.self_us / 1000:9.1f}  {'  ' * record.depth}{record.module}")
+
+    print(f"\n{'self ms':>14}  package")
+    for package, self_us in list(by_package(records).items())[:args.top]:
+        print(f"{self_us / 1000:14.1f}  {package}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Время холодного старта воркера.
+
+Каждый запуск - отдельный процесс: импорт core.app и выполнение startup-части
+lifespan (без миграций - они выполняются один раз до старта воркеров).
+Нужна БД из DATABASE_URL; с --import-only меряется только импорт.
+
+Запуск (из папки backend):
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Выполняется в дочернем процессе - чистый интерпретатор на каждый запуск
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+from core.app import app
+imported = time.perf_counter() - started
+
+async def startup():
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter() - started
+    return ready
+
+ready = None if {import_only} else asyncio.run(startup())
+print(json.dumps({{"import": imported, "startup": ready}}))
+"""
+
+
+def _run(import_only: bool) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(import_only=import_only)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _report(name: str, samples) -> None:
+    print(f"{name:<10} median {statistics.median(samples) * 1000:8.1f} ms  max {max(samples) * 1000:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Worker cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to start")
+    parser.add_argument("--import-only", action="store_true", help="Measure only the app import (no database)")
+    args = parser.parse_args()
+
+    results = [_run(args.import_only) for _ in range(args.runs)]
+    _report("import", [r["import"] for r in results])
+    if not args.import_only:
+        _report("startup", [r["startup"] for r in results])
+
+
+if __name__ == "__main__":
+    main()
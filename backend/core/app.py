@@ -1,124 +1,26 @@
 """Main FastAPI Application"""
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from sqlalchemy import select, text
 
 from .config import get_settings
 from .schemas import SuccessResponse
-from .database import engine, Base, async_session_maker
-from .models import CategoryModel, ProductModel, UserModel, UserProfileModel
+from .database import ReadYourWritesMiddleware, pool_stats, replica_router
+from .jobs import job_runner
+from .events import event_bus
+from .maintenance import register_sweeper_jobs
+from .dependencies import require_admin, require_metrics_token
+from .rate_limit import RateLimitMiddleware
+from .metrics import MetricsMiddleware, QueryStatsMiddleware, render as render_metrics
+from .touch import touches
+from modules.orders.application.archive import archive_orders
+from modules.analytics.application.rollups import backfill_sales_rollups
+from modules.users.application.refresh_tokens import revoked_tokens
 
 settings = get_settings()
 
 
-async def seed_database():
-    """Seed database with initial data if empty"""
-    async with async_session_maker() as session:
-        # Check if categories exist
-        result = await session.execute(select(CategoryModel).limit(1))
-        if result.scalar():
-            print("Database already seeded, skipping...")
-            return
-
-        print("Seeding database...")
-
-        # Categories
-        categories = [
-            CategoryModel(name='Электроника', slug='elektronika', description='Смартфоны, ноутбуки и другие электронные устройства'),
-            CategoryModel(name='Одежда', slug='odezhda', description='Одежда для мужчин и женщин'),
-            CategoryModel(name='Бытовая техника', slug='byitovaya-tehnika', description='Техника для дома'),
-            CategoryModel(name='Книги', slug='knigi', description='Книги различных жанров'),
-            CategoryModel(name='Спорт и отдых', slug='sport-i-otdyh', description='Товары для спорта и отдыха'),
-            CategoryModel(name='Красота и здоровье', slug='krasota-i-zdorove', description='Косметика и товары для здоровья'),
-        ]
-        session.add_all(categories)
-        await session.flush()
-
-        # Products
-        products = [
-            # Electronics
-            ProductModel(name='iPhone 15 Pro 256GB', slug='iphone-15-pro-256gb',
-                description='Смартфон Apple iPhone 15 Pro с дисплеем 6.1 дюйма, камерой 48 Мп и процессором A17 Pro.',
-                price=9999000, stock=50, category_id=1, images='["https://images.unsplash.com/photo-1592750475338-74b7b210f4f7?w=400"]'),
-            ProductModel(name='Samsung Galaxy S24 Ultra', slug='samsung-galaxy-s24-ultra',
-                description='Флагман Samsung с экраном 6.8 дюйма, камерой 200 Мп и S Pen.',
-                price=8999000, stock=35, category_id=1, images='["https://images.unsplash.com/photo-1610945415295-d9bbf067e59c?w=400"]'),
-            ProductModel(name='MacBook Air 13" M3', slug='macbook-air-13-m3',
-                description='Облегченный ноутбук Apple с процессором M3, 8 ГБ RAM и 256 ГБ SSD.',
-                price=12999000, stock=20, category_id=1, images='["https://images.unsplash.com/photo-1517336714731-489679fd1ca8?w=400"]'),
-            # Clothing
-            ProductModel(name='Классический худи черного цвета', slug='hudi-chernyy',
-                description='Удобный худи из хлопка 100%. Идеален для повседневной носки.',
-                price=399900, stock=100, category_id=2, images='["https://images.unsplash.com/photo-1556821840-022fac958a99?w=400"]'),
-            ProductModel(name='Джинсы slim fit', slug='dzhinsy-slim-fit',
-                description='Классические джинсы прямого кроя из денима. Размеры: 28-34.',
-                price=299900, stock=80, category_id=2, images='["https://images.unsplash.com/photo-1542272604-787c3835535d?w=400"]'),
-            ProductModel(name='Кофта с капюшоном', slug='kofta-s-kapyushonom',
-                description='Теплая кофта с капюшоном для прохладной погоды.',
-                price=599900, stock=60, category_id=2, images='["https://images.unsplash.com/photo-1556905055-2f1480df5c44?w=400"]'),
-            # Appliances
-            ProductModel(name='Робот-пылесос Xiaomi', slug='robot-pylesos-xiaomi',
-                description='Автоматический робот-пылесос с навигацией LDS, мощностью 2100 Па.',
-                price=2499000, stock=25, category_id=3, images='["https://images.unsplash.com/photo-1558618666-f76279422b5a?w=400"]'),
-            ProductModel(name='Умная колонка Яндекс Станция Макс', slug='yandex-stanciya-maks',
-                description='Умная колонка с голосовым помощником Алиса, 60 Вт мощности.',
-                price=3499000, stock=40, category_id=3, images='["https://images.unsplash.com/photo-1589492477829-5ee9a5c6e45d?w=400"]'),
-            ProductModel(name='Фен Dyson Supersonic', slug='fen-dyson-supersonic',
-                description='Профессиональный фен с умным контролем температуры и ионизацией.',
-                price=2999000, stock=15, category_id=3, images='["https://images.unsplash.com/photo-1522338188442-1e2e3a72f8f9?w=400"]'),
-            # Books
-            ProductModel(name='Мастер и Маргарита', slug='master-i-margarita',
-                description='Роман Михаила Булгакова. Перепечатка. Твердый переплет.',
-                price=89900, stock=200, category_id=4, images='["https://images.unsplash.com/photo-1512820790803-83ca734de79d?w=400"]'),
-            ProductModel(name='Властелин колец', slug='vlactelin-kolec',
-                description='Роман-эпопея Дж.Р.Р. Толкина. Полное собрание в трех томах.',
-                price=129900, stock=150, category_id=4, images='["https://images.unsplash.com/photo-1544947950-fa07a98d237f?w=400"]'),
-            ProductModel(name='Код Да Винчи', slug='kod-da-vinchi',
-                description='Детективный роман Дэна Брауна. Бестселлер по всему миру.',
-                price=69900, stock=180, category_id=4, images='["https://images.unsplash.com/photo-1589829085413-56de8ae18c29?w=400"]'),
-            # Sport
-            ProductModel(name='Йога-мат премиум', slug='yoga-mat-premium',
-                description='Мат для йоги из экологического материала ТПЭ. Размер: 183x61 см.',
-                price=199900, stock=90, category_id=5, images='["https://images.unsplash.com/photo-1601925261366-7df1bc1dbe51?w=400"]'),
-            ProductModel(name='Гантели 2 кг хром', slug='ganteli-2kg-hrom',
-                description='Комплект гантелей по 2 кг для фитнес-тренировок.',
-                price=79900, stock=120, category_id=5, images='["https://images.unsplash.com/photo-1517927217850-9c592e83af84?w=400"]'),
-            ProductModel(name='Велосипед дорожный', slug='velosiped-dorozhnyy',
-                description='Дорожный велосипед с алюминиевой рамой, 21 скорость.',
-                price=2999000, stock=12, category_id=5, images='["https://images.unsplash.com/photo-1532235289296-ecf7a1ca42ca?w=400"]'),
-            # Beauty
-            ProductModel(name='Парфюмерный набор Chanel', slug='parfyumernyy-nabor-chanel',
-                description='Набор из трех ароматов: Chanel No.5, Coco Mademoiselle, Bleu de Chanel.',
-                price=4999000, stock=30, category_id=6, images='["https://images.unsplash.com/photo-1541643600914-78a8685c2f0d?w=400"]'),
-            ProductModel(name='Набор косметики MAC', slug='nabor-kosmetiki-mac',
-                description='Профессиональный набор косметики MAC: тональник, помады, тушь.',
-                price=3499000, stock=45, category_id=6, images='["https://images.unsplash.com/photo-1512496015851-a90fb94ba6f7?w=400"]'),
-            ProductModel(name='Шампунь и кондиционер Loreal', slug='shampun-i-kondicioner-loreal',
-                description='Набор для волос: шампунь 400мл + кондиционер 400мл.',
-                price=99900, stock=200, category_id=6, images='["https://images.unsplash.com/photo-1596462502292-c2f2caa6cc38?w=400"]'),
-        ]
-        session.add_all(products)
-
-        # Test users (password: password123)
-        users = [
-            UserModel(email='test@example.com', password_hash='$2b$12$LQv3c1yqBWVHxmd0VHW1O9qWBz.HfWKR.k', role='customer'),
-            UserModel(email='admin@example.com', password_hash='$2b$12$LQv3c1yqBWVHxmd0VHW1O9qWBz.HfWKR.k', role='admin'),
-        ]
-        session.add_all(users)
-        await session.flush()
-
-        # User profiles
-        profiles = [
-            UserProfileModel(user_id=1, first_name='Иван', last_name='Иванов', phone='+79991234567'),
-            UserProfileModel(user_id=2, first_name='Администратор', last_name='Системы', phone='+799976543210'),
-        ]
-        session.add_all(profiles)
-
-        await session.commit()
-        print("Database seeded: 6 categories, 18 products, 2 users")
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifecycle events"""
@@ -126,18 +28,36 @@ async def lifespan(app: FastAPI):
     print(f"{settings.APP_NAME} v{settings.APP_VERSION} starting...")
     print(f"Database: {settings.DATABASE_URL.split('@')[-1] if '@' in settings.DATABASE_URL else settings.DATABASE_URL}")
 
-    # Create tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    print("Database tables created/verified")
-
-    # Seed data
-    await seed_database()
+    # Схема - миграциями (python -m database.migrate), тестовые данные -
+    # python -m database.seed; воркеры при старте не трогают схему
+
+    # Отозванные refresh токены - в памяти, чтобы повторы отклонялись без запроса к БД
+    await revoked_tokens.load()
+
+    # Background jobs
+    if settings.SWEEPER_ENABLED:
+        register_sweeper_jobs(job_runner)
+    if settings.ORDER_ARCHIVE_ENABLED:
+        job_runner.add_job("archive_orders", archive_orders, settings.ORDER_ARCHIVE_INTERVAL_SECONDS)
+    job_runner.add_job("backfill_sales_rollups", backfill_sales_rollups, settings.ANALYTICS_BACKFILL_INTERVAL_SECONDS)
+    if settings.EVENTS_DISPATCH_ENABLED:
+        job_runner.add_job("dispatch_events", event_bus.drain, settings.EVENTS_DISPATCH_INTERVAL_SECONDS)
+    # Broadcast-события (сброс кэшей) - в каждом воркере; первый опрос запоминает позицию в outbox
+    await event_bus.poll()
+    job_runner.add_job("broadcast_events", event_bus.poll, settings.EVENTS_BROADCAST_INTERVAL_SECONDS)
+    if replica_router.replicas:
+        await replica_router.check_lag()
+        job_runner.add_job("check_replica_lag", replica_router.check_lag, settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS)
+    job_runner.add_job("flush_touches", touches.flush, settings.TOUCH_FLUSH_INTERVAL_SECONDS)
+    job_runner.start()
 
     yield
 
     # Shutdown
     print("Shutting down...")
+    await job_runner.stop()
+    # Накопленные отметки last_login_at не должны потеряться при деплое
+    await touches.flush()
 
 
 # Create app
@@ -151,6 +71,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rate limiting (до роутинга - лишние запросы не доходят до БД и bcrypt)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -160,6 +84,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Число и время запросов к БД за HTTP запрос; в DEBUG - заголовок Server-Timing
+app.add_middleware(
+    QueryStatsMiddleware,
+    server_timing=settings.DEBUG,
+    n_plus_one_threshold=settings.N_PLUS_ONE_THRESHOLD,
+)
+
+# Read-your-writes: после записи клиент читает с primary (cookie со временем записи)
+if replica_router.replicas:
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=settings.REPLICA_STICKY_SECONDS)
+
+# Метрики - внешним слоем, чтобы учитывать и ответы 429
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 
 # ============================================
 # HEALTH CHECK
@@ -182,6 +121,24 @@ async def health_check() -> dict:
     }
 
 
+@app.get("/api/admin/jobs", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def jobs_metrics() -> dict:
+    """Метрики фоновых задач (строк обработано, затраченное время)"""
+    return job_runner.snapshot()
+
+
+@app.get("/api/admin/db/pool", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def db_pool_metrics() -> dict:
+    """Пул соединений с БД: занятые соединения, overflow, ожидание и таймауты выдачи"""
+    return pool_stats()
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def metrics() -> PlainTextResponse:
+    """Метрики в формате Prometheus (Bearer METRICS_TOKEN)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # ============================================
 # INCLUDE ROUTERS
 # ============================================
@@ -190,8 +147,17 @@ from modules.users.presentation.api.routes import router as auth_router
 from modules.products.presentation.api.routes import router as products_router
 from modules.cart.presentation.api.routes import router as cart_router
 from modules.orders.presentation.api.routes import router as orders_router
+from modules.analytics.presentation.api.routes import router as analytics_router
 
 app.include_router(auth_router)
 app.include_router(products_router)
 app.include_router(cart_router)
 app.include_router(orders_router)
+app.include_router(analytics_router)
+
+# Подписчики доменных событий
+from modules.users.application.subscribers import register_user_subscribers
+from modules.notifications.application.emails import register_email_subscribers
+
+register_user_subscribers(event_bus)
+register_email_subscribers(event_bus)
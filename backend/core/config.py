@@ -2,7 +2,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
 from functools import lru_cache
-from typing import Union, List
+from typing import Union, List, Optional
 
 
 class Settings(BaseSettings):
@@ -63,11 +63,70 @@ class Settings(BaseSettings):
 
         return v
 
+    # Read replicas (comma-separated URLs); read-only GET routes round-robin over them
+    DATABASE_REPLICA_URLS: Union[str, List[str]] = []
+    # Replicas lagging more than this are skipped until the next check
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 5.0
+    # After a client's own write (last_write cookie), its reads go to the primary for this long
+    REPLICA_STICKY_SECONDS: int = 30
+
+    @field_validator('DATABASE_REPLICA_URLS', mode='before')
+    @classmethod
+    def parse_replica_urls(cls, v: Union[str, List[str]]) -> List[str]:
+        """Parse DATABASE_REPLICA_URLS from comma-separated string"""
+        if isinstance(v, str):
+            v = [url.strip() for url in v.split(",") if url.strip()]
+        return [cls.convert_database_url(url) for url in v]
+
+    # Connection pool. Unset values get defaults for the connection mode:
+    # direct connection vs. transaction pooler (Supabase pgbouncer=true, Neon -pooler)
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: Optional[int] = None
+    # asyncpg prepared statement cache (forced to 0 behind a transaction pooler by default)
+    DB_STATEMENT_CACHE_SIZE: Optional[int] = None
+    # Query instrumentation: log statements slower than this (with parameters)
+    # and statement shapes repeated this many times in one request (likely N+1)
+    SLOW_QUERY_SECONDS: float = 0.5
+    N_PLUS_ONE_THRESHOLD: int = 5
+
     # JWT
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Password hashing (bcrypt cost; hashing runs in a bounded thread pool)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    # Verified access tokens cached until their exp (per process)
+    TOKEN_CACHE_SIZE: int = 10000
+    # Recently revoked refresh tokens kept in memory (per process); older ones are checked in the DB
+    REVOKED_TOKENS_MAX_SIZE: int = 100000
+    # Revocations loaded at startup: only those from the last N minutes
+    REVOKED_TOKENS_LOAD_MINUTES: int = 60
+
+    # Authenticated user cache (per process)
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 30
+
+    # Rate limiting (token bucket per process; requests over the limit get 429)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN_PER_IP_PER_MINUTE: int = 20
+    RATE_LIMIT_LOGIN_PER_ACCOUNT_PER_MINUTE: int = 5
+    RATE_LIMIT_REGISTER_PER_IP_PER_MINUTE: int = 10
+    RATE_LIMIT_CHECKOUT_PER_USER_PER_MINUTE: int = 10
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Take the client IP from X-Forwarded-For (only behind a trusted proxy)
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+
+    # Prometheus metrics at /metrics (per-route latency, pools, caches)
+    METRICS_ENABLED: bool = True
+    # Bearer token the scraper must send to /metrics; unset - /metrics is not served
+    METRICS_TOKEN: Optional[str] = None
 
     # CORS
     CORS_ORIGINS: Union[str, List[str]] = ["http://localhost:3000", "http://localhost:8000"]
@@ -76,6 +135,56 @@ class Settings(BaseSettings):
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
 
+    # Background sweeper (cleanup of stale rows)
+    SWEEPER_ENABLED: bool = True
+    SWEEPER_INTERVAL_SECONDS: int = 3600
+    SWEEPER_BATCH_SIZE: int = 1000
+    SWEEPER_BATCH_PAUSE_SECONDS: float = 0.1
+    CART_TTL_DAYS: int = 30
+
+    # Order numbers are reserved in blocks per worker (hi/lo)
+    ORDER_NUMBER_BLOCK_SIZE: int = 100
+
+    # Archiving of delivered/cancelled orders into *_archive tables
+    ORDER_ARCHIVE_ENABLED: bool = True
+    ORDER_ARCHIVE_AFTER_MONTHS: int = 12
+    ORDER_ARCHIVE_INTERVAL_SECONDS: int = 86400
+
+    # Sales rollups: the reconciliation job rebuilds the last N complete days
+    ANALYTICS_BACKFILL_DAYS: int = 2
+    ANALYTICS_BACKFILL_INTERVAL_SECONDS: int = 86400
+
+    # Streaming CSV export: rows fetched from the server-side cursor per chunk
+    EXPORT_CHUNK_ROWS: int = 1000
+
+    # Domain events: outbox dispatcher
+    EVENTS_DISPATCH_ENABLED: bool = True
+    EVENTS_DISPATCH_INTERVAL_SECONDS: float = 1.0
+    EVENTS_BATCH_SIZE: int = 100
+    EVENTS_MAX_ATTEMPTS: int = 5
+    # A claimed batch is redelivered after this long if its worker never finished it
+    EVENTS_CLAIM_SECONDS: float = 300.0
+    EVENTS_RETENTION_DAYS: int = 7
+    # Broadcast subscribers (cache invalidation) run in every worker: each one
+    # polls the outbox; events committed out of id order are caught within the lookback
+    EVENTS_BROADCAST_INTERVAL_SECONDS: float = 1.0
+    EVENTS_BROADCAST_LOOKBACK_SECONDS: float = 60.0
+
+    # Notification emails (order events); without SMTP_HOST emails are only logged
+    SMTP_HOST: Optional[str] = None
+    SMTP_PORT: int = 587
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_STARTTLS: bool = True
+    EMAIL_FROM: str = "shop@example.com"
+
+    # Touch columns (last_login_at) are buffered in memory and flushed in batches
+    TOUCH_FLUSH_INTERVAL_SECONDS: float = 5.0
+    TOUCH_BATCH_SIZE: int = 1000
+
+    # Idempotency-Key support for checkout / order creation
+    IDEMPOTENCY_TTL_HOURS: int = 24
+
     @field_validator('CORS_ORIGINS', mode='before')
     @classmethod
     def parse_cors_origins(cls, v: Union[str, List[str]]) -> List[str]:
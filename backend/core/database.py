@@ -1,47 +1,215 @@
 """Подключение к базе данных"""
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
-from typing import AsyncGenerator
+import logging
+import re
+import time
+from contextvars import ContextVar
+from sqlalchemy import event, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.requests import cookie_parser
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
 from .config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
-# Parse DATABASE_URL and set connect_args
-db_url = settings.DATABASE_URL
-connect_args = {}
-
-# For Supabase/Neon: extract params and set connect_args
-if 'supabase' in db_url or 'neon.tech' in db_url:
-    # Remove query params from URL (asyncpg doesn't parse them)
-    if '?' in db_url:
-        base_url, params_str = db_url.split('?', 1)
-        db_url = base_url
-
-        # Parse params
-        params = {}
-        for param in params_str.split('&'):
-            if '=' in param:
-                key, value = param.split('=', 1)
-                params[key] = value
-
-        # Set connect_args for asyncpg
-        if params.get('ssl') == 'require':
-            connect_args['ssl'] = True
-        if params.get('pgbouncer') == 'true':
-            # For Supabase pooler - use server-side binding
-            connect_args['server_settings'] = {'statement_cache_mode': 'describe'}
 
-# Async engine
-engine_kwargs = {
-    "echo": settings.DEBUG,
-    "future": True,
-    "pool_pre_ping": True,
-}
-if connect_args:
-    engine_kwargs["connect_args"] = connect_args
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул соединений со счётчиками ожидания и таймаутов выдачи соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds, 6),
+            "wait_seconds_max": round(self.max_wait_seconds, 6),
+        }
+
+
+def _pick(value, direct, pooled, behind_pooler: bool):
+    """Значение из настроек или значение по умолчанию для режима подключения"""
+    if value is not None:
+        return value
+    return pooled if behind_pooler else direct
+
+
+def _engine_args(url: str) -> Tuple[str, Dict[str, Any], bool]:
+    """URL без query-параметров, аргументы create_async_engine и признак пулера"""
+    connect_args = {}
+    behind_pooler = False
+
+    # For Supabase/Neon: extract params and set connect_args
+    if 'supabase' in url or 'neon.tech' in url:
+        # Neon pooler endpoints have "-pooler" in the host name
+        behind_pooler = '-pooler' in url
+
+        # Remove query params from URL (asyncpg doesn't parse them)
+        if '?' in url:
+            base_url, params_str = url.split('?', 1)
+            url = base_url
+
+            # Parse params
+            params = {}
+            for param in params_str.split('&'):
+                if '=' in param:
+                    key, value = param.split('=', 1)
+                    params[key] = value
+
+            # Set connect_args for asyncpg
+            if params.get('ssl') == 'require':
+                connect_args['ssl'] = True
+            if params.get('pgbouncer') == 'true':
+                behind_pooler = True
+
+    # pgbouncer/Supavisor/Neon pooler in transaction mode: a prepared statement
+    # may land on another server connection, so asyncpg caches must be off.
+    # The pooler also holds the real connections - keep our pool small and
+    # recycle before its idle timeout.
+    if url.startswith('postgresql+asyncpg'):
+        statement_cache_size = _pick(settings.DB_STATEMENT_CACHE_SIZE, 100, 0, behind_pooler)
+        connect_args['statement_cache_size'] = statement_cache_size
+        connect_args['prepared_statement_cache_size'] = statement_cache_size
+
+    kwargs = {
+        "echo": settings.DEBUG,
+        "future": True,
+        "pool_pre_ping": True,
+        "poolclass": InstrumentedPool,
+        "pool_size": _pick(settings.DB_POOL_SIZE, 10, 5, behind_pooler),
+        "max_overflow": _pick(settings.DB_MAX_OVERFLOW, 10, 5, behind_pooler),
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": _pick(settings.DB_POOL_RECYCLE_SECONDS, 1800, 300, behind_pooler),
+    }
+    if connect_args:
+        kwargs["connect_args"] = connect_args
+    return url, kwargs, behind_pooler
+
+
+# ============================================
+# QUERY INSTRUMENTATION
+# ============================================
+
+# Нумерованные плейсхолдеры asyncpg ($1, $2) и списки плейсхолдеров (IN (?, ?, ?))
+# сводятся к одному виду - форма запроса не зависит от длины списка
+_NUMBERED_PLACEHOLDER = re.compile(r"\$\d+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Текст запроса без различий в длине списков параметров"""
+    return _PLACEHOLDER_LIST.sub("(?)", _NUMBERED_PLACEHOLDER.sub("?", statement))
+
+
+class QueryStats:
+    """Запросы к БД в рамках одного HTTP запроса"""
+
+    __slots__ = ("count", "seconds", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Dict[str, int] = {}
 
-engine = create_async_engine(db_url, **engine_kwargs)
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        shape = statement_shape(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Формы запросов, выполненные threshold и более раз (вероятный N+1)"""
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+
+# Статистика текущего запроса (выставляет QueryStatsMiddleware); None - вне HTTP запроса
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    stats = query_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    if seconds >= settings.SLOW_QUERY_SECONDS:
+        logger.warning("Slow query (%.3f s): %s; parameters: %.500r", seconds, statement, parameters)
+
+
+def _handle_error(context):
+    # after_cursor_execute не вызывается при ошибке - убираем отметку начала
+    if context.connection is not None:
+        started = context.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+def instrument_queries(engine: AsyncEngine) -> AsyncEngine:
+    """Подключить к engine учёт запросов: время, число, N+1, медленные запросы"""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+    return engine
+
+
+class ReadOnlySession(Session):
+    """Сессия только для чтения: изменения ORM-объектов не записываются"""
+
+    def flush(self, objects=None):
+        if self.new or self.dirty or self.deleted:
+            raise RuntimeError("Read-only session cannot flush changes")
+        super().flush(objects)
+
+
+def read_sessions(engine: AsyncEngine) -> async_sessionmaker:
+    """
+    Фабрика сессий только для чтения поверх engine (тот же пул).
+
+    Autocommit: ни BEGIN, ни COMMIT/ROLLBACK - только сами запросы.
+    """
+    return async_sessionmaker(
+        engine.execution_options(isolation_level="AUTOCOMMIT"),
+        class_=AsyncSession,
+        sync_session_class=ReadOnlySession,
+        expire_on_commit=False,
+    )
+
+
+# Async engine
+db_url, engine_kwargs, behind_pooler = _engine_args(settings.DATABASE_URL)
+engine = instrument_queries(create_async_engine(db_url, **engine_kwargs))
 
 # Async session maker
 async_session_maker = async_sessionmaker(
@@ -50,6 +218,214 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+read_session_maker = read_sessions(engine)
+
+
+# ============================================
+# READ REPLICAS
+# ============================================
+
+# Cookie с временем последней записи клиента (unix time) - read-your-writes между воркерами
+LAST_WRITE_COOKIE = "last_write"
+
+
+class WriteMarker:
+    """
+    Read-your-writes текущего запроса: время последней записи клиента
+    (из cookie) и признак, что запрос сам что-то записал.
+    """
+
+    __slots__ = ("last_write", "wrote")
+
+    def __init__(self, last_write: Optional[float] = None):
+        self.last_write = last_write
+        self.wrote = False
+
+
+# Метка текущего запроса (выставляет ReadYourWritesMiddleware); None - вне HTTP запроса
+request_writes: ContextVar[Optional[WriteMarker]] = ContextVar("request_writes", default=None)
+
+
+def _after_flush(session, flush_context):
+    # flush без изменений до after_flush не доходит
+    session.info["wrote"] = True
+
+
+def _do_orm_execute(state):
+    # INSERT/UPDATE/DELETE через session.execute - без flush
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+
+event.listen(Session, "after_flush", _after_flush)
+event.listen(Session, "do_orm_execute", _do_orm_execute)
+
+
+def last_write() -> Optional[float]:
+    """Время последней записи клиента текущего запроса (cookie) или None"""
+    marker = request_writes.get()
+    return marker.last_write if marker is not None else None
+
+
+def mark_write() -> None:
+    """Запрос записал данные - ответ обновит cookie клиента"""
+    marker = request_writes.get()
+    if marker is not None:
+        marker.wrote = True
+
+
+# Отставание реплики в секундах; 0, если всё полученное WAL уже применено
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaRouter:
+    """
+    Выбор базы для чтения: реплики по кругу, primary - если реплик нет,
+    все отстают больше max_lag или клиент недавно сам писал.
+
+    После записи клиент sticky_seconds читает с primary, чтобы сразу видеть
+    свои изменения (например, только что оформленный заказ). Время записи
+    приходит от клиента (cookie), поэтому метка работает на любом воркере.
+    """
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replicas: List[async_sessionmaker],
+        max_lag: float,
+        sticky_seconds: float,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self._healthy = [True] * len(replicas)
+        self._lag: List[Optional[float]] = [None] * len(replicas)
+        self._next = 0
+        self.sticky_seconds = sticky_seconds
+        self.primary_fallbacks = 0
+
+    def sticky(self, last_write: Optional[float]) -> bool:
+        """Клиент писал не раньше sticky_seconds назад - читать с primary"""
+        return last_write is not None and 0 <= time.time() - last_write < self.sticky_seconds
+
+    def session(self, last_write: Optional[float] = None) -> AsyncSession:
+        """Сессия только для чтения на выбранной базе"""
+        return self.session_maker(last_write)()
+
+    def session_maker(self, last_write: Optional[float] = None) -> async_sessionmaker:
+        if not self.replicas:
+            return self.primary
+        if self.sticky(last_write):
+            return self.primary
+        healthy = [maker for maker, ok in zip(self.replicas, self._healthy) if ok]
+        if not healthy:
+            self.primary_fallbacks += 1
+            return self.primary
+        self._next = (self._next + 1) % len(healthy)
+        return healthy[self._next]
+
+    async def check_lag(self) -> int:
+        """Измерить отставание реплик (периодическая задача). Возвращает число доступных"""
+        for index, maker in enumerate(self.replicas):
+            try:
+                async with maker() as session:
+                    if session.bind.dialect.name == "postgresql":
+                        lag = float(await session.scalar(REPLICA_LAG_SQL))
+                    else:
+                        await session.execute(text("SELECT 1"))
+                        lag = 0.0
+            except Exception:
+                logger.warning("Replica %d is unavailable", index, exc_info=True)
+                lag = None
+            self._lag[index] = lag
+            self._healthy[index] = lag is not None and lag <= self.max_lag
+        return sum(self._healthy)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "url": maker.kw["bind"].url.render_as_string(hide_password=True),
+                "healthy": healthy,
+                "lag_seconds": lag,
+                **maker.kw["bind"].pool.stats(),
+            }
+            for maker, healthy, lag in zip(self.replicas, self._healthy, self._lag)
+        ]
+
+
+def _last_write(scope) -> Optional[float]:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            try:
+                return float(cookie_parser(value.decode("latin-1"))[LAST_WRITE_COOKIE])
+            except (KeyError, ValueError):
+                return None
+    return None
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware: время последней записи клиента из cookie - в
+    request_writes; если запрос что-то записал, ответ выставляет cookie
+    с текущим временем на sticky_seconds.
+
+    Cookie не подписана: подделав её, клиент лишь сам читает с primary.
+    """
+
+    def __init__(self, app, sticky_seconds: float = settings.REPLICA_STICKY_SECONDS):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        marker = WriteMarker(_last_write(scope))
+        token = request_writes.set(marker)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and marker.wrote:
+                cookie = (
+                    f"{LAST_WRITE_COOKIE}={time.time():.3f}; Max-Age={int(self.sticky_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            request_writes.reset(token)
+
+
+def _replica_session_makers() -> List[async_sessionmaker]:
+    makers = []
+    for url in settings.DATABASE_REPLICA_URLS:
+        replica_url, kwargs, _ = _engine_args(url)
+        makers.append(read_sessions(instrument_queries(create_async_engine(replica_url, **kwargs))))
+    return makers
+
+
+replica_router = ReplicaRouter(
+    read_session_maker,
+    _replica_session_makers(),
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Текущее состояние пулов соединений (primary и реплики)"""
+    return {
+        "behind_pooler": behind_pooler,
+        **engine.pool.stats(),
+        "replicas": replica_router.stats(),
+        "replica_primary_fallbacks": replica_router.primary_fallbacks,
+    }
+
 
 class Base(DeclarativeBase):
     """Базовая класс для всех моделей"""
@@ -62,8 +438,33 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         try:
             yield session
             await session.commit()
+            if session.info.pop("wrote", False):
+                mark_write()
         except Exception:
             await session.rollback()
             raise
         finally:
             await session.close()
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия для GET-роутов, которые только читают.
+
+    Запросы выполняются в autocommit: без BEGIN и без COMMIT после
+    обработчика. Каждый запрос видит свой снимок данных - для каталога
+    (count + страница) это допустимо. При настроенных репликах читает с них;
+    клиент, недавно писавший сам (cookie last_write), читает с primary.
+    """
+    async with replica_router.session(last_write()) as session:
+        yield session
+
+
+def get_session_maker() -> async_sessionmaker:
+    """
+    Фабрика сессий (для зависимостей, которым сессия нужна не всегда).
+
+    В отличие от get_session, соединение не берётся из пула, пока зависимость
+    сама не откроет сессию.
+    """
+    return async_session_maker
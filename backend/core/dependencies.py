@@ -1,45 +1,119 @@
 """Зависимости для FastAPI (Dependency Injection)"""
+import secrets
+from dataclasses import dataclass
+from datetime import datetime
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
-from jose import jwt, JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from typing import AsyncGenerator, Optional
+from jose import JWTError
 
-from .database import get_session
+from .cache import TTLCache
+from .security import decode_access_token
+from .database import get_session, get_session_maker, last_write, replica_router
 from .config import get_settings
 from .models import UserModel
 
 settings = get_settings()
 security = HTTPBearer()
+metrics_security = HTTPBearer(auto_error=False)
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Текущий пользователь: неизменяемый снимок из кэша (без привязки к сессии)"""
+    id: int
+    email: str
+    role: str
+    is_active: bool
+    is_verified: bool
+    created_at: Optional[datetime]
+    last_login_at: Optional[datetime]
+    has_archived_orders: bool = False
+
+
+user_cache: TTLCache[CurrentUser] = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Сбросить пользователя из кэша (смена роли, блокировка, логаут)"""
+    user_cache.pop(user_id)
+
+
+async def _load_user(session_maker: async_sessionmaker, user_id: int) -> Optional[CurrentUser]:
+    async with session_maker() as session:
+        row = (await session.execute(
+            select(
+                UserModel.id,
+                UserModel.email,
+                UserModel.role,
+                UserModel.is_active,
+                UserModel.is_verified,
+                UserModel.created_at,
+                UserModel.last_login_at,
+                UserModel.has_archived_orders,
+            ).where(UserModel.id == user_id)
+        )).first()
+    return CurrentUser(*row) if row else None
 
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: AsyncSession = Depends(get_session)
-) -> UserModel:
-    """Получить текущего пользователя по JWT токену"""
+    session_maker: async_sessionmaker = Depends(get_session_maker)
+) -> CurrentUser:
+    """
+    Получить текущего пользователя по JWT токену.
+
+    Пользователь берётся из кэша (USER_CACHE_TTL_SECONDS); сессия БД
+    открывается только при промахе. Возвращается неизменяемый снимок -
+    создание ORM-объекта на каждый запрос стоило бы больше самой проверки.
+    """
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
+        payload = decode_access_token(credentials.credentials)
+        user_id = int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    # TODO: Загрузить пользователя из БД
-    # user = await session.get(UserModel, user_id)
-    # if user is None or not user.is_active:
-    #     raise HTTPException(status_code=401, detail="User not found")
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await _load_user(session_maker, user_id)
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        user_cache.set(user_id, user)
 
-    # Заглушка
-    user = UserModel(id=user_id, email="user@example.com", is_active=True, role="customer")
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="User is inactive")
 
     return user
 
 
-async def require_admin(current_user: UserModel = Depends(get_current_user)) -> UserModel:
+async def get_user_read_session(
+    current_user: CurrentUser = Depends(get_current_user)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия только для чтения для данных пользователя (история заказов).
+
+    Как get_read_session, но только для авторизованного пользователя.
+    """
+    async with replica_router.session(last_write()) as session:
+        yield session
+
+
+async def require_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """Требуется роль admin"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
+
+
+async def require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_security)
+) -> None:
+    """Доступ к /metrics по Bearer METRICS_TOKEN; без настроенного токена эндпоинта нет"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
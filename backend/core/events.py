@@ -0,0 +1,235 @@
+"""Доменные события: transactional outbox и внутрипроцессная шина подписчиков"""
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, or_, select, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .config import get_settings
+from .database import async_session_maker
+from .models import OutboxEventModel
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DomainEvent:
+    """Событие из outbox, передаваемое подписчикам"""
+    id: int
+    type: str
+    payload: Dict[str, Any]
+    created_at: Optional[datetime] = None
+
+
+Handler = Callable[[DomainEvent], Awaitable[None]]
+
+
+async def publish_many(session: AsyncSession, events: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+    """
+    Записать события в outbox одним INSERT в транзакции сессии.
+
+    Событие становится видимым диспетчеру только вместе с изменением,
+    которое его породило; при откате транзакции оно исчезает.
+    """
+    rows = [
+        {"event_type": event_type, "payload": json.dumps(jsonable_encoder(payload))}
+        for event_type, payload in events
+    ]
+    if rows:
+        await session.execute(insert(OutboxEventModel).values(rows))
+
+
+async def publish(session: AsyncSession, event_type: str, payload: Dict[str, Any]) -> None:
+    """Записать одно событие в outbox"""
+    await publish_many(session, [(event_type, payload)])
+
+
+class EventBus:
+    """
+    Подписчики на события и диспетчер outbox.
+
+    Обычные подписчики (письма и прочая работа "один раз") вызываются в
+    одном воркере - том, что забрал событие из outbox (drain). Доставка
+    "хотя бы один раз": если подписчик упал, событие будет доставлено
+    повторно всем подписчикам (до EVENTS_MAX_ATTEMPTS попыток), поэтому
+    обработчики должны быть идемпотентными.
+
+    Broadcast-подписчики (сброс кэшей процесса) вызываются в каждом воркере:
+    каждый процесс сам читает outbox (poll) независимо от drain.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Handler]] = defaultdict(list)
+        self._broadcast: Dict[str, List[Handler]] = defaultdict(list)
+        # poll: все id <= _floor уже просмотрены; выше - разосланные id и
+        # (время, наибольший id outbox) прошлых опросов
+        self._floor: Optional[int] = None
+        self._seen: set = set()
+        self._watermarks: Deque[Tuple[float, int]] = deque()
+
+    def subscribe(self, event_type: str, handler: Optional[Handler] = None, broadcast: bool = False):
+        """Подписать обработчик на событие (можно как декоратор); broadcast - в каждом воркере"""
+        subscribers = self._broadcast if broadcast else self._subscribers
+        if handler is None:
+            def decorator(func: Handler) -> Handler:
+                subscribers[event_type].append(func)
+                return func
+            return decorator
+        subscribers[event_type].append(handler)
+        return handler
+
+    def unsubscribe(self, event_type: str, handler: Handler) -> None:
+        for subscribers in (self._subscribers, self._broadcast):
+            if handler in subscribers.get(event_type, ()):
+                subscribers[event_type].remove(handler)
+
+    async def dispatch(self, event: DomainEvent) -> None:
+        """Вызвать подписчиков события по очереди"""
+        for handler in self._subscribers.get(event.type, ()):
+            await handler(event)
+
+    async def _claim(self, session_factory: async_sessionmaker, batch_size: int) -> List[OutboxEventModel]:
+        """Забрать порцию событий: locked_until в короткой транзакции"""
+        now = datetime.now(timezone.utc)
+        async with session_factory() as session:
+            query = (
+                select(OutboxEventModel)
+                .where(
+                    OutboxEventModel.processed_at.is_(None),
+                    OutboxEventModel.attempts < settings.EVENTS_MAX_ATTEMPTS,
+                    or_(OutboxEventModel.locked_until.is_(None), OutboxEventModel.locked_until < now),
+                )
+                .order_by(OutboxEventModel.id)
+                .limit(batch_size)
+            )
+            if session.bind.dialect.name == "postgresql":
+                query = query.with_for_update(skip_locked=True)
+            events = (await session.scalars(query)).all()
+            if events:
+                await session.execute(
+                    update(OutboxEventModel)
+                    .where(OutboxEventModel.id.in_([row.id for row in events]))
+                    .values(locked_until=now + timedelta(seconds=settings.EVENTS_CLAIM_SECONDS))
+                    .execution_options(synchronize_session=False)
+                )
+            await session.commit()
+        return events
+
+    async def drain(
+        self,
+        batch_size: Optional[int] = None,
+        session_factory: Optional[async_sessionmaker] = None,
+    ) -> int:
+        """
+        Разослать необработанные события из outbox порциями.
+
+        Порция забирается в порядке id короткой транзакцией (SKIP LOCKED на
+        PostgreSQL и locked_until на EVENTS_CLAIM_SECONDS, так что воркеры
+        делят очередь). Подписчики вызываются вне транзакции и без соединения
+        из пула - медленный SMTP не держит блокировки; итоги записываются
+        второй короткой транзакцией. Если воркер упал, после locked_until
+        порцию заберёт другой. После ошибки выход до следующего запуска
+        задачи. Возвращает число обработанных событий.
+        """
+        batch_size = batch_size or settings.EVENTS_BATCH_SIZE
+        session_factory = session_factory or async_session_maker
+
+        total = 0
+        while True:
+            events = await self._claim(session_factory, batch_size)
+
+            processed, failed = [], {}
+            for row in events:
+                event = DomainEvent(row.id, row.event_type, json.loads(row.payload), row.created_at)
+                try:
+                    await self.dispatch(event)
+                except Exception as e:
+                    logger.exception("Event %s #%s handler failed", event.type, event.id)
+                    failed[event.id] = repr(e)
+                else:
+                    processed.append(event.id)
+
+            if processed or failed:
+                async with session_factory() as session:
+                    if processed:
+                        await session.execute(
+                            update(OutboxEventModel)
+                            .where(OutboxEventModel.id.in_(processed))
+                            .values(processed_at=datetime.now(timezone.utc), locked_until=None)
+                            .execution_options(synchronize_session=False)
+                        )
+                    for event_id, error in failed.items():
+                        await session.execute(
+                            update(OutboxEventModel)
+                            .where(OutboxEventModel.id == event_id)
+                            .values(attempts=OutboxEventModel.attempts + 1, last_error=error, locked_until=None)
+                            .execution_options(synchronize_session=False)
+                        )
+                    await session.commit()
+
+            total += len(processed)
+            if failed or len(events) < batch_size:
+                return total
+
+    async def poll(
+        self,
+        lookback: Optional[float] = None,
+        session_factory: Optional[async_sessionmaker] = None,
+    ) -> int:
+        """
+        Вызвать broadcast-подписчиков для новых событий outbox в этом процессе.
+
+        Первый вызов только запоминает последний id - история при старте не
+        повторяется. id выдаются до коммита, поэтому событие с меньшим id
+        может стать видимым позже большего: граница _floor сдвигается до
+        наибольшего id outbox, замеченного не меньше lookback секунд назад,
+        а события выше границы перечитываются и отсеиваются по _seen.
+        Ошибка подписчика логируется, событие не повторяется. Возвращает
+        число разосланных событий.
+        """
+        lookback = settings.EVENTS_BROADCAST_LOOKBACK_SECONDS if lookback is None else lookback
+        session_factory = session_factory or async_session_maker
+        event_types = [event_type for event_type, handlers in self._broadcast.items() if handlers]
+
+        async with session_factory() as session:
+            max_id = await session.scalar(select(func.max(OutboxEventModel.id))) or 0
+            if self._floor is None:
+                self._floor = max_id
+                return 0
+            rows = []
+            if event_types:
+                rows = (await session.scalars(
+                    select(OutboxEventModel)
+                    .where(OutboxEventModel.id > self._floor, OutboxEventModel.event_type.in_(event_types))
+                    .order_by(OutboxEventModel.id)
+                )).all()
+
+        delivered = 0
+        for row in rows:
+            if row.id in self._seen:
+                continue
+            self._seen.add(row.id)
+            event = DomainEvent(row.id, row.event_type, json.loads(row.payload), row.created_at)
+            for handler in self._broadcast.get(event.type, ()):
+                try:
+                    await handler(event)
+                except Exception:
+                    logger.exception("Broadcast event %s #%s handler failed", event.type, event.id)
+            delivered += 1
+
+        now = time.monotonic()
+        self._watermarks.append((now, max_id))
+        while self._watermarks and now - self._watermarks[0][0] >= lookback:
+            self._floor = max(self._floor, self._watermarks.popleft()[1])
+        self._seen = {event_id for event_id in self._seen if event_id > self._floor}
+        return delivered
+
+
+event_bus = EventBus()
@@ -0,0 +1,126 @@
+"""Поддержка заголовка Idempotency-Key для неидемпотентных POST-запросов"""
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import get_settings
+from .models import IdempotencyKeyModel
+from .timeutils import as_utc
+
+settings = get_settings()
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# Запросы, выполняющиеся в этом процессе: (user_id, key) -> Future
+_in_flight: Dict[Tuple[int, str], asyncio.Future] = {}
+
+
+def _request_hash(payload: Any) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _insert(session: AsyncSession):
+    """INSERT с поддержкой ON CONFLICT для диалекта сессии"""
+    dialect = postgresql if session.bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(IdempotencyKeyModel)
+
+
+async def _claim(session: AsyncSession, user_id: int, key: str, scope: str, request_hash: str) -> Optional[int]:
+    """
+    Занять ключ в транзакции запроса.
+
+    Если ключ уже занят незавершённой транзакцией другого запроса, PostgreSQL
+    блокирует INSERT до её завершения - так параллельные дубликаты ждут
+    первый запрос. Возвращает id записи или None, если ключ уже использован.
+    """
+    now = datetime.now(timezone.utc)
+    return await session.scalar(
+        _insert(session)
+        .values(
+            user_id=user_id,
+            key=key,
+            scope=scope,
+            request_hash=request_hash,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "key"])
+        .returning(IdempotencyKeyModel.id)
+    )
+
+
+async def run_idempotent(
+    session: AsyncSession,
+    response: Response,
+    user_id: int,
+    key: Optional[str],
+    scope: str,
+    payload: Any,
+    handler: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Выполнить handler не более одного раза для (user_id, Idempotency-Key).
+
+    Ответ первого запроса сохраняется в той же транзакции, что и его изменения.
+    Повтор получает сохранённый ответ без повторного выполнения; повтор с тем же
+    ключом, но другим телом запроса отклоняется (422).
+    """
+    if not key:
+        return await handler()
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_HEADER} is too long")
+
+    request_hash = _request_hash(payload)
+    flight_key = (user_id, key)
+
+    # Дубликат в этом же процессе ждёт выполняющийся запрос, не обращаясь к БД
+    pending = _in_flight.get(flight_key)
+    if pending is not None:
+        await asyncio.shield(pending)
+
+    done = asyncio.get_running_loop().create_future()
+    _in_flight[flight_key] = done
+    try:
+        record_id = await _claim(session, user_id, key, scope, request_hash)
+        if record_id is None:
+            record = await session.scalar(
+                select(IdempotencyKeyModel).where(
+                    IdempotencyKeyModel.user_id == user_id,
+                    IdempotencyKeyModel.key == key,
+                )
+            )
+            if as_utc(record.expires_at) <= datetime.now(timezone.utc):
+                # Ключ истёк - считаем его свободным
+                await session.execute(delete(IdempotencyKeyModel).where(IdempotencyKeyModel.id == record.id))
+                record_id = await _claim(session, user_id, key, scope, request_hash)
+            else:
+                if record.scope != scope or record.request_hash != request_hash:
+                    raise HTTPException(
+                        status_code=422,
+                        detail=f"{IDEMPOTENCY_HEADER} was already used with a different request"
+                    )
+                response.headers[REPLAYED_HEADER] = "true"
+                response.status_code = record.response_code
+                return json.loads(record.response_body)
+
+        result = await handler()
+        await session.execute(
+            update(IdempotencyKeyModel)
+            .where(IdempotencyKeyModel.id == record_id)
+            .values(response_code=200, response_body=json.dumps(jsonable_encoder(result)))
+        )
+        return result
+    finally:
+        if _in_flight.get(flight_key) is done:
+            del _in_flight[flight_key]
+        done.set_result(None)
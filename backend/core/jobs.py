@@ -0,0 +1,106 @@
+"""Фоновые периодические задачи (выполняются внутри процесса приложения)"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Задача возвращает количество обработанных строк (или None)
+JobFunc = Callable[[], Awaitable[Optional[int]]]
+
+
+@dataclass
+class JobMetrics:
+    """Метрики одной задачи"""
+    runs: int = 0
+    failures: int = 0
+    rows_processed: int = 0
+    total_seconds: float = 0.0
+    last_run_seconds: float = 0.0
+    last_run_at: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+class PeriodicJob:
+    """Задача, запускаемая с фиксированным интервалом"""
+
+    def __init__(self, name: str, func: JobFunc, interval: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.metrics = JobMetrics()
+
+    async def run_once(self) -> Optional[int]:
+        """Выполнить задачу один раз и обновить метрики"""
+        started = time.perf_counter()
+        try:
+            rows = await self.func()
+        except Exception as e:
+            self.metrics.failures += 1
+            self.metrics.last_error = repr(e)
+            logger.exception("Job %s failed", self.name)
+            rows = None
+        else:
+            self.metrics.rows_processed += rows or 0
+            self.metrics.last_error = None
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.runs += 1
+            self.metrics.total_seconds += elapsed
+            self.metrics.last_run_seconds = elapsed
+            self.metrics.last_run_at = time.time()
+        return rows
+
+
+class JobRunner:
+    """Планировщик периодических задач на asyncio"""
+
+    def __init__(self):
+        self._jobs: Dict[str, PeriodicJob] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, func: JobFunc, interval: float) -> PeriodicJob:
+        """Зарегистрировать задачу (до вызова start)"""
+        job = PeriodicJob(name, func, interval)
+        self._jobs[name] = job
+        return job
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def _loop(self, job: PeriodicJob) -> None:
+        # Случайная задержка первого запуска, чтобы воркеры не стартовали одновременно
+        await asyncio.sleep(random.uniform(0, job.interval))
+        while True:
+            await job.run_once()
+            await asyncio.sleep(job.interval)
+
+    def start(self) -> None:
+        """Запустить все зарегистрированные задачи"""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._loop(job), name=f"job:{job.name}")
+            for job in self._jobs.values()
+        ]
+
+    async def stop(self) -> None:
+        """Остановить задачи (дождаться отмены)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Метрики всех задач"""
+        return {
+            name: {"interval": job.interval, **asdict(job.metrics)}
+            for name, job in self._jobs.items()
+        }
+
+
+job_runner = JobRunner()
@@ -0,0 +1,87 @@
+"""Очистка устаревших данных (брошенные корзины, истёкшие токены)"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .config import get_settings
+from .database import async_session_maker
+from .jobs import JobRunner
+from .models import CartModel, CartItemModel, RefreshTokenModel, IdempotencyKeyModel, OutboxEventModel
+
+settings = get_settings()
+
+
+async def purge_in_batches(
+    model,
+    condition,
+    batch_size: int = None,
+    pause: float = None,
+    session_factory: async_sessionmaker = None,
+) -> int:
+    """
+    Удалить строки по условию порциями.
+
+    Каждая порция - отдельная короткая транзакция
+    DELETE ... WHERE id IN (SELECT id ... LIMIT n), между порциями пауза,
+    поэтому блокировки не держатся долго. Возвращает число удалённых строк.
+    """
+    batch_size = batch_size or settings.SWEEPER_BATCH_SIZE
+    pause = settings.SWEEPER_BATCH_PAUSE_SECONDS if pause is None else pause
+    session_factory = session_factory or async_session_maker
+
+    total = 0
+    while True:
+        batch_ids = select(model.id).where(condition).limit(batch_size)
+        async with session_factory() as session:
+            result = await session.execute(
+                delete(model)
+                .where(model.id.in_(batch_ids))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+        deleted = result.rowcount or 0
+        total += deleted
+        if deleted < batch_size:
+            return total
+        await asyncio.sleep(pause)
+
+
+async def purge_abandoned_carts(**kwargs) -> int:
+    """Удалить корзины, которые не обновлялись CART_TTL_DAYS дней"""
+    threshold = datetime.now(timezone.utc) - timedelta(days=settings.CART_TTL_DAYS)
+    stale_carts = select(CartModel.id).where(CartModel.updated_at < threshold)
+
+    # Сначала элементы - так каждая порция ограничена и не зависит от каскада FK
+    items = await purge_in_batches(CartItemModel, CartItemModel.cart_id.in_(stale_carts), **kwargs)
+    carts = await purge_in_batches(CartModel, CartModel.updated_at < threshold, **kwargs)
+    return items + carts
+
+
+async def purge_expired_refresh_tokens(**kwargs) -> int:
+    """Удалить истёкшие refresh токены"""
+    now = datetime.now(timezone.utc)
+    return await purge_in_batches(RefreshTokenModel, RefreshTokenModel.expires_at < now, **kwargs)
+
+
+async def purge_expired_idempotency_keys(**kwargs) -> int:
+    """Удалить истёкшие ключи идемпотентности"""
+    now = datetime.now(timezone.utc)
+    return await purge_in_batches(IdempotencyKeyModel, IdempotencyKeyModel.expires_at < now, **kwargs)
+
+
+async def purge_processed_events(**kwargs) -> int:
+    """Удалить события outbox, обработанные более EVENTS_RETENTION_DAYS дней назад"""
+    threshold = datetime.now(timezone.utc) - timedelta(days=settings.EVENTS_RETENTION_DAYS)
+    return await purge_in_batches(OutboxEventModel, OutboxEventModel.processed_at < threshold, **kwargs)
+
+
+def register_sweeper_jobs(runner: JobRunner) -> None:
+    """Зарегистрировать задачи очистки в планировщике"""
+    interval = settings.SWEEPER_INTERVAL_SECONDS
+    runner.add_job("purge_abandoned_carts", purge_abandoned_carts, interval)
+    runner.add_job("purge_expired_refresh_tokens", purge_expired_refresh_tokens, interval)
+    runner.add_job("purge_expired_idempotency_keys", purge_expired_idempotency_keys, interval)
+    runner.add_job("purge_processed_events", purge_processed_events, interval)
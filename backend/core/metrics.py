@@ -0,0 +1,234 @@
+"""Метрики приложения в текстовом формате Prometheus (/metrics)"""
+import bisect
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .database import QueryStats, pool_stats, query_stats
+from .dependencies import user_cache
+from .jobs import job_runner
+from .rate_limit import rate_limit_policies
+from .security import token_cache
+from .touch import touches
+from modules.users.application.refresh_tokens import revoked_tokens
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограммы задержек, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Запросы, не попавшие ни в один роут (404), - одна метка, чтобы не плодить серии
+UNMATCHED_ROUTE = "unmatched"
+
+# (имя, тип, описание, [(метки, значение[, суффикс имени])])
+MetricFamily = Tuple[str, str, str, List[tuple]]
+Collector = Callable[[], Iterable[MetricFamily]]
+
+
+class RequestMetrics:
+    """
+    Гистограмма задержек и счётчик ответов по (метод, шаблон пути), число
+    запросов в обработке.
+
+    На запрос - пара словарных операций и bisect; накопительные суммы корзин
+    считаются только при выдаче /metrics.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # (method, route) -> [счётчики корзин..., +Inf], сумма
+        self._latency: Dict[Tuple[str, str], List[float]] = {}
+        self._responses: Dict[Tuple[str, str, int], int] = {}
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route)
+        counts = self._latency.get(key)
+        if counts is None:
+            # len(buckets) корзин + "+Inf" + сумма
+            counts = self._latency[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        counts[-1] += seconds
+        response_key = (method, route, status)
+        self._responses[response_key] = self._responses.get(response_key, 0) + 1
+
+    def clear(self) -> None:
+        self._latency.clear()
+        self._responses.clear()
+
+    def collect(self) -> Iterable[MetricFamily]:
+        samples = []
+        for (method, route), counts in self._latency.items():
+            labels = {"method": method, "route": route}
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append(({**labels, "le": _format(bound)}, cumulative, "_bucket"))
+            cumulative += counts[len(self.buckets)]
+            samples.append(({**labels, "le": "+Inf"}, cumulative, "_bucket"))
+            samples.append((labels, counts[-1], "_sum"))
+            samples.append((labels, cumulative, "_count"))
+        yield ("http_request_duration_seconds", "histogram", "Request latency by route", samples)
+
+        yield (
+            "http_responses_total", "counter", "Responses by route and status",
+            [({"method": m, "route": r, "status": s}, v) for (m, r, s), v in self._responses.items()],
+        )
+        yield ("http_requests_in_flight", "gauge", "Requests being processed", [({}, self.in_flight)])
+
+
+def runtime_metrics() -> Iterable[MetricFamily]:
+    """Пулы соединений, кэши, лимиты и фоновые задачи - значения на момент запроса"""
+    stats = pool_stats()
+    pools = [({"pool": "primary"}, stats)] + [
+        ({"pool": f"replica{index}"}, replica) for index, replica in enumerate(stats["replicas"])
+    ]
+    for key, name, kind, description in (
+        ("size", "size", "gauge", "Pool size"),
+        ("checked_out", "checked_out", "gauge", "Connections in use"),
+        ("overflow", "overflow", "gauge", "Overflow connections open"),
+        ("checkouts", "checkouts_total", "counter", "Connection checkouts"),
+        ("timeouts", "timeouts_total", "counter", "Checkouts that timed out"),
+        ("wait_seconds_total", "wait_seconds_total", "counter", "Time spent waiting for a connection"),
+    ):
+        yield (f"db_pool_{name}", kind, description, [(labels, pool[key]) for labels, pool in pools])
+    yield (
+        "db_replica_healthy", "gauge", "Replica lag within the limit",
+        [(labels, int(pool["healthy"])) for labels, pool in pools[1:]],
+    )
+    yield (
+        "db_replica_primary_fallbacks_total", "counter", "Reads sent to primary because no replica was healthy",
+        [({}, stats["replica_primary_fallbacks"])],
+    )
+
+    caches = [({"cache": "user"}, user_cache.stats()), ({"cache": "token"}, token_cache.stats())]
+    for key, name, kind in (("size", "size", "gauge"), ("hits", "hits_total", "counter"), ("misses", "misses_total", "counter")):
+        yield (f"cache_{name}", kind, f"Cache {key}", [(labels, cache[key]) for labels, cache in caches])
+
+    yield (
+        "rate_limit_rejected_total", "counter", "Requests rejected with 429",
+        [
+            ({"method": method, "route": path, "key": rule.key}, rule.limiter.rejected)
+            for (method, path), rules in rate_limit_policies.items()
+            for rule in rules
+        ],
+    )
+
+    jobs = job_runner.snapshot()
+    # Счётчики Prometheus - с суффиксом _total
+    for key, name in (
+        ("runs", "runs_total"),
+        ("failures", "failures_total"),
+        ("rows_processed", "rows_processed_total"),
+        ("total_seconds", "seconds_total"),
+    ):
+        yield (f"job_{name}", "counter", f"Background job {key}", [({"job": job_name}, job[key]) for job_name, job in jobs.items()])
+
+    yield ("touches_pending", "gauge", "Buffered touch updates", [({}, len(touches))])
+    yield ("revoked_refresh_tokens", "gauge", "Revoked refresh tokens in memory", [({}, len(revoked_tokens))])
+
+
+request_metrics = RequestMetrics()
+
+_collectors: List[Collector] = [request_metrics.collect, runtime_metrics]
+
+
+def register_collector(collector: Collector) -> None:
+    """Добавить источник метрик (пулы, кэши, фоновые задачи)"""
+    _collectors.append(collector)
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else f"{value:.1f}"
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render() -> str:
+    """Все метрики в текстовом формате Prometheus 0.0.4"""
+    lines = []
+    for collector in _collectors:
+        for name, kind, description, samples in collector():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample in samples:
+                labels, value = sample[0], sample[1]
+                suffix = sample[2] if len(sample) > 2 else ""
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{suffix}{{{label_text}}} {_format(value)}" if label_text
+                             else f"{name}{suffix} {_format(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware: задержка, статус и число запросов в обработке по шаблону роута"""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        metrics = self.metrics
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.in_flight -= 1
+            # Роутер FastAPI кладёт найденный роут в scope - берём шаблон пути, а не сам путь
+            route = scope.get("route")
+            metrics.observe(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - started,
+            )
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware: запросы к БД за HTTP запрос (события engine пишут в
+    query_stats). Повторяющиеся формы запросов логируются как вероятный N+1;
+    с server_timing итоги отдаются в заголовке Server-Timing.
+    """
+
+    def __init__(self, app, server_timing: bool = False, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.server_timing = server_timing
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                timing = f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"'
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing if self.server_timing else send)
+        finally:
+            query_stats.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            for shape, count in stats.repeated(self.n_plus_one_threshold).items():
+                logger.warning("Possible N+1 in %s %s: %d x %s", scope["method"], route, count, shape)
@@ -1,8 +1,8 @@
 """SQLAlchemy Models"""
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, BigInteger, CheckConstraint
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, BigInteger, CheckConstraint, UniqueConstraint, Sequence, Index, Table
 from sqlalchemy.orm import relationship
 from typing import Optional
-from sqlalchemy.sql import func
+from sqlalchemy.sql import false, func
 
 from .database import Base
 
@@ -20,6 +20,8 @@ class UserModel(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     last_login_at = Column(DateTime(timezone=True), nullable=True)
+    # Есть ли заказы в orders_archive (выставляет archive_orders) - иначе архив не читается
+    has_archived_orders = Column(Boolean, nullable=False, default=False, server_default=false())
 
     profile = relationship("UserProfileModel", back_populates="user", uselist=False)
     refresh_tokens = relationship("RefreshTokenModel", back_populates="user")
@@ -116,18 +118,26 @@ class CartItemModel(Base):
 
 
 # Orders Module
+
+# Блоки номеров заказов (hi/lo), см. modules/orders/application/order_number.py
+order_number_hi_seq = Sequence("order_number_hi_seq", start=1, metadata=Base.metadata)
+
+
 class OrderModel(Base):
     __tablename__ = "orders"
+    # Fetch server-generated timestamps via RETURNING (no lazy refresh under async)
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True)
     order_number = Column(String(50), unique=True, nullable=False, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     status = Column(String(50), nullable=False, default="pending", index=True)
     subtotal = Column(BigInteger, nullable=False)
     shipping_cost = Column(BigInteger, nullable=False, default=0)
     discount = Column(BigInteger, nullable=False, default=0)
     tax = Column(BigInteger, nullable=False, default=0)
     total = Column(BigInteger, nullable=False)
+    items_count = Column(Integer, nullable=False, default=0, server_default="0")  # denormalized COUNT(order_items)
 
     # Shipping address
     recipient_name = Column(String(255), nullable=False)
@@ -143,15 +153,31 @@ class OrderModel(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
-    items = relationship("OrderItemModel", back_populates="order", cascade="all, delete-orphan")
-    status_history = relationship("OrderStatusHistoryModel", back_populates="order", cascade="all, delete-orphan")
+    items = relationship(
+        "OrderItemModel", back_populates="order", cascade="all, delete-orphan",
+        order_by="OrderItemModel.id"
+    )
+    status_history = relationship(
+        "OrderStatusHistoryModel", back_populates="order", cascade="all, delete-orphan",
+        order_by="OrderStatusHistoryModel.id"
+    )
+
+    __table_args__ = (
+        # История заказов пользователя: один range scan по (user_id, created_at DESC, id DESC);
+        # INCLUDE-колонки позволяют index-only scan для списка
+        Index(
+            "ix_orders_user_history",
+            user_id, created_at.desc(), id.desc(),
+            postgresql_include=["order_number", "status", "total", "items_count"],
+        ),
+    )
 
 
 class OrderItemModel(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     product_name = Column(String(255), nullable=False)
     product_slug = Column(String(255))
@@ -166,9 +192,92 @@ class OrderStatusHistoryModel(Base):
     __tablename__ = "order_status_history"
 
     id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
     status = Column(String(50), nullable=False)
     comment = Column(Text)
     changed_at = Column(DateTime(timezone=True), server_default=func.now())
 
     order = relationship("OrderModel", back_populates="status_history")
+
+
+# Orders archive: доставленные/отменённые заказы старше ORDER_ARCHIVE_AFTER_MONTHS
+# переносятся сюда (modules/orders/application/archive.py), горячие таблицы остаются маленькими
+def _archive_table(model) -> Table:
+    """Холодная копия таблицы (те же колонки, без FK и server defaults)"""
+    source = model.__table__
+    return Table(
+        f"{source.name}_archive",
+        Base.metadata,
+        *[Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in source.columns]
+    )
+
+
+orders_archive = _archive_table(OrderModel)
+order_items_archive = _archive_table(OrderItemModel)
+order_status_history_archive = _archive_table(OrderStatusHistoryModel)
+
+Index(
+    "ix_orders_archive_user_history",
+    orders_archive.c.user_id, orders_archive.c.created_at.desc(), orders_archive.c.id.desc()
+)
+Index("ix_order_items_archive_order_id", order_items_archive.c.order_id)
+Index("ix_order_status_history_archive_order_id", order_status_history_archive.c.order_id)
+
+
+# Idempotency (повторы POST-запросов с Idempotency-Key)
+class IdempotencyKeyModel(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    scope = Column(String(100), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    response_code = Column(Integer)
+    response_body = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+# Analytics Module: продажи, агрегированные по часам и дням (modules/analytics)
+class SalesRollupModel(Base):
+    __tablename__ = "sales_rollups"
+
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String(10), nullable=False)  # hour, day
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    product_id = Column(Integer, nullable=False)
+    category_id = Column(Integer, nullable=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(BigInteger, nullable=False, default=0)  # в копейках
+
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", "product_id", name="uq_sales_rollups_bucket_product"),
+        Index("ix_sales_rollups_category", "granularity", "category_id", "bucket_start"),
+    )
+
+
+# Transactional outbox: доменные события пишутся в транзакции изменения (core/events.py)
+class OutboxEventModel(Base):
+    __tablename__ = "outbox_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    event_type = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # Забрано диспетчером до этого времени; потом событие снова доступно (воркер упал)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_outbox_events_pending", "id",
+            postgresql_where=processed_at.is_(None), sqlite_where=processed_at.is_(None)
+        ),
+    )
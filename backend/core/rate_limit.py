@@ -0,0 +1,246 @@
+"""Ограничение частоты запросов (token bucket) для логина, регистрации и оформления заказа"""
+import hashlib
+import json
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from jose import JWTError
+from starlette.responses import JSONResponse
+
+from .config import get_settings
+from .security import decode_access_token
+
+settings = get_settings()
+
+# Тело запроса для ключа по аккаунту; больше - ответ 413, а не пропуск лимита
+MAX_KEY_BODY_BYTES = 16 * 1024
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket на ключ: ёмкость burst, пополнение rate токенов в секунду.
+
+    Ключи разложены по шардам (dict в порядке последнего обращения). При
+    обращении к шарду из его начала вытесняются ключи, простоявшие дольше
+    времени полного пополнения (их bucket всё равно полон), и лишние сверх
+    max_keys - память ограничена. Работает в одном event loop без блокировок.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_keys: int = 100000,
+        shards: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.idle_seconds = burst / rate
+        self._shard_keys = max(1, max_keys // shards)
+        self._shards: List[Dict[str, Tuple[float, float]]] = [{} for _ in range(shards)]
+        self._clock = clock
+        self.rejected = 0
+
+    def _shard(self, key: str) -> Dict[str, Tuple[float, float]]:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _evict(self, shard: Dict[str, Tuple[float, float]], now: float) -> None:
+        stale = []
+        for key, (_, updated_at) in shard.items():
+            if len(shard) - len(stale) <= self._shard_keys and now - updated_at < self.idle_seconds:
+                break
+            stale.append(key)
+        for key in stale:
+            del shard[key]
+
+    def acquire(self, key: str) -> float:
+        """Взять токен. Возвращает 0, если запрос разрешён, иначе сколько секунд ждать"""
+        now = self._clock()
+        shard = self._shard(key)
+        tokens, updated_at = shard.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+
+        if tokens >= 1:
+            shard[key] = (tokens - 1, now)
+            wait = 0.0
+        else:
+            shard[key] = (tokens, now)
+            self.rejected += 1
+            wait = (1 - tokens) / self.rate
+
+        self._evict(shard, now)
+        return wait
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            shard.clear()
+
+
+# ============================================
+# KEYS
+# ============================================
+
+def client_ip(scope: dict, headers: Dict[str, str]) -> Optional[str]:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR and headers.get("x-forwarded-for"):
+        return headers["x-forwarded-for"].split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+def account_from_body(body: bytes) -> Optional[str]:
+    """Email из JSON тела (логин, регистрация)"""
+    try:
+        email = json.loads(body).get("email")
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(email, str):
+        return None
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()
+
+
+def user_from_token(headers: Dict[str, str]) -> Optional[str]:
+    """Пользователь из Bearer токена (проверенные токены берутся из кэша)"""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return str(decode_access_token(token)["sub"])
+    except (JWTError, KeyError):
+        return None
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """Лимит на один ключ: ip, account (email из тела) или user (из токена)"""
+    key: str
+    limiter: TokenBucketLimiter
+
+
+def _rule(key: str, per_minute: int) -> RateLimitRule:
+    return RateLimitRule(key, TokenBucketLimiter(per_minute / 60, per_minute, settings.RATE_LIMIT_MAX_KEYS))
+
+
+def default_policies() -> Dict[Tuple[str, str], List[RateLimitRule]]:
+    """Политики по (метод, путь)"""
+    return {
+        ("POST", "/api/auth/login"): [
+            _rule("ip", settings.RATE_LIMIT_LOGIN_PER_IP_PER_MINUTE),
+            _rule("account", settings.RATE_LIMIT_LOGIN_PER_ACCOUNT_PER_MINUTE),
+        ],
+        ("POST", "/api/auth/register"): [
+            _rule("ip", settings.RATE_LIMIT_REGISTER_PER_IP_PER_MINUTE),
+        ],
+        ("POST", "/api/orders"): [
+            _rule("user", settings.RATE_LIMIT_CHECKOUT_PER_USER_PER_MINUTE),
+        ],
+        ("POST", "/api/cart/checkout"): [
+            _rule("user", settings.RATE_LIMIT_CHECKOUT_PER_USER_PER_MINUTE),
+        ],
+    }
+
+
+rate_limit_policies = default_policies()
+
+
+def reset_rate_limits() -> None:
+    """Сбросить все счётчики (тесты)"""
+    for rules in rate_limit_policies.values():
+        for rule in rules:
+            rule.limiter.clear()
+
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware: отклоняет запросы сверх лимита ответом 429 с Retry-After.
+
+    Проверка идёт до роутинга - до запросов к БД и хэширования пароля.
+    Лимиты свои у каждого процесса.
+    """
+
+    def __init__(self, app, policies: Optional[Dict[Tuple[str, str], List[RateLimitRule]]] = None):
+        self.app = app
+        self.policies = policies if policies is not None else rate_limit_policies
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        rules = self.policies.get((scope["method"], scope["path"].rstrip("/") or "/"))
+        if not rules:
+            return await self.app(scope, receive, send)
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        body = None
+        if any(rule.key == "account" for rule in rules):
+            body, receive = await self._buffer_body(receive, headers)
+            if body is None:
+                response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+                return await response(scope, receive, send)
+
+        wait = 0.0
+        for rule in rules:
+            if rule.key == "ip":
+                key = client_ip(scope, headers)
+            elif rule.key == "account":
+                key = account_from_body(body) if body is not None else None
+            else:
+                key = user_from_token(headers) or client_ip(scope, headers)
+            if key is not None:
+                wait = max(wait, rule.limiter.acquire(key))
+
+        if wait > 0:
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            return await response(scope, receive, send)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _buffer_body(receive, headers: Dict[str, str]):
+        """
+        Прочитать тело целиком и вернуть receive, отдающий его повторно.
+
+        Тело без Content-Length (chunked) читается по частям до
+        MAX_KEY_BODY_BYTES. None - тело больше лимита.
+        """
+        try:
+            if int(headers.get("content-length", "0")) > MAX_KEY_BODY_BYTES:
+                return None, receive
+        except ValueError:
+            pass
+
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_KEY_BODY_BYTES:
+                return None, receive
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return body, replay
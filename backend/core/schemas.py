@@ -18,6 +18,13 @@ class PaginatedResponse(BaseModel):
     total_pages: int
 
 
+class CursorPaginatedResponse(BaseModel):
+    """Ответ с keyset-пагинацией (курсор на следующую страницу)"""
+    items: list
+    next_cursor: Optional[str] = None
+    page_size: int
+
+
 class SuccessResponse(BaseModel):
     """Ответ об успехе"""
     success: bool = True
@@ -75,6 +82,16 @@ class TokensResponseSchema(BaseModel):
     expires_in: int = 900  # 15 минут
 
 
+class RefreshTokenRequestSchema(BaseModel):
+    """Обновление пары токенов"""
+    refresh_token: str
+
+
+class LogoutSchema(BaseModel):
+    """Логаут: без refresh_token отзываются все токены пользователя"""
+    refresh_token: Optional[str] = None
+
+
 class UserWithTokensSchema(UserSchema):
     """Пользователь с токенами (после регистрации/логина)"""
     tokens: TokensResponseSchema
@@ -277,3 +294,53 @@ class OrderUpdateStatusSchema(BaseModel):
     """Обновление статуса заказа (admin)"""
     status: str = Field(..., description="Новый статус")
     comment: Optional[str] = None
+
+
+class OrderBulkStatusSchema(BaseModel):
+    """Массовое обновление статуса заказов (admin)"""
+    # Не больше 5000: история вставляется одним INSERT (лимит параметров запроса)
+    order_ids: List[int] = Field(..., min_length=1, max_length=5000, description="ID заказов")
+    status: str = Field(..., description="Новый статус")
+    comment: Optional[str] = None
+
+
+class OrderStatusRejectionSchema(BaseModel):
+    """Заказ, статус которого не изменён"""
+    order_id: int
+    reason: str
+
+
+class OrderBulkStatusResultSchema(BaseModel):
+    """Результат массового обновления статуса"""
+    updated: List[int] = Field(default_factory=list)
+    rejected: List[OrderStatusRejectionSchema] = Field(default_factory=list)
+
+
+# ============================================
+# ANALYTICS
+# ============================================
+
+class SalesPointSchema(BaseModel):
+    """Продажи за час/сутки"""
+    bucket_start: datetime
+    units: int
+    revenue: Decimal
+
+
+class SalesReportSchema(BaseModel):
+    """Выручка за период"""
+    granularity: str
+    date_from: datetime
+    date_to: datetime
+    total_units: int
+    total_revenue: Decimal
+    points: List[SalesPointSchema] = Field(default_factory=list)
+
+
+class TopProductSchema(BaseModel):
+    """Товар в рейтинге продаж"""
+    product_id: int
+    product_name: Optional[str] = None
+    orders_count: int
+    units: int
+    revenue: Decimal
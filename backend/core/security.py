@@ -0,0 +1,150 @@
+"""Пароли (bcrypt в пуле потоков) и JWT токены с кэшем проверенных токенов"""
+import asyncio
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from jose import JWTError
+
+from .cache import TTLCache
+from .config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# python-jose (через cryptography) и passlib заметно удлиняют импорт приложения,
+# поэтому загружаются при первом использовании, а не при старте воркера.
+
+# Создаётся при первом хэшировании, см. _crypt_context
+pwd_context = None
+
+# bcrypt отпускает GIL, поэтому потоки действительно работают параллельно
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+
+# Для неизвестного email проверяем пароль против этого хэша - время ответа то же
+_dummy_hash: Optional[str] = None
+
+
+def _crypt_context():
+    """CryptContext; хэши с cost ниже BCRYPT_ROUNDS считаются устаревшими и обновляются при логине"""
+    global pwd_context
+    if pwd_context is None:
+        from passlib.context import CryptContext
+        pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+            bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+        )
+    return pwd_context
+
+
+async def _run_hashing(func: Callable, *args):
+    """
+    Выполнить bcrypt в пуле потоков, не блокируя event loop.
+
+    Одновременно работают не больше PASSWORD_HASH_WORKERS операций; запрос,
+    прождавший свободный слот дольше PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+    получает 503 вместо бесконечной очереди.
+    """
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication service is busy, try again later",
+            headers={"Retry-After": "1"}
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, partial(func, *args))
+    finally:
+        _hash_slots.release()
+
+
+async def hash_password(password: str) -> str:
+    """Хэш пароля bcrypt (cost BCRYPT_ROUNDS)"""
+    return await _run_hashing(_crypt_context().hash, password)
+
+
+async def verify_password(password: str, password_hash: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Проверить пароль.
+
+    Возвращает (верен ли пароль, новый хэш или None). Новый хэш приходит,
+    если старый создан с меньшим cost - его нужно сохранить.
+    """
+    global _dummy_hash
+    if password_hash is None:
+        if _dummy_hash is None:
+            _dummy_hash = await hash_password("dummy-password")
+        await _run_hashing(_crypt_context().verify, password, _dummy_hash)
+        return False, None
+    try:
+        return await _run_hashing(_crypt_context().verify_and_update, password, password_hash)
+    except (ValueError, TypeError):
+        # Повреждённый или неизвестный формат хэша - неверный пароль, а не 500
+        logger.warning("Unrecognized password hash format")
+        return False, None
+
+
+# sha256(token) -> claims; запись живёт не дольше exp токена
+token_cache: TTLCache[Dict[str, Any]] = TTLCache(settings.TOKEN_CACHE_SIZE, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+def encode_jwt(payload: Dict[str, Any]) -> str:
+    """Подписать JWT (SECRET_KEY, ALGORITHM)"""
+    from jose import jwt
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def decode_jwt(token: str) -> Dict[str, Any]:
+    """Проверить подпись и exp JWT. Бросает JWTError"""
+    from jose import jwt
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+def create_access_token(user_id: int, email: str, role: str) -> str:
+    """Access токен на ACCESS_TOKEN_EXPIRE_MINUTES минут"""
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    payload = {
+        "sub": str(user_id),
+        "email": email,
+        "role": role,
+        "type": "access",
+        "exp": expires_at,
+    }
+    return encode_jwt(payload)
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Проверить access токен и вернуть claims.
+
+    Проверенные токены кэшируются по sha256 до своего exp: повтор того же
+    токена не разбирает JWT и не пересчитывает HMAC. Токены без exp не
+    кэшируются. Бросает JWTError, если токен недействителен.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        if claims["exp"] > time.time():
+            return claims
+        token_cache.pop(key)
+
+    claims = decode_jwt(token)
+    if claims.get("type") != "access":
+        raise JWTError("Not an access token")
+
+    if "exp" in claims:
+        ttl = min(claims["exp"] - time.time(), token_cache.ttl)
+        if ttl > 0:
+            token_cache.set(key, claims, ttl=ttl)
+    return claims
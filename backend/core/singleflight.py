@@ -0,0 +1,57 @@
+"""Single-flight: одновременные одинаковые запросы выполняются один раз"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Объединяет одновременные вызовы с одинаковым ключом: первый (ведущий)
+    выполняет запрос, остальные ждут его результат или исключение.
+
+    Результат не кэшируется - после завершения следующий вызов выполнит
+    запрос заново. Результат общий для всех ожидающих, менять его нельзя.
+    Если ведущий отменён (клиент отключился), ожидающие повторяют вызов сами.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            self.shared += 1
+            # wait не пробрасывает отмену чужого future - только свою
+            await asyncio.wait((future,))
+            if not future.cancelled():
+                return future.result()
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.executions += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            # Исключение получит каждый ожидающий; без ожидающих - не логировать как потерянное
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._calls), "executions": self.executions, "shared": self.shared}
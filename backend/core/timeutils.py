@@ -0,0 +1,7 @@
+"""Работа с датами и временем"""
+from datetime import datetime, timezone
+
+
+def as_utc(moment: datetime) -> datetime:
+    """Момент в UTC; naive datetime считается UTC (так его возвращает SQLite)"""
+    return moment.astimezone(timezone.utc) if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
@@ -0,0 +1,104 @@
+"""Отложенная запись "touch" колонок (last_login_at и т.п.) пачками"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, cast, column, literal, or_, update, values
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+
+from .config import get_settings
+from .database import async_session_maker
+
+settings = get_settings()
+
+
+class TouchCoalescer:
+    """
+    Копит отметки времени в памяти и записывает их одним UPDATE на пачку.
+
+    На ключ (колонка, id) хранится только последнее значение, поэтому сотня
+    логинов одного пользователя между сбросами - одна строка в UPDATE.
+    Отметки, не записанные до падения процесса, теряются - только для
+    колонок, где это допустимо.
+    """
+
+    def __init__(self):
+        self._pending: Dict[InstrumentedAttribute, Dict[Any, datetime]] = {}
+
+    def touch(self, attribute: InstrumentedAttribute, row_id: Any, at: Optional[datetime] = None) -> None:
+        """Отметить, что attribute строки row_id нужно обновить до at (по умолчанию - сейчас)"""
+        at = at or datetime.now(timezone.utc)
+        rows = self._pending.setdefault(attribute, {})
+        current = rows.get(row_id)
+        if current is None or current < at:
+            rows[row_id] = at
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self._pending.values())
+
+    async def flush(
+        self,
+        batch_size: Optional[int] = None,
+        session_factory: Optional[async_sessionmaker] = None,
+    ) -> int:
+        """Записать накопленные отметки. Возвращает число отметок"""
+        batch_size = batch_size or settings.TOUCH_BATCH_SIZE
+        session_factory = session_factory or async_session_maker
+        pending, self._pending = self._pending, {}
+        written = 0
+        try:
+            async with session_factory() as session:
+                for attribute, rows in pending.items():
+                    items = list(rows.items())
+                    for start in range(0, len(items), batch_size):
+                        chunk = items[start:start + batch_size]
+                        await session.execute(_touch_statement(attribute, chunk, session.bind.dialect.name))
+                        written += len(chunk)
+                await session.commit()
+        except Exception:
+            # Не теряем отметки - запишем при следующем сбросе
+            for attribute, rows in pending.items():
+                for row_id, at in rows.items():
+                    self.touch(attribute, row_id, at)
+            raise
+        return written
+
+
+def _touch_statement(attribute: InstrumentedAttribute, rows: List[Tuple[Any, datetime]], dialect: str):
+    """
+    UPDATE для пачки (id, время); более новое значение в БД не перезаписывается.
+
+    PostgreSQL: UPDATE ... FROM (VALUES ...). Другие диалекты: SET ... = CASE id.
+    """
+    target = attribute.property.columns[0]
+    table = target.table
+    pk = next(iter(table.primary_key.columns))
+
+    if dialect == "postgresql":
+        touched = values(
+            column("id", pk.type),
+            column("at", target.type),
+            name="touched",
+        ).data([
+            # asyncpg не выводит типы параметров внутри VALUES - приводим явно
+            (cast(literal(row_id), pk.type), cast(literal(at), target.type))
+            for row_id, at in rows
+        ])
+        return (
+            update(table)
+            .where(pk == touched.c.id, or_(target.is_(None), target < touched.c.at))
+            .values({target.name: touched.c.at})
+        )
+
+    new_value = case(
+        {row_id: literal(at, target.type) for row_id, at in rows},
+        value=pk,
+    )
+    return (
+        update(table)
+        .where(pk.in_([row_id for row_id, _ in rows]), or_(target.is_(None), target < new_value))
+        .values({target.name: new_value})
+    )
+
+
+touches = TouchCoalescer()
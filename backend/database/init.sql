@@ -1,6 +1,9 @@
 -- ============================================
 -- ONLINE SHOP DATABASE SCHEMA
 -- ============================================
+-- Legacy schema, frozen: the schema is owned by Alembic (migrations/versions).
+-- Databases created from this file are stamped 0001 by database/migrate.py
+-- and upgraded by the later revisions. Do not add new tables or columns here.
 
 -- ============================================
 -- USERS MODULE
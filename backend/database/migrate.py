@@ -0,0 +1,64 @@
+"""
+Миграции схемы (Alembic).
+
+Запускается один раз перед стартом приложения, а не в каждом воркере:
+
+    python -m database.migrate
+
+База, созданная раньше через create_all или из database/init.sql (без
+таблицы alembic_version), помечается начальной ревизией, после чего
+применяются остальные миграции.
+"""
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import get_settings
+from core.database import _engine_args
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Ревизия, соответствующая схеме, которую создавали create_all и init.sql
+BASELINE_REVISION = "0001"
+
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    """Конфигурация Alembic; url по умолчанию - DATABASE_URL"""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    if url:
+        config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+async def _existing_tables(url: str) -> set:
+    url, kwargs, _ = _engine_args(url)
+    engine = create_async_engine(url, poolclass=NullPool, connect_args=kwargs.get("connect_args", {}))
+    try:
+        async with engine.connect() as conn:
+            return set(await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names()))
+    finally:
+        await engine.dispose()
+
+
+def migrate(url: Optional[str] = None, revision: str = "head") -> None:
+    """Применить миграции до revision"""
+    url = url or get_settings().DATABASE_URL
+    config = alembic_config(url)
+
+    tables = asyncio.run(_existing_tables(url))
+    if "alembic_version" not in tables and "users" in tables:
+        print(f"Existing schema without migrations, stamping {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+
+    command.upgrade(config, revision)
+
+
+if __name__ == "__main__":
+    migrate()
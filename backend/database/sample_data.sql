@@ -99,8 +99,8 @@ INSERT INTO products (name, slug, description, price, stock, category_id, images
 ON CONFLICT (slug) DO NOTHING;
 
 INSERT INTO users (email, password_hash, role, is_active, is_verified, created_at) VALUES
-('test@example.com', '$2b$12$LQv3c1yqBWVHxmd0VHW1O9qWBz.HfWKR.k', 'customer', true, true, NOW()),
-('admin@example.com', '$2b$12$LQv3c1yqBWVHxmd0VHW1O9qWBz.HfWKR.k', 'admin', true, true, NOW())
+('test@example.com', '$2b$12$FxzMYbepMSOhgO94/R4WDe4fHzyUu3zrCGSL2T52UBnoJFkYk19Pe', 'customer', true, true, NOW()),
+('admin@example.com', '$2b$12$FxzMYbepMSOhgO94/R4WDe4fHzyUu3zrCGSL2T52UBnoJFkYk19Pe', 'admin', true, true, NOW())
 ON CONFLICT (email) DO NOTHING;
 
 INSERT INTO user_profiles (user_id, first_name, last_name, phone) VALUES
@@ -0,0 +1,49 @@
+"""order history index and items_count
+
+items_count в заказе (заполняется по order_items), индекс истории
+заказов пользователя, индексы по order_id, последовательность номеров заказов.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:24:51.328086
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Блоки номеров заказов (hi/lo) - только PostgreSQL
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(sa.schema.CreateSequence(sa.Sequence("order_number_hi_seq", start=1)))
+    op.add_column('orders', sa.Column('items_count', sa.Integer(), server_default='0', nullable=False))
+    # Заказы, созданные до появления колонки
+    op.execute(
+        "UPDATE orders SET items_count = "
+        "(SELECT COUNT(*) FROM order_items WHERE order_items.order_id = orders.id)"
+    )
+    # create_all называл индекс ix_orders_user_id, database/init.sql - idx_orders_user_id
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes('orders')}
+    for name in ('ix_orders_user_id', 'idx_orders_user_id'):
+        if name in existing:
+            op.drop_index(name, table_name='orders')
+    op.create_index('ix_orders_user_history', 'orders', ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False, postgresql_include=['order_number', 'status', 'total', 'items_count'])
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+    op.create_index(op.f('ix_order_status_history_order_id'), 'order_status_history', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_status_history_order_id'), table_name='order_status_history')
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_index('ix_orders_user_history', table_name='orders', postgresql_include=['order_number', 'status', 'total', 'items_count'])
+    op.create_index('ix_orders_user_id', 'orders', ['user_id'], unique=False)
+    op.drop_column('orders', 'items_count')
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(sa.schema.DropSequence(sa.Sequence("order_number_hi_seq")))
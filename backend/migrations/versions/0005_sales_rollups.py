@@ -0,0 +1,39 @@
+"""sales rollups
+
+Агрегаты продаж по часам и дням для аналитики.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:24:51.328086
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sales_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('granularity', 'bucket_start', 'product_id', name='uq_sales_rollups_bucket_product')
+    )
+    op.create_index('ix_sales_rollups_category', 'sales_rollups', ['granularity', 'category_id', 'bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sales_rollups_category', table_name='sales_rollups')
+    op.drop_table('sales_rollups')
@@ -0,0 +1,32 @@
+"""user has_archived_orders
+
+Признак "у пользователя есть архивные заказы": история заказов не читает
+orders_archive для тех, у кого их нет.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 12:10:04.517320
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('has_archived_orders', sa.Boolean(), server_default=sa.false(), nullable=False))
+    # Заказы, перенесённые в архив до появления колонки
+    op.execute(
+        sa.text("UPDATE users SET has_archived_orders = :flag WHERE id IN (SELECT user_id FROM orders_archive)")
+        .bindparams(flag=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'has_archived_orders')
@@ -0,0 +1,27 @@
+"""outbox claims
+
+locked_until: диспетчер забирает порцию событий короткой транзакцией и
+рассылает её вне транзакции.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 14:02:37.815204
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('outbox_events', sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('outbox_events', 'locked_until')
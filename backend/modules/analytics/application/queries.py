@@ -0,0 +1,81 @@
+"""Отчёты по продажам - только из агрегатов sales_rollups"""
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models import ProductModel, SalesRollupModel
+from core.timeutils import as_utc
+from modules.analytics.application.rollups import bucket_start
+
+
+def granularity_for(date_from: datetime, date_to: datetime) -> str:
+    """Суточные агрегаты, если границы выровнены по суткам, иначе часовые"""
+    aligned = all(bucket_start(d, "day") == bucket_start(d, "hour") for d in (date_from, date_to))
+    return "day" if aligned else "hour"
+
+
+def _in_range(granularity: str, date_from: datetime, date_to: datetime, category_id: Optional[int]):
+    conditions = [
+        SalesRollupModel.granularity == granularity,
+        SalesRollupModel.bucket_start >= bucket_start(date_from, granularity),
+        SalesRollupModel.bucket_start < as_utc(date_to),
+    ]
+    if category_id is not None:
+        conditions.append(SalesRollupModel.category_id == category_id)
+    return conditions
+
+
+async def sales_by_bucket(
+    session: AsyncSession,
+    granularity: str,
+    date_from: datetime,
+    date_to: datetime,
+    category_id: Optional[int] = None,
+) -> List:
+    """Штуки и выручка по часам/суткам за период [date_from, date_to)"""
+    return (await session.execute(
+        select(
+            SalesRollupModel.bucket_start,
+            func.sum(SalesRollupModel.units).label("units"),
+            func.sum(SalesRollupModel.revenue).label("revenue"),
+        )
+        .where(*_in_range(granularity, date_from, date_to, category_id))
+        .group_by(SalesRollupModel.bucket_start)
+        .having(func.sum(SalesRollupModel.units) != 0)
+        .order_by(SalesRollupModel.bucket_start)
+    )).all()
+
+
+async def top_products(
+    session: AsyncSession,
+    date_from: datetime,
+    date_to: datetime,
+    order_by: str = "revenue",
+    limit: int = 10,
+    category_id: Optional[int] = None,
+) -> List:
+    """Самые продаваемые товары за период по выручке или количеству"""
+    granularity = granularity_for(date_from, date_to)
+    units = func.sum(SalesRollupModel.units).label("units")
+    revenue = func.sum(SalesRollupModel.revenue).label("revenue")
+    ranked = (
+        select(
+            SalesRollupModel.product_id,
+            func.sum(SalesRollupModel.orders_count).label("orders_count"),
+            units,
+            revenue,
+        )
+        .where(*_in_range(granularity, date_from, date_to, category_id))
+        .group_by(SalesRollupModel.product_id)
+        .having(units > 0)
+        .order_by((units if order_by == "units" else revenue).desc(), SalesRollupModel.product_id)
+        .limit(limit)
+        .subquery()
+    )
+    return (await session.execute(
+        select(ranked, ProductModel.name.label("product_name"))
+        .outerjoin(ProductModel, ProductModel.id == ranked.c.product_id)
+        .order_by((ranked.c.units if order_by == "units" else ranked.c.revenue).desc(), ranked.c.product_id)
+    )).all()
@@ -0,0 +1,211 @@
+"""Агрегаты продаж по часам и дням (sales_rollups)"""
+import argparse
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import BigInteger, cast, delete, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.config import get_settings
+from core.database import async_session_maker
+from core.models import (
+    OrderModel,
+    OrderItemModel,
+    ProductModel,
+    SalesRollupModel,
+    orders_archive,
+    order_items_archive,
+)
+from core.timeutils import as_utc
+
+settings = get_settings()
+
+GRANULARITIES = ("hour", "day")
+
+# Строк в одном INSERT ... ON CONFLICT (8 параметров на строку)
+UPSERT_CHUNK_SIZE = 1000
+
+# Старшие 32 бита ключа advisory-блокировки суток агрегатов (младшие - номер дня)
+ROLLUP_LOCK_NAMESPACE = 0x524F4C4C
+
+
+@dataclass(frozen=True)
+class SaleLine:
+    """Строка заказа, учитываемая в агрегатах"""
+    order_id: int
+    created_at: datetime
+    product_id: int
+    category_id: Optional[int]
+    quantity: int
+    subtotal: int
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Начало часа/суток (UTC), в которые попадает moment"""
+    moment = as_utc(moment).replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def _rollup_rows(lines: Iterable[SaleLine], sign: int) -> List[dict]:
+    totals = defaultdict(lambda: [None, set(), 0, 0])
+    for line in lines:
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(line.created_at, granularity), line.product_id)
+            total = totals[key]
+            total[0] = line.category_id
+            total[1].add(line.order_id)
+            total[2] += line.quantity
+            total[3] += line.subtotal
+
+    # Сортировка - один порядок блокировок строк агрегатов во всех транзакциях
+    return [
+        {
+            "granularity": granularity,
+            "bucket_start": start,
+            "product_id": product_id,
+            "category_id": category_id,
+            "orders_count": sign * len(order_ids),
+            "units": sign * units,
+            "revenue": sign * revenue,
+        }
+        for (granularity, start, product_id), (category_id, order_ids, units, revenue) in sorted(totals.items())
+    ]
+
+
+def _upsert(session: AsyncSession, rows: List[dict], replace: bool = False):
+    """
+    INSERT ... ON CONFLICT DO UPDATE: прибавляет значения к агрегатам,
+    с replace=True - записывает их как есть (пересчёт).
+    """
+    dialect = postgresql if session.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(SalesRollupModel).values(rows)
+    table = SalesRollupModel.__table__
+    columns = ("orders_count", "units", "revenue")
+    return stmt.on_conflict_do_update(
+        index_elements=["granularity", "bucket_start", "product_id"],
+        set_={
+            name: stmt.excluded[name] if replace else table.c[name] + stmt.excluded[name]
+            for name in columns
+        },
+    )
+
+
+async def lock_days(session: AsyncSession, days: Iterable[datetime], exclusive: bool = False) -> None:
+    """
+    Блокировка суток агрегатов до конца транзакции (PostgreSQL, advisory).
+
+    Инкрементальные обновления берут её в shared-режиме и друг другу не
+    мешают; пересчёт суток - в exclusive, поэтому не пересекается ни с другим
+    пересчётом, ни с отменой заказа за эти сутки. Сутки блокируются по
+    возрастанию - один порядок во всех транзакциях.
+    """
+    if session.bind.dialect.name != "postgresql":
+        return
+    lock = func.pg_advisory_xact_lock if exclusive else func.pg_advisory_xact_lock_shared
+    for day in sorted(set(days)):
+        key = (ROLLUP_LOCK_NAMESPACE << 32) | day.toordinal()
+        await session.execute(select(lock(cast(literal(key), BigInteger))))
+
+
+async def apply_sales(session: AsyncSession, lines: Iterable[SaleLine], sign: int = 1) -> None:
+    """
+    Прибавить строки заказов к агрегатам (sign=-1 - вычесть при отмене).
+
+    Выполняется в транзакции вызывающего кода, поэтому агрегаты меняются
+    атомарно вместе с заказом.
+    """
+    lines = list(lines)
+    await lock_days(session, (bucket_start(line.created_at, "day") for line in lines))
+    rows = _rollup_rows(lines, sign)
+    for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        await session.execute(_upsert(session, rows[i:i + UPSERT_CHUNK_SIZE]))
+
+
+def _sale_lines_query(orders, items, *conditions):
+    return (
+        select(
+            orders.c.id,
+            orders.c.created_at,
+            items.c.product_id,
+            ProductModel.category_id,
+            items.c.quantity,
+            items.c.subtotal,
+        )
+        .join(items, items.c.order_id == orders.c.id)
+        .outerjoin(ProductModel, ProductModel.id == items.c.product_id)
+        .where(*conditions)
+    )
+
+
+async def load_sale_lines(session: AsyncSession, order_ids: Sequence[int]) -> List[SaleLine]:
+    """Строки указанных заказов"""
+    orders, items = OrderModel.__table__, OrderItemModel.__table__
+    rows = (await session.execute(_sale_lines_query(orders, items, orders.c.id.in_(order_ids)))).all()
+    return [SaleLine(*row) for row in rows]
+
+
+async def backfill_sales_rollups(
+    days: Optional[int] = None,
+    until: Optional[datetime] = None,
+    session_factory: Optional[async_sessionmaker] = None,
+) -> int:
+    """
+    Пересчитать агрегаты за days полных суток до until (по умолчанию - до начала сегодняшних).
+
+    Каждые сутки пересчитываются в своей транзакции из заказов (включая
+    архив), отменённые заказы не учитываются. Транзакция держит exclusive
+    блокировку суток (lock_days), а агрегаты записываются абсолютными
+    значениями: параллельный запуск на другом воркере или отмена заказа
+    за эти сутки выполняются до или после пересчёта, но не посередине.
+    Текущие сутки не трогаются - их ведут инкрементальные обновления.
+    Возвращает число учтённых строк.
+    """
+    days = settings.ANALYTICS_BACKFILL_DAYS if days is None else days
+    until = bucket_start(until or datetime.now(timezone.utc), "day")
+    session_factory = session_factory or async_session_maker
+
+    total = 0
+    day = until - timedelta(days=days)
+    while day < until:
+        next_day = day + timedelta(days=1)
+        async with session_factory() as session:
+            # До чтения заказов - иначе отмена, закоммиченная после чтения, потеряется
+            await lock_days(session, [day], exclusive=True)
+            lines = []
+            for orders, items in (
+                (OrderModel.__table__, OrderItemModel.__table__),
+                (orders_archive, order_items_archive),
+            ):
+                rows = (await session.execute(_sale_lines_query(
+                    orders, items,
+                    orders.c.created_at >= day,
+                    orders.c.created_at < next_day,
+                    orders.c.status != "cancelled",
+                ))).all()
+                lines.extend(SaleLine(*row) for row in rows)
+
+            await session.execute(
+                delete(SalesRollupModel)
+                .where(SalesRollupModel.bucket_start >= day, SalesRollupModel.bucket_start < next_day)
+            )
+            rows = _rollup_rows(lines, 1)
+            for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                await session.execute(_upsert(session, rows[i:i + UPSERT_CHUNK_SIZE], replace=True))
+            await session.commit()
+
+        total += len(lines)
+        day = next_day
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill sales rollups")
+    parser.add_argument("--days", type=int, default=365, help="Number of complete days to rebuild")
+    args = parser.parse_args()
+    print(f"Rebuilt rollups from {asyncio.run(backfill_sales_rollups(days=args.days))} order lines")
@@ -0,0 +1,85 @@
+"""API роуты аналитики продаж (admin)"""
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import get_session
+from core.dependencies import require_admin
+from core.schemas import SalesPointSchema, SalesReportSchema, TopProductSchema
+from modules.analytics.application.queries import sales_by_bucket, top_products
+from core.timeutils import as_utc
+
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"], dependencies=[Depends(require_admin)])
+
+
+def _money(kopecks: int) -> Decimal:
+    return Decimal(kopecks or 0) / 100
+
+
+def _check_range(date_from: datetime, date_to: datetime) -> Tuple[datetime, datetime]:
+    # Даты без часового пояса считаются UTC - иначе naive и aware не сравнить
+    date_from, date_to = as_utc(date_from), as_utc(date_to)
+    if date_to <= date_from:
+        raise HTTPException(status_code=400, detail="date_to must be after date_from")
+    return date_from, date_to
+
+
+@router.get("/revenue", response_model=SalesReportSchema, summary="Выручка за период")
+async def revenue(
+    date_from: datetime = Query(..., description="Начало периода (включительно)"),
+    date_to: datetime = Query(..., description="Конец периода (не включительно)"),
+    granularity: str = Query("day", pattern="^(hour|day)$", description="Шаг: hour, day"),
+    category_id: Optional[int] = Query(None, description="Фильтр по категории"),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Выручка и проданные штуки по часам или суткам.
+
+    Читает только агрегаты sales_rollups; отменённые заказы не учитываются.
+    Требуется роль **admin**.
+    """
+    date_from, date_to = _check_range(date_from, date_to)
+    rows = await sales_by_bucket(session, granularity, date_from, date_to, category_id)
+    points = [
+        SalesPointSchema(bucket_start=row.bucket_start, units=row.units, revenue=_money(row.revenue))
+        for row in rows
+    ]
+    return SalesReportSchema(
+        granularity=granularity,
+        date_from=date_from,
+        date_to=date_to,
+        total_units=sum(row.units for row in rows),
+        total_revenue=_money(sum(row.revenue for row in rows)),
+        points=points
+    )
+
+
+@router.get("/top-products", response_model=List[TopProductSchema], summary="Топ товаров")
+async def list_top_products(
+    date_from: datetime = Query(..., description="Начало периода (включительно)"),
+    date_to: datetime = Query(..., description="Конец периода (не включительно)"),
+    order_by: str = Query("revenue", pattern="^(revenue|units)$", description="Сортировка: revenue, units"),
+    limit: int = Query(10, ge=1, le=100, description="Количество товаров"),
+    category_id: Optional[int] = Query(None, description="Фильтр по категории"),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Самые продаваемые товары за период.
+
+    Требуется роль **admin**.
+    """
+    date_from, date_to = _check_range(date_from, date_to)
+    rows = await top_products(session, date_from, date_to, order_by, limit, category_id)
+    return [
+        TopProductSchema(
+            product_id=row.product_id,
+            product_name=row.product_name,
+            orders_count=row.orders_count,
+            units=row.units,
+            revenue=_money(row.revenue)
+        )
+        for row in rows
+    ]
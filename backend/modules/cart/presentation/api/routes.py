@@ -1,5 +1,5 @@
 """API роуты для корзины"""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_session
@@ -7,19 +7,22 @@ from core.schemas import (
     CartSchema,
     CartItemAddSchema,
     CartItemUpdateSchema,
+    AddressSchema,
     SuccessResponse
 )
-from core.dependencies import get_current_user
-from core.models import UserModel
+from core.dependencies import get_current_user, CurrentUser
+from core.idempotency import run_idempotent, IDEMPOTENCY_HEADER
+from modules.orders.application.checkout import place_order
 from datetime import datetime
 from decimal import Decimal
+from typing import Optional
 
 router = APIRouter(prefix="/api/cart", tags=["Cart"])
 
 
 @router.get("", response_model=CartSchema, summary="Получить корзину")
 async def get_cart(
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     """
@@ -42,7 +45,7 @@ async def get_cart(
 @router.post("/items", response_model=CartSchema, summary="Добавить товар в корзину")
 async def add_item(
     data: CartItemAddSchema,
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     """
@@ -73,7 +76,7 @@ async def add_item(
 async def update_item_quantity(
     item_id: int,
     data: CartItemUpdateSchema,
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     """
@@ -98,7 +101,7 @@ async def update_item_quantity(
 @router.delete("/items/{item_id}", response_model=CartSchema, summary="Удалить товар из корзины")
 async def remove_item(
     item_id: int,
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     """
@@ -120,7 +123,7 @@ async def remove_item(
 
 @router.delete("", response_model=SuccessResponse, summary="Очистить корзину")
 async def clear_cart(
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     """
@@ -132,8 +135,10 @@ async def clear_cart(
 
 @router.post("/checkout", response_model=dict, summary="Оформить заказ")
 async def checkout(
-    shipping_address: dict,
-    current_user: UserModel = Depends(get_current_user),
+    shipping_address: AddressSchema,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     """
@@ -143,18 +148,21 @@ async def checkout(
 
     - **shipping_address**: Адрес доставки
 
+    С заголовком **Idempotency-Key** повтор запроса возвращает тот же ответ
+    без повторного создания заказа.
+
     Возвращает созданный заказ.
     """
-    # TODO: Реализовать оформление заказа
-    # - Валидировать корзину (не пуста)
-    # - Проверить наличие товаров
-    # - Создать заказ
-    # - Уменьшить stock товаров
-    # - Очистить корзину
-    # - Публиковать событие order:created
-
-    return {
-        "success": True,
-        "order_id": 1,
-        "message": "Order created successfully"
-    }
+    async def do_checkout():
+        placed = await place_order(session, current_user.id, shipping_address)
+        return {
+            "success": True,
+            "order_id": placed.order.id,
+            "order_number": placed.order.order_number,
+            "message": "Order created successfully"
+        }
+
+    return await run_idempotent(
+        session, response, current_user.id, idempotency_key,
+        scope="cart:checkout", payload=shipping_address, handler=do_checkout
+    )
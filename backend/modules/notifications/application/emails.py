@@ -0,0 +1,79 @@
+"""Письма покупателям по событиям заказов"""
+import asyncio
+import logging
+import smtplib
+from email.message import EmailMessage
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from core.config import get_settings
+from core.database import async_session_maker
+from core.events import DomainEvent, EventBus
+from core.models import OrderModel, UserModel
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+STATUS_SUBJECTS = {
+    "confirmed": "подтверждён",
+    "processing": "собирается",
+    "shipped": "отправлен",
+    "delivered": "доставлен",
+    "cancelled": "отменён",
+    "refunded": "возвращён",
+}
+
+
+def _send_smtp(message: EmailMessage) -> None:
+    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=10) as smtp:
+        if settings.SMTP_STARTTLS:
+            smtp.starttls()
+        if settings.SMTP_USERNAME:
+            smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD or "")
+        smtp.send_message(message)
+
+
+async def send_email(to: str, subject: str, body: str) -> None:
+    """Отправить письмо (SMTP в потоке); без SMTP_HOST - только записать в лог"""
+    if not settings.SMTP_HOST:
+        logger.info("Email to %s: %s", to, subject)
+        return
+    message = EmailMessage()
+    message["From"] = settings.EMAIL_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body)
+    await asyncio.to_thread(_send_smtp, message)
+
+
+async def _recipient(session_factory: async_sessionmaker, order_id: int) -> Optional[Tuple[str, str]]:
+    """(email покупателя, номер заказа) или None, если заказа уже нет"""
+    async with session_factory() as session:
+        row = (await session.execute(
+            select(UserModel.email, OrderModel.order_number)
+            .join(UserModel, UserModel.id == OrderModel.user_id)
+            .where(OrderModel.id == order_id)
+        )).first()
+    return tuple(row) if row else None
+
+
+def register_email_subscribers(bus: EventBus, session_factory: Optional[async_sessionmaker] = None) -> None:
+    """Письма о новом заказе и смене статуса (в одном воркере, через outbox)"""
+    session_factory = session_factory or async_session_maker
+
+    @bus.subscribe("order:created")
+    async def on_order_created(event: DomainEvent) -> None:
+        recipient = await _recipient(session_factory, event.payload["id"])
+        if recipient:
+            email, number = recipient
+            await send_email(email, f"Заказ {number} оформлен", f"Спасибо за заказ! Номер заказа: {number}.")
+
+    @bus.subscribe("order:status_changed")
+    async def on_order_status_changed(event: DomainEvent) -> None:
+        subject = STATUS_SUBJECTS.get(event.payload["new_status"])
+        recipient = await _recipient(session_factory, event.payload["id"])
+        if subject and recipient:
+            email, number = recipient
+            await send_email(email, f"Заказ {number} {subject}", f"Статус заказа {number}: {subject}.")
@@ -0,0 +1,170 @@
+"""Перенос старых завершённых заказов в архивные таблицы"""
+import asyncio
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, insert, delete, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.config import get_settings
+from core.database import async_session_maker
+from core.events import publish
+from core.models import (
+    UserModel,
+    OrderModel,
+    OrderItemModel,
+    OrderStatusHistoryModel,
+    orders_archive,
+    order_items_archive,
+    order_status_history_archive,
+)
+
+settings = get_settings()
+
+# Только в этих статусах заказ больше не меняется и может уйти в архив
+ARCHIVABLE_STATUSES = ("delivered", "cancelled")
+
+
+def archive_horizon(now: Optional[datetime] = None, months: Optional[int] = None) -> datetime:
+    """
+    Граница архива: заказы, созданные раньше неё, могут быть в архиве.
+
+    Граница только сдвигается вперёд, поэтому всё, что уже в архиве,
+    всегда старше текущей границы.
+    """
+    now = now or datetime.now(timezone.utc)
+    months = settings.ORDER_ARCHIVE_AFTER_MONTHS if months is None else months
+    month_index = now.year * 12 + now.month - 1 - months
+    year, month = divmod(month_index, 12)
+    return now.replace(year=year, month=month + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+async def _move_rows(session: AsyncSession, hot, cold, key, order_ids: List[int]) -> None:
+    """INSERT INTO cold SELECT ... FROM hot; DELETE FROM hot - по списку заказов"""
+    columns = [c.name for c in cold.columns]
+    await session.execute(
+        insert(cold).from_select(
+            columns,
+            select(*[hot.__table__.c[name] for name in columns]).where(key.in_(order_ids)),
+        )
+    )
+    await session.execute(
+        delete(hot).where(key.in_(order_ids)).execution_options(synchronize_session=False)
+    )
+
+
+async def _mark_archive_owners(session: AsyncSession, user_ids: set) -> None:
+    """Выставить has_archived_orders; закэшированные пользователи сбрасываются на всех воркерах"""
+    new_owners = (await session.scalars(
+        select(UserModel.id).where(UserModel.id.in_(user_ids), UserModel.has_archived_orders.is_(False))
+    )).all()
+    if not new_owners:
+        return
+    await session.execute(
+        update(UserModel).where(UserModel.id.in_(new_owners)).values(has_archived_orders=True)
+    )
+    for user_id in new_owners:
+        await publish(session, "user:changed", {"id": user_id})
+
+
+async def archive_orders(
+    months: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+    session_factory: Optional[async_sessionmaker] = None,
+) -> int:
+    """
+    Перенести доставленные и отменённые заказы старше months месяцев в архив.
+
+    Каждая порция - одна транзакция: строки заказов, элементов и истории
+    копируются в *_archive и удаляются из горячих таблиц, владельцам
+    выставляется has_archived_orders. Возвращает число перенесённых заказов.
+    """
+    horizon = archive_horizon(months=months)
+    batch_size = batch_size or settings.SWEEPER_BATCH_SIZE
+    pause = settings.SWEEPER_BATCH_PAUSE_SECONDS if pause is None else pause
+    session_factory = session_factory or async_session_maker
+
+    total = 0
+    while True:
+        async with session_factory() as session:
+            query = (
+                select(OrderModel.id, OrderModel.user_id)
+                .where(OrderModel.status.in_(ARCHIVABLE_STATUSES), OrderModel.created_at < horizon)
+                .order_by(OrderModel.id)
+                .limit(batch_size)
+            )
+            if session.bind.dialect.name == "postgresql":
+                # Параллельный запуск на другом воркере возьмёт другие заказы
+                query = query.with_for_update(skip_locked=True)
+            rows = (await session.execute(query)).all()
+            order_ids = [row.id for row in rows]
+
+            if order_ids:
+                await _mark_archive_owners(session, {row.user_id for row in rows})
+                await _move_rows(session, OrderItemModel, order_items_archive, OrderItemModel.order_id, order_ids)
+                await _move_rows(
+                    session, OrderStatusHistoryModel, order_status_history_archive,
+                    OrderStatusHistoryModel.order_id, order_ids,
+                )
+                await _move_rows(session, OrderModel, orders_archive, OrderModel.id, order_ids)
+                await session.commit()
+
+        total += len(order_ids)
+        if len(order_ids) < batch_size:
+            return total
+        await asyncio.sleep(pause)
+
+
+async def list_archived_user_orders(
+    session: AsyncSession,
+    user_id: int,
+    status: Optional[str],
+    before: Optional[Tuple[datetime, int]],
+    limit: int,
+) -> List:
+    """Страница архивных заказов пользователя в порядке (created_at DESC, id DESC)"""
+    query = (
+        select(
+            orders_archive.c.id,
+            orders_archive.c.order_number,
+            orders_archive.c.status,
+            orders_archive.c.total,
+            orders_archive.c.items_count,
+            orders_archive.c.created_at,
+        )
+        .where(orders_archive.c.user_id == user_id)
+        .order_by(orders_archive.c.created_at.desc(), orders_archive.c.id.desc())
+        .limit(limit)
+    )
+    if status:
+        query = query.where(orders_archive.c.status == status)
+    if before:
+        query = query.where(tuple_(orders_archive.c.created_at, orders_archive.c.id) < tuple_(*before))
+    return (await session.execute(query)).all()
+
+
+async def get_archived_order(
+    session: AsyncSession,
+    order_id: int,
+    user_id: Optional[int] = None,
+) -> Optional[Tuple]:
+    """Архивный заказ: (заказ, элементы, история статусов) или None"""
+    query = select(orders_archive).where(orders_archive.c.id == order_id)
+    if user_id is not None:
+        query = query.where(orders_archive.c.user_id == user_id)
+    order = (await session.execute(query)).first()
+    if order is None:
+        return None
+
+    items = (await session.execute(
+        select(order_items_archive)
+        .where(order_items_archive.c.order_id == order_id)
+        .order_by(order_items_archive.c.id)
+    )).all()
+    status_history = (await session.execute(
+        select(order_status_history_archive)
+        .where(order_status_history_archive.c.order_id == order_id)
+        .order_by(order_status_history_archive.c.id)
+    )).all()
+    return order, items, status_history
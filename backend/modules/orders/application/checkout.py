@@ -0,0 +1,179 @@
+"""Оформление заказа из корзины"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, insert, delete, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models import (
+    CartModel,
+    CartItemModel,
+    ProductModel,
+    OrderModel,
+    OrderItemModel,
+    OrderStatusHistoryModel,
+)
+from core.events import publish_many
+from core.schemas import AddressSchema
+from modules.analytics.application.rollups import SaleLine, apply_sales
+from modules.orders.application.order_number import order_numbers
+
+
+@dataclass
+class PlacedOrder:
+    """Созданный заказ вместе с вставленными строками"""
+    order: OrderModel
+    items: List = field(default_factory=list)
+    status_history: List = field(default_factory=list)
+
+
+async def place_order(
+    session: AsyncSession,
+    user_id: int,
+    shipping_address: AddressSchema,
+    comment: Optional[str] = None,
+) -> PlacedOrder:
+    """
+    Создать заказ из корзины пользователя.
+
+    Всё выполняется в транзакции сессии (фиксирует её вызывающий код):
+    1. Строки товаров блокируются в порядке product_id (SELECT ... FOR UPDATE),
+       поэтому параллельные оформления берут блокировки в одном порядке и не
+       попадают в дедлок.
+    2. Остатки уменьшаются одним UPDATE ... WHERE stock >= qty RETURNING.
+    3. Элементы заказа вставляются одним многострочным INSERT.
+    4. Продажи добавляются в агрегаты sales_rollups.
+    5. События order:created и product:stock_changed пишутся в outbox.
+    6. Корзина очищается.
+    """
+    cart_id = await session.scalar(select(CartModel.id).where(CartModel.user_id == user_id))
+    if cart_id is None:
+        raise HTTPException(status_code=400, detail="Cart is empty")
+
+    cart_rows = (await session.execute(
+        select(CartItemModel.product_id, func.sum(CartItemModel.quantity))
+        .where(CartItemModel.cart_id == cart_id)
+        .group_by(CartItemModel.product_id)
+        .order_by(CartItemModel.product_id)
+    )).all()
+    if not cart_rows:
+        raise HTTPException(status_code=400, detail="Cart is empty")
+    quantities = {product_id: int(quantity) for product_id, quantity in cart_rows}
+
+    # Блокировка товаров в детерминированном порядке
+    products = (await session.execute(
+        select(
+            ProductModel.id,
+            ProductModel.name,
+            ProductModel.slug,
+            ProductModel.price,
+            ProductModel.category_id,
+            ProductModel.is_active,
+        )
+        .where(ProductModel.id.in_(quantities))
+        .order_by(ProductModel.id)
+        .with_for_update()
+    )).all()
+    products_by_id = {p.id: p for p in products}
+
+    unavailable = sorted(
+        product_id for product_id in quantities
+        if product_id not in products_by_id or not products_by_id[product_id].is_active
+    )
+    if unavailable:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Products are not available", "product_ids": unavailable}
+        )
+
+    # Уменьшение остатков одним запросом
+    requested = case(quantities, value=ProductModel.id)
+    new_stock = dict((await session.execute(
+        update(ProductModel)
+        .where(ProductModel.id.in_(quantities), ProductModel.stock >= requested)
+        .values(stock=ProductModel.stock - requested)
+        .returning(ProductModel.id, ProductModel.stock)
+        .execution_options(synchronize_session=False)
+    )).all())
+    decremented = set(new_stock)
+
+    if len(decremented) != len(quantities):
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "Insufficient stock",
+                "product_ids": sorted(set(quantities) - decremented),
+            }
+        )
+
+    subtotal = sum(products_by_id[pid].price * qty for pid, qty in quantities.items())
+
+    order = OrderModel(
+        order_number=await order_numbers.next_number(session),
+        user_id=user_id,
+        status="pending",
+        subtotal=subtotal,
+        shipping_cost=0,
+        discount=0,
+        tax=0,
+        total=subtotal,
+        items_count=len(quantities),
+        comment=comment,
+        **shipping_address.model_dump(),
+    )
+    session.add(order)
+    await session.flush()
+
+    items = (await session.execute(
+        insert(OrderItemModel)
+        .values([
+            {
+                "order_id": order.id,
+                "product_id": pid,
+                "product_name": products_by_id[pid].name,
+                "product_slug": products_by_id[pid].slug,
+                "quantity": qty,
+                "unit_price": products_by_id[pid].price,
+                "subtotal": products_by_id[pid].price * qty,
+            }
+            for pid, qty in quantities.items()
+        ])
+        .returning(*OrderItemModel.__table__.c)
+    )).all()
+
+    status_history = (await session.execute(
+        insert(OrderStatusHistoryModel)
+        .values(order_id=order.id, status="pending", comment="Order created")
+        .returning(*OrderStatusHistoryModel.__table__.c)
+    )).all()
+
+    await apply_sales(session, [
+        SaleLine(
+            order_id=order.id,
+            created_at=order.created_at,
+            product_id=item.product_id,
+            category_id=products_by_id[item.product_id].category_id,
+            quantity=item.quantity,
+            subtotal=item.subtotal,
+        )
+        for item in items
+    ])
+
+    await publish_many(session, [
+        ("order:created", {
+            "id": order.id,
+            "user_id": user_id,
+            "total": order.total,
+            "items": [{"product_id": pid, "quantity": qty} for pid, qty in quantities.items()],
+        }),
+        *[
+            ("product:stock_changed", {"id": pid, "old_stock": stock + quantities[pid], "new_stock": stock})
+            for pid, stock in sorted(new_stock.items())
+        ],
+    ])
+
+    await session.execute(delete(CartItemModel).where(CartItemModel.cart_id == cart_id))
+    await session.flush()
+
+    return PlacedOrder(order=order, items=items, status_history=status_history)
@@ -0,0 +1,120 @@
+"""Потоковая выгрузка заказов с элементами в CSV"""
+import csv
+import io
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select, union_all
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from core.config import get_settings
+from core.database import async_session_maker
+from core.models import (
+    OrderModel,
+    OrderItemModel,
+    orders_archive,
+    order_items_archive,
+)
+
+settings = get_settings()
+
+CSV_HEADER = [
+    "order_number", "created_at", "status", "user_id",
+    "order_subtotal", "shipping_cost", "discount", "tax", "order_total",
+    "product_id", "product_name", "quantity", "unit_price", "item_subtotal",
+]
+
+_MONEY_COLUMNS = {"order_subtotal", "shipping_cost", "discount", "tax", "order_total", "unit_price", "item_subtotal"}
+CENTS = Decimal("0.01")
+
+
+def _lines_query(orders, items, date_from: datetime, date_to: datetime):
+    return (
+        select(
+            orders.c.order_number,
+            orders.c.created_at,
+            orders.c.status,
+            orders.c.user_id,
+            orders.c.subtotal.label("order_subtotal"),
+            orders.c.shipping_cost,
+            orders.c.discount,
+            orders.c.tax,
+            orders.c.total.label("order_total"),
+            items.c.product_id,
+            items.c.product_name,
+            items.c.quantity,
+            items.c.unit_price,
+            items.c.subtotal.label("item_subtotal"),
+            orders.c.id.label("order_id"),
+            items.c.id.label("item_id"),
+        )
+        .join(items, items.c.order_id == orders.c.id)
+        .where(orders.c.created_at >= date_from, orders.c.created_at < date_to)
+    )
+
+
+def _csv_value(column: str, value):
+    if value is None:
+        return ""
+    if column in _MONEY_COLUMNS:
+        # Всегда два знака после точки: 21.00, 10.50, 0.01
+        return str((Decimal(value) / 100).quantize(CENTS))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def iter_orders_csv(
+    date_from: datetime,
+    date_to: datetime,
+    chunk_rows: Optional[int] = None,
+    session_factory: Optional[async_sessionmaker] = None,
+) -> AsyncIterator[bytes]:
+    """
+    CSV строк заказов (заказ x элемент) за [date_from, date_to), включая архив.
+
+    Строки читаются серверным курсором порциями по chunk_rows и сразу
+    отдаются, поэтому память не зависит от объёма выгрузки. Сессия открывается
+    здесь, а не через Depends: она должна жить, пока ответ передаётся.
+    """
+    chunk_rows = chunk_rows or settings.EXPORT_CHUNK_ROWS
+    session_factory = session_factory or async_session_maker
+
+    lines = union_all(
+        _lines_query(OrderModel.__table__, OrderItemModel.__table__, date_from, date_to),
+        _lines_query(orders_archive, order_items_archive, date_from, date_to),
+    ).subquery()
+    query = select(*[lines.c[column] for column in CSV_HEADER]).order_by(
+        lines.c.created_at, lines.c.order_id, lines.c.item_id
+    )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+
+    async with session_factory() as session:
+        result = await session.stream(query.execution_options(yield_per=chunk_rows))
+        async for partition in result.partitions():
+            writer.writerows(
+                [_csv_value(column, value) for column, value in zip(CSV_HEADER, row)]
+                for row in partition
+            )
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        # Пустая выгрузка - только заголовок
+        yield buffer.getvalue().encode()
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Сжать поток в gzip без буферизации всего ответа"""
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,101 @@
+"""Выделение номеров заказов блоками (hi/lo)"""
+import asyncio
+import re
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import get_settings
+from core.models import OrderModel, order_number_hi_seq
+
+settings = get_settings()
+
+HiFetcher = Callable[[AsyncSession], Awaitable[int]]
+
+ORDER_NUMBER = re.compile(r"^ORD-\d{4}-(\d+)$")
+
+
+def format_order_number(year: int, sequence: int) -> str:
+    """Номер заказа в формате ORD-YYYY-NNNNNN"""
+    return f"ORD-{year}-{sequence:06d}"
+
+
+async def fetch_hi_from_sequence(session: AsyncSession) -> int:
+    """Следующий блок из последовательности order_number_hi_seq (PostgreSQL)"""
+    return await session.scalar(order_number_hi_seq.next_value())
+
+
+class _LocalHiCounter:
+    """
+    Счётчик блоков для БД без последовательностей (SQLite в разработке и тестах).
+
+    Начинает после наибольшего номера среди последних заказов (номера в
+    другом формате пропускаются); подходит только для одного процесса.
+    """
+
+    # Сколько последних заказов просматривать при старте
+    SCAN_LIMIT = 100
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self._hi: Optional[int] = None
+
+    async def __call__(self, session: AsyncSession) -> int:
+        if self._hi is None:
+            numbers = await session.scalars(
+                select(OrderModel.order_number).order_by(OrderModel.id.desc()).limit(self.SCAN_LIMIT)
+            )
+            values = [int(match.group(1)) for match in map(ORDER_NUMBER.match, numbers) if match]
+            last_value = max(values, default=0)
+            # Блок целиком после last_value: ((hi - 1) * block_size, hi * block_size]
+            self._hi = -(-last_value // self.block_size) + 1
+        else:
+            self._hi += 1
+        return self._hi
+
+
+class OrderNumberAllocator:
+    """
+    Выдаёт номера заказов без обращения к БД на каждый заказ.
+
+    Процесс резервирует блок из block_size значений одним вызовом nextval:
+    блок hi - это значения ((hi - 1) * block_size, hi * block_size].
+    Разные процессы получают разные hi, поэтому номера не пересекаются.
+    Неиспользованный остаток блока при перезапуске теряется (дырки в нумерации).
+    """
+
+    def __init__(self, block_size: int, fetch_hi: Optional[HiFetcher] = None):
+        self.block_size = block_size
+        self._fetch_hi = fetch_hi
+        self._local_hi = _LocalHiCounter(block_size)
+        self._next = 0
+        self._limit = 0
+        self._lock = asyncio.Lock()
+
+    async def _reserve_block(self, session: AsyncSession) -> None:
+        fetch_hi = self._fetch_hi
+        if fetch_hi is None:
+            fetch_hi = fetch_hi_from_sequence if session.bind.dialect.name == "postgresql" else self._local_hi
+        hi = await fetch_hi(session)
+        self._next = (hi - 1) * self.block_size + 1
+        self._limit = hi * self.block_size + 1
+
+    async def next_value(self, session: AsyncSession) -> int:
+        """Следующее значение последовательности"""
+        while self._next >= self._limit:
+            async with self._lock:
+                if self._next >= self._limit:
+                    await self._reserve_block(session)
+        value = self._next
+        self._next += 1
+        return value
+
+    async def next_number(self, session: AsyncSession) -> str:
+        """Следующий номер заказа ORD-YYYY-NNNNNN"""
+        value = await self.next_value(session)
+        return format_order_number(datetime.now(timezone.utc).year, value)
+
+
+order_numbers = OrderNumberAllocator(settings.ORDER_NUMBER_BLOCK_SIZE)
@@ -0,0 +1,132 @@
+"""Чтение заказов"""
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from core.models import OrderModel
+from core.timeutils import as_utc
+from modules.orders.application.archive import archive_horizon, list_archived_user_orders
+
+
+def encode_cursor(created_at: datetime, order_id: int) -> str:
+    """Курсор на позицию (created_at, id) последнего заказа страницы"""
+    raw = f"{created_at.isoformat()}|{order_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, order_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _paginate(query, cursor: Optional[str], page_size: int):
+    """Keyset-пагинация по (created_at DESC, id DESC)"""
+    query = query.order_by(OrderModel.created_at.desc(), OrderModel.id.desc()).limit(page_size + 1)
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        query = query.where(tuple_(OrderModel.created_at, OrderModel.id) < tuple_(created_at, order_id))
+    return query
+
+
+def _next_page(rows: list, page_size: int) -> Tuple[list, Optional[str]]:
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+async def list_user_orders(
+    session: AsyncSession,
+    user_id: int,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 20,
+    has_archive: bool = True,
+) -> Tuple[List, Optional[str]]:
+    """
+    Страница истории заказов пользователя (keyset-пагинация).
+
+    Запрос идёт по индексу ix_orders_user_history в порядке
+    (created_at DESC, id DESC) и не считает общее количество и строки
+    order_items - items_count хранится в самом заказе.
+    Возвращает строки заказов и курсор следующей страницы.
+
+    Архив (orders_archive) читается, только если он у пользователя есть
+    (has_archive - флаг has_archived_orders) и страница доходит до границы
+    архива: в нём лежат лишь заказы старше archive_horizon(), так что
+    свежие страницы обслуживаются одной горячей таблицей.
+    """
+    query = _paginate(
+        select(
+            OrderModel.id,
+            OrderModel.order_number,
+            OrderModel.status,
+            OrderModel.total,
+            OrderModel.items_count,
+            OrderModel.created_at,
+        ).where(OrderModel.user_id == user_id),
+        cursor,
+        page_size,
+    )
+    if status:
+        query = query.where(OrderModel.status == status)
+
+    rows = (await session.execute(query)).all()
+
+    reaches_archive = len(rows) <= page_size or as_utc(rows[-1].created_at) < archive_horizon()
+    if has_archive and reaches_archive:
+        before = decode_cursor(cursor) if cursor else None
+        archived = await list_archived_user_orders(session, user_id, status, before, page_size + 1)
+        rows = sorted([*rows, *archived], key=lambda r: (as_utc(r.created_at), r.id), reverse=True)
+        rows = rows[:page_size + 1]
+
+    return _next_page(rows, page_size)
+
+
+def _with_details(query):
+    # selectin: элементы и история догружаются двумя запросами WHERE order_id IN (...)
+    # для всех заказов сразу, без ленивой загрузки
+    return query.options(
+        selectinload(OrderModel.items),
+        selectinload(OrderModel.status_history),
+    )
+
+
+async def get_order_with_details(
+    session: AsyncSession,
+    order_id: int,
+    user_id: Optional[int] = None,
+) -> Optional[OrderModel]:
+    """
+    Заказ с элементами и историей статусов - ровно три запроса.
+
+    Если передан user_id, заказ ищется только среди заказов пользователя.
+    """
+    query = _with_details(select(OrderModel).where(OrderModel.id == order_id))
+    if user_id is not None:
+        query = query.where(OrderModel.user_id == user_id)
+    return await session.scalar(query)
+
+
+async def list_orders_with_details(
+    session: AsyncSession,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 20,
+) -> Tuple[List[OrderModel], Optional[str]]:
+    """Страница заказов всех пользователей с деталями (три запроса на страницу)"""
+    query = _with_details(_paginate(select(OrderModel), cursor, page_size))
+    if status:
+        query = query.where(OrderModel.status == status)
+
+    orders = (await session.scalars(query)).all()
+    return _next_page(list(orders), page_size)
@@ -0,0 +1,143 @@
+"""Переходы статусов заказа"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, insert, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.events import publish_many
+from core.models import OrderModel, OrderItemModel, OrderStatusHistoryModel, ProductModel
+from modules.analytics.application.rollups import apply_sales, load_sale_lines
+
+# Допустимые переходы (Docs/MODULE_ORDERS.md, OrderStatus.TRANSITIONS)
+TRANSITIONS: Dict[str, frozenset] = {
+    "pending": frozenset({"confirmed", "cancelled"}),
+    "confirmed": frozenset({"processing", "cancelled"}),
+    "processing": frozenset({"shipped", "cancelled"}),
+    "shipped": frozenset({"delivered"}),
+    "delivered": frozenset({"refunded"}),
+    "cancelled": frozenset(),
+    "refunded": frozenset(),
+}
+
+# Статусы, из которых пользователь может отменить заказ сам
+USER_CANCELLABLE = frozenset({"pending", "confirmed"})
+
+ORDER_NOT_FOUND = "Order not found"
+
+
+def can_transition(old_status: str, new_status: str) -> bool:
+    return new_status in TRANSITIONS.get(old_status, ())
+
+
+@dataclass
+class StatusChangeResult:
+    """Результат массовой смены статуса"""
+    updated: List[int] = field(default_factory=list)
+    # order_id -> причина отказа
+    rejected: Dict[int, str] = field(default_factory=dict)
+
+
+async def _restock(session: AsyncSession, order_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+    """Вернуть на склад товары отменённых заказов одним UPDATE; product_id -> (было, стало)"""
+    rows = (await session.execute(
+        select(OrderItemModel.product_id, func.sum(OrderItemModel.quantity))
+        .where(OrderItemModel.order_id.in_(order_ids))
+        .group_by(OrderItemModel.product_id)
+        .order_by(OrderItemModel.product_id)
+    )).all()
+    if not rows:
+        return {}
+    quantities = {product_id: int(quantity) for product_id, quantity in rows}
+    # Тот же порядок блокировок, что и при оформлении заказа
+    await session.execute(
+        select(ProductModel.id).where(ProductModel.id.in_(quantities)).order_by(ProductModel.id).with_for_update()
+    )
+    new_stock = (await session.execute(
+        update(ProductModel)
+        .where(ProductModel.id.in_(quantities))
+        .values(stock=ProductModel.stock + case(quantities, value=ProductModel.id))
+        .returning(ProductModel.id, ProductModel.stock)
+        .execution_options(synchronize_session=False)
+    )).all()
+    return {product_id: (stock - quantities[product_id], stock) for product_id, stock in new_stock}
+
+
+async def change_status(
+    session: AsyncSession,
+    order_ids: Sequence[int],
+    new_status: str,
+    comment: Optional[str] = None,
+    user_id: Optional[int] = None,
+    allowed_from: Optional[frozenset] = None,
+) -> StatusChangeResult:
+    """
+    Перевести заказы в new_status.
+
+    Заказы блокируются в порядке id, переходы проверяются в памяти по
+    TRANSITIONS, затем все допустимые заказы обновляются одним UPDATE, а
+    история пишется одним многострочным INSERT. При отмене товары
+    возвращаются на склад, а продажи вычитаются из агрегатов. События
+    пишутся в outbox той же транзакцией. Недопустимые заказы не меняются и попадают в
+    rejected. Транзакцию фиксирует вызывающий код.
+    """
+    if new_status not in TRANSITIONS:
+        raise HTTPException(status_code=422, detail=f"Unknown status: {new_status}")
+
+    order_ids = sorted(set(order_ids))
+    query = (
+        select(OrderModel.id, OrderModel.status, OrderModel.user_id)
+        .where(OrderModel.id.in_(order_ids))
+        .order_by(OrderModel.id)
+        .with_for_update()
+    )
+    if user_id is not None:
+        query = query.where(OrderModel.user_id == user_id)
+    current = {row.id: row for row in (await session.execute(query)).all()}
+
+    result = StatusChangeResult()
+    for order_id in order_ids:
+        old_status = current[order_id].status if order_id in current else None
+        if old_status is None:
+            result.rejected[order_id] = ORDER_NOT_FOUND
+        elif allowed_from is not None and old_status not in allowed_from:
+            result.rejected[order_id] = f"Order in status '{old_status}' cannot be changed"
+        elif not can_transition(old_status, new_status):
+            result.rejected[order_id] = f"Transition {old_status} -> {new_status} is not allowed"
+        else:
+            result.updated.append(order_id)
+
+    if not result.updated:
+        return result
+
+    await session.execute(
+        update(OrderModel)
+        .where(OrderModel.id.in_(result.updated))
+        .values(status=new_status)
+        .execution_options(synchronize_session=False)
+    )
+    await session.execute(
+        insert(OrderStatusHistoryModel).values([
+            {"order_id": order_id, "status": new_status, "comment": comment}
+            for order_id in result.updated
+        ])
+    )
+    events = [
+        ("order:status_changed", {"id": order_id, "old_status": current[order_id].status, "new_status": new_status})
+        for order_id in result.updated
+    ]
+    if new_status == "cancelled":
+        restocked = await _restock(session, result.updated)
+        await apply_sales(session, await load_sale_lines(session, result.updated), sign=-1)
+        events += [
+            ("order:cancelled", {"id": order_id, "user_id": current[order_id].user_id, "reason": comment})
+            for order_id in result.updated
+        ]
+        events += [
+            ("product:stock_changed", {"id": product_id, "old_stock": old, "new_stock": new})
+            for product_id, (old, new) in sorted(restocked.items())
+        ]
+    await publish_many(session, events)
+
+    return result
@@ -1,8 +1,10 @@
 """API роуты для заказов"""
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from decimal import Decimal
+from datetime import datetime
 
 from core.database import get_session
 from core.schemas import (
@@ -10,100 +12,235 @@ from core.schemas import (
     OrderSummarySchema,
     OrderCreateSchema,
     OrderUpdateStatusSchema,
-    PaginatedResponse,
+    OrderBulkStatusSchema,
+    OrderBulkStatusResultSchema,
+    OrderStatusRejectionSchema,
+    CursorPaginatedResponse,
     SuccessResponse
 )
-from core.dependencies import get_current_user, require_admin
-from core.models import UserModel
-from datetime import datetime
+from core.dependencies import get_current_user, get_user_read_session, require_admin, CurrentUser
+from core.idempotency import run_idempotent, IDEMPOTENCY_HEADER
+from core.schemas import AddressSchema, OrderItemSchema, OrderStatusHistorySchema
+from core.timeutils import as_utc
+from modules.orders.application.archive import get_archived_order
+from modules.orders.application.checkout import place_order
+from modules.orders.application.export import iter_orders_csv, gzip_stream
+from modules.orders.application.status import change_status, StatusChangeResult, USER_CANCELLABLE, ORDER_NOT_FOUND
+from modules.orders.application.queries import (
+    list_user_orders,
+    list_orders_with_details,
+    get_order_with_details,
+)
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"])
 
+STATUS_DISPLAY = {
+    "pending": "Ожидает",
+    "confirmed": "Подтвержден",
+    "processing": "В обработке",
+    "shipped": "Отправлен",
+    "delivered": "Доставлен",
+    "cancelled": "Отменен",
+    "refunded": "Возвращен",
+}
+
+
+def _money(kopecks: int) -> Decimal:
+    """Копейки -> рубли"""
+    return Decimal(kopecks) / 100
+
+
+def _order_schema(order, items, status_history) -> OrderSchema:
+    """Собрать OrderSchema из модели заказа и загруженных строк"""
+    return OrderSchema(
+        id=order.id,
+        order_number=order.order_number,
+        user_id=order.user_id,
+        status=order.status,
+        status_display=STATUS_DISPLAY.get(order.status, order.status),
+        items=[
+            OrderItemSchema(
+                id=item.id,
+                product_id=item.product_id,
+                product_name=item.product_name,
+                product_slug=item.product_slug,
+                quantity=item.quantity,
+                unit_price=_money(item.unit_price),
+                subtotal=_money(item.subtotal),
+            )
+            for item in items
+        ],
+        subtotal=_money(order.subtotal),
+        shipping_cost=_money(order.shipping_cost),
+        discount=_money(order.discount),
+        tax=_money(order.tax),
+        total=_money(order.total),
+        shipping_address=AddressSchema(
+            recipient_name=order.recipient_name,
+            phone=order.phone,
+            country=order.country,
+            city=order.city,
+            street=order.street,
+            building=order.building,
+            apartment=order.apartment,
+            postal_code=order.postal_code,
+        ),
+        comment=order.comment,
+        created_at=order.created_at,
+        updated_at=order.updated_at,
+        status_history=[OrderStatusHistorySchema.model_validate(h) for h in status_history],
+    )
+
 
-@router.get("", response_model=PaginatedResponse, summary="Список заказов")
+def _raise_if_rejected(result: StatusChangeResult, order_id: int) -> None:
+    reason = result.rejected.get(order_id)
+    if reason is not None:
+        raise HTTPException(status_code=404 if reason == ORDER_NOT_FOUND else 409, detail=reason)
+
+
+@router.get("", response_model=CursorPaginatedResponse, summary="Список заказов")
 async def list_orders(
     status: Optional[str] = Query(None, description="Фильтр по статусу"),
-    page: int = Query(1, ge=1, description="Номер страницы"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor)"),
     page_size: int = Query(20, ge=1, le=100, description="Размер страницы"),
-    current_user: UserModel = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_user_read_session)
 ):
     """
-    Получить список заказов текущего пользователя.
+    Получить список заказов текущего пользователя (от новых к старым).
 
     - **status**: Фильтр по статусу (опционально)
-    - **page**: Номер страницы
+    - **cursor**: Курсор из `next_cursor` предыдущей страницы
     - **page_size**: Размер страницы
     """
-    # TODO: Реализовать запрос к БД
+    rows, next_cursor = await list_user_orders(
+        session, current_user.id, status, cursor, page_size, current_user.has_archived_orders
+    )
+
     orders = [
         OrderSummarySchema(
-            id=1,
-            order_number="ORD-2024-000001",
-            status="delivered",
-            status_display="Доставлен",
-            total=Decimal("64970.00"),
-            items_count=1,
-            created_at=datetime.utcnow()
+            id=row.id,
+            order_number=row.order_number,
+            status=row.status,
+            status_display=STATUS_DISPLAY.get(row.status, row.status),
+            total=_money(row.total),
+            items_count=row.items_count,
+            created_at=row.created_at
         )
+        for row in rows
     ]
 
-    return PaginatedResponse(
+    return CursorPaginatedResponse(
         items=orders,
-        total=len(orders),
-        page=page,
-        page_size=page_size,
-        total_pages=1
+        next_cursor=next_cursor,
+        page_size=page_size
+    )
+
+
+@router.get("/all", response_model=CursorPaginatedResponse, summary="Все заказы", dependencies=[Depends(require_admin)])
+async def list_all_orders(
+    status: Optional[str] = Query(None, description="Фильтр по статусу"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor)"),
+    page_size: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Получить заказы всех пользователей с элементами и историей статусов.
+
+    Требуется роль **admin**.
+    """
+    orders, next_cursor = await list_orders_with_details(session, status, cursor, page_size)
+
+    return CursorPaginatedResponse(
+        items=[_order_schema(o, o.items, o.status_history) for o in orders],
+        next_cursor=next_cursor,
+        page_size=page_size
+    )
+
+
+@router.get("/export", summary="Выгрузка заказов в CSV", dependencies=[Depends(require_admin)])
+async def export_orders(
+    date_from: datetime = Query(..., description="Начало периода (включительно)"),
+    date_to: datetime = Query(..., description="Конец периода (не включительно)"),
+    gzip: bool = Query(False, description="Сжать выгрузку (orders.csv.gz)")
+):
+    """
+    Выгрузить заказы с элементами за период в CSV (строка на элемент заказа).
+
+    Ответ передаётся потоком. Требуется роль **admin**.
+    """
+    # Даты без часового пояса считаются UTC - иначе naive и aware не сравнить
+    date_from, date_to = as_utc(date_from), as_utc(date_to)
+    if date_to <= date_from:
+        raise HTTPException(status_code=400, detail="date_to must be after date_from")
+
+    filename = f"orders-{date_from:%Y%m%d}-{date_to:%Y%m%d}.csv"
+    body = iter_orders_csv(date_from, date_to)
+    media_type = "text/csv; charset=utf-8"
+    if gzip:
+        body, media_type, filename = gzip_stream(body), "application/gzip", filename + ".gz"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post(
+    "/status/bulk",
+    response_model=OrderBulkStatusResultSchema,
+    summary="Массовое обновление статуса",
+    dependencies=[Depends(require_admin)]
+)
+async def bulk_update_order_status(
+    data: OrderBulkStatusSchema,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Перевести несколько заказов в один статус.
+
+    Требуется роль **admin**. Заказы с недопустимым переходом не меняются
+    и возвращаются в **rejected** с причиной.
+    """
+    result = await change_status(session, data.order_ids, data.status, data.comment)
+    return OrderBulkStatusResultSchema(
+        updated=result.updated,
+        rejected=[
+            OrderStatusRejectionSchema(order_id=order_id, reason=reason)
+            for order_id, reason in result.rejected.items()
+        ]
     )
 
 
 @router.get("/{order_id}", response_model=OrderSchema, summary="Детали заказа")
 async def get_order(
     order_id: int,
-    current_user: UserModel = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_user_read_session)
 ):
     """
     Получить детали заказа по ID.
 
     Пользователь видит только свои заказы.
     """
-    # TODO: Реализовать запрос к БД
-    from core.schemas import AddressSchema
+    owner_id = None if current_user.role == "admin" else current_user.id
+    order = await get_order_with_details(session, order_id, owner_id)
+    if order is not None:
+        return _order_schema(order, order.items, order.status_history)
 
-    return OrderSchema(
-        id=order_id,
-        order_number="ORD-2024-000001",
-        user_id=current_user.id,
-        status="delivered",
-        status_display="Доставлен",
-        items=[],
-        subtotal=Decimal("59980.00"),
-        shipping_cost=Decimal("4990.00"),
-        discount=Decimal("0"),
-        tax=Decimal("0"),
-        total=Decimal("64970.00"),
-        shipping_address=AddressSchema(
-            recipient_name="Иван Иванов",
-            phone="+79001234567",
-            country="Россия",
-            city="Москва",
-            street="Улица Примерная",
-            building="123",
-            apartment=None,
-            postal_code="123456"
-        ),
-        comment=None,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
-        status_history=[]
-    )
+    archived = await get_archived_order(session, order_id, owner_id)
+    if archived is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return _order_schema(*archived)
 
 
 @router.post("", response_model=OrderSchema, summary="Создать заказ")
 async def create_order(
     data: OrderCreateSchema,
-    current_user: UserModel = Depends(get_current_user),
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     """
@@ -111,40 +248,23 @@ async def create_order(
 
     - **shipping_address**: Адрес доставки
     - **comment**: Комментарий к заказу (опционально)
-    """
-    # TODO: Реализовать создание заказа
-    # - Получить корзину пользователя
-    # - Валидировать товары (наличие, цена)
-    # - Создать заказ и элементы
-    # - Очистить корзину
-    # - Уменьшить stock товаров
 
-    from core.schemas import AddressSchema
+    С заголовком **Idempotency-Key** повтор запроса возвращает тот же заказ.
+    """
+    async def do_create():
+        placed = await place_order(session, current_user.id, data.shipping_address, data.comment)
+        return _order_schema(placed.order, placed.items, placed.status_history)
 
-    return OrderSchema(
-        id=1,
-        order_number="ORD-2024-000002",
-        user_id=current_user.id,
-        status="pending",
-        status_display="В ожидании",
-        items=[],
-        subtotal=Decimal("0"),
-        shipping_cost=Decimal("0"),
-        discount=Decimal("0"),
-        tax=Decimal("0"),
-        total=Decimal("0"),
-        shipping_address=data.shipping_address,
-        comment=data.comment,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
-        status_history=[]
+    return await run_idempotent(
+        session, response, current_user.id, idempotency_key,
+        scope="orders:create", payload=data, handler=do_create
     )
 
 
 @router.post("/{order_id}/cancel", response_model=SuccessResponse, summary="Отменить заказ")
 async def cancel_order(
     order_id: int,
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     """
@@ -152,10 +272,12 @@ async def cancel_order(
 
     Заказ можно отменить только в статусах: pending, confirmed.
     """
-    # TODO: Реализовать отмену заказа
-    # - Проверить статус заказа
-    # - Вернуть stock товаров
-    # - Изменить статус на cancelled
+    result = await change_status(
+        session, [order_id], "cancelled", "Cancelled by customer",
+        user_id=current_user.id, allowed_from=USER_CANCELLABLE
+    )
+    _raise_if_rejected(result, order_id)
+
     return SuccessResponse(message="Order cancelled")
 
 
@@ -170,35 +292,8 @@ async def update_order_status(
 
     Требуется роль **admin**.
     """
-    # TODO: Реализовать обновление статуса
-    # - Проверить валидность перехода статуса
-    # - Добавить запись в историю
-    from core.schemas import AddressSchema
+    result = await change_status(session, [order_id], data.status, data.comment)
+    _raise_if_rejected(result, order_id)
 
-    return OrderSchema(
-        id=order_id,
-        order_number="ORD-2024-000001",
-        user_id=1,
-        status=data.status,
-        status_display=data.status.capitalize(),
-        items=[],
-        subtotal=Decimal("59980.00"),
-        shipping_cost=Decimal("4990.00"),
-        discount=Decimal("0"),
-        tax=Decimal("0"),
-        total=Decimal("64970.00"),
-        shipping_address=AddressSchema(
-            recipient_name="Иван Иванов",
-            phone="+79001234567",
-            country="Россия",
-            city="Москва",
-            street="Улица Примерная",
-            building="123",
-            apartment=None,
-            postal_code="123456"
-        ),
-        comment=data.comment,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
-        status_history=[]
-    )
+    order = await get_order_with_details(session, order_id)
+    return _order_schema(order, order.items, order.status_history)
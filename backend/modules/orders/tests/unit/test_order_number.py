@@ -0,0 +1,57 @@
+"""Unit tests for order number allocation"""
+import asyncio
+import re
+import pytest
+from modules.orders.application.order_number import OrderNumberAllocator, format_order_number
+
+
+class FakeSequence:
+    """Shared database sequence stand-in (nextval)"""
+
+    def __init__(self):
+        self.value = 0
+        self.calls = 0
+
+    async def nextval(self, session):
+        await asyncio.sleep(0)  # round trip: let other tasks interleave
+        self.value += 1
+        self.calls += 1
+        return self.value
+
+
+class TestOrderNumber:
+    """Tests for OrderNumberAllocator"""
+
+    def test_format(self):
+        assert format_order_number(2024, 1) == "ORD-2024-000001"
+        assert format_order_number(2024, 1234567) == "ORD-2024-1234567"
+
+    async def test_block_reserved_once(self):
+        sequence = FakeSequence()
+        allocator = OrderNumberAllocator(block_size=10, fetch_hi=sequence.nextval)
+
+        values = [await allocator.next_value(None) for _ in range(25)]
+
+        assert values == list(range(1, 26))
+        assert sequence.calls == 3
+
+    async def test_no_collisions_across_workers(self):
+        sequence = FakeSequence()
+        # Several "processes", each with its own allocator, share one sequence
+        workers = [OrderNumberAllocator(block_size=7, fetch_hi=sequence.nextval) for _ in range(4)]
+
+        async def hammer(allocator):
+            numbers = []
+            for _ in range(30):
+                numbers.append(await allocator.next_number(None))
+                await asyncio.sleep(0)
+            return numbers
+
+        results = await asyncio.gather(*(hammer(w) for w in workers for _ in range(25)))
+        numbers = [n for batch in results for n in batch]
+
+        assert len(numbers) == 4 * 25 * 30
+        assert len(set(numbers)) == len(numbers)
+        assert all(re.fullmatch(r"ORD-\d{4}-\d{6,}", n) for n in numbers)
+        # Each worker wastes at most one partially used block
+        assert sequence.calls <= len(numbers) // 7 + len(workers)
@@ -4,9 +4,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, or_
 from typing import Optional, List
 from decimal import Decimal
+from functools import partial
 import json
 
-from core.database import get_session
+from core.database import get_session, get_read_session
 from core.schemas import (
     ProductSchema,
     ProductCreateSchema,
@@ -17,9 +18,15 @@ from core.schemas import (
 )
 from core.dependencies import get_current_user, require_admin
 from core.models import ProductModel, CategoryModel
+from core.singleflight import SingleFlight
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
 
+PRODUCT_SORTS = ("name", "price_asc", "price_desc", "created")
+
+# Одинаковые одновременные запросы списка (рассылка с одной ссылкой) - один поход в БД
+product_list_flight: SingleFlight[PaginatedResponse] = SingleFlight()
+
 
 @router.get("", response_model=PaginatedResponse, summary="Список товаров")
 async def list_products(
@@ -31,7 +38,7 @@ async def list_products(
     sort_by: str = Query("created", description="Сортировка: name, price_asc, price_desc, created"),
     page: int = Query(1, ge=1, description="Номер страницы"),
     page_size: int = Query(20, ge=1, le=100, description="Размер страницы"),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """
     Получить список товаров с фильтрацией и пагинацией.
@@ -45,6 +52,34 @@ async def list_products(
     - **page**: Номер страницы (по умолчанию 1)
     - **page_size**: Размер страницы (макс 100)
     """
+    # Ключ - нормализованные параметры: значения, дающие тот же SQL, совпадают
+    key = (
+        category_id or None,
+        None if min_price is None else int(min_price * 100),
+        None if max_price is None else int(max_price * 100),
+        bool(in_stock),
+        search.lower() if search else None,
+        sort_by if sort_by in PRODUCT_SORTS else "created",
+        page,
+        page_size,
+    )
+    return await product_list_flight.do(key, partial(
+        _product_page, session, category_id, min_price, max_price, in_stock, search, sort_by, page, page_size,
+    ))
+
+
+async def _product_page(
+    session: AsyncSession,
+    category_id: Optional[int],
+    min_price: Optional[Decimal],
+    max_price: Optional[Decimal],
+    in_stock: Optional[bool],
+    search: Optional[str],
+    sort_by: str,
+    page: int,
+    page_size: int,
+) -> PaginatedResponse:
+    """Страница списка товаров: count и выборка страницы"""
     # Базовый запрос с join категорий
     query = select(ProductModel).join(CategoryModel, ProductModel.category_id == CategoryModel.id)
 
@@ -131,7 +166,7 @@ async def list_products(
 
 @router.get("/categories/list", response_model=List[CategorySchema], summary="Список категорий")
 async def list_categories(
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """
     Получить список всех категорий.
@@ -161,7 +196,7 @@ async def list_categories(
 @router.get("/{product_id}", response_model=ProductSchema, summary="Детали товара")
 async def get_product(
     product_id: int,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """
     Получить детали товара по ID.
@@ -0,0 +1,188 @@
+"""Refresh токены: выпуск, ротация и отзыв"""
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import HTTPException
+from jose import JWTError
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.config import get_settings
+from core.database import async_session_maker
+from core.models import RefreshTokenModel, UserModel
+from core.security import decode_jwt, encode_jwt
+from core.timeutils import as_utc
+
+settings = get_settings()
+
+
+class RevokedTokens:
+    """
+    token_id недавно отозванных, но ещё не истёкших refresh токенов этого процесса.
+
+    Повтор отозванного токена отклоняется без запроса к БД. Набор ограничен
+    max_size (вытесняются самые старые записи); отсутствие в наборе ничего не
+    гарантирует (токен мог отозвать другой воркер или он вытеснен) - это
+    проверяет атомарный UPDATE при ротации.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, max_size: int = settings.REVOKED_TOKENS_MAX_SIZE):
+        self.max_size = max_size
+        # token_id -> exp, в порядке добавления
+        self._expires: Dict[str, float] = {}
+        self._added = 0
+
+    def __contains__(self, token_id: str) -> bool:
+        expires_at = self._expires.get(token_id)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._expires[token_id]
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def add(self, token_id: str, expires_at: datetime) -> None:
+        self._expires.pop(token_id, None)
+        self._expires[token_id] = as_utc(expires_at).timestamp()
+        if len(self._expires) > self.max_size:
+            del self._expires[next(iter(self._expires))]
+        self._added += 1
+        if self._added % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def add_many(self, tokens: Iterable[Tuple[str, datetime]]) -> None:
+        for token_id, expires_at in tokens:
+            self.add(token_id, expires_at)
+
+    def prune(self) -> None:
+        """Убрать истёкшие - они и так не пройдут проверку exp"""
+        now = time.time()
+        self._expires = {token_id: exp for token_id, exp in self._expires.items() if exp > now}
+
+    async def load(
+        self,
+        session_factory: Optional[async_sessionmaker] = None,
+        minutes: Optional[int] = None,
+    ) -> int:
+        """
+        Загрузить токены, отозванные за последние minutes минут (при старте).
+
+        Не больше max_size самых свежих; более ранние отзывы проверяет БД.
+        """
+        session_factory = session_factory or async_session_maker
+        minutes = settings.REVOKED_TOKENS_LOAD_MINUTES if minutes is None else minutes
+        now = datetime.now(timezone.utc)
+        async with session_factory() as session:
+            rows = (await session.execute(
+                select(RefreshTokenModel.token_id, RefreshTokenModel.expires_at)
+                .where(
+                    RefreshTokenModel.revoked_at >= now - timedelta(minutes=minutes),
+                    RefreshTokenModel.expires_at > now,
+                )
+                .order_by(RefreshTokenModel.revoked_at.desc())
+                .limit(self.max_size)
+            )).all()
+        # Старые первыми - при переполнении вытесняются они
+        self.add_many(reversed(rows))
+        return len(rows)
+
+
+revoked_tokens = RevokedTokens()
+
+
+async def issue_refresh_token(
+    session: AsyncSession,
+    user_id: int,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> str:
+    """Создать refresh токен и сохранить его token_id (jti) в БД"""
+    token_id = str(uuid.uuid4())
+    expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    session.add(RefreshTokenModel(
+        token_id=token_id,
+        user_id=user_id,
+        expires_at=expires_at,
+        ip_address=ip_address,
+        user_agent=user_agent[:255] if user_agent else None,
+    ))
+    payload = {"sub": str(user_id), "type": "refresh", "jti": token_id, "exp": expires_at}
+    return encode_jwt(payload)
+
+
+def _decode_refresh_token(token: str) -> Tuple[str, int, datetime]:
+    try:
+        claims = decode_jwt(token)
+        if claims.get("type") != "refresh" or not claims.get("jti"):
+            raise JWTError("Not a refresh token")
+        return claims["jti"], int(claims["sub"]), datetime.fromtimestamp(claims["exp"], timezone.utc)
+    except (JWTError, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+
+async def rotate_refresh_token(
+    session: AsyncSession,
+    token: str,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> Tuple[UserModel, str]:
+    """
+    Отозвать refresh токен и выдать новый.
+
+    Отзыв - один UPDATE ... WHERE revoked_at IS NULL RETURNING, поэтому из
+    двух параллельных запросов с одним токеном успешен только один.
+    Возвращает пользователя и новый refresh токен.
+    """
+    token_id, user_id, expires_at = _decode_refresh_token(token)
+    if token_id in revoked_tokens:
+        raise HTTPException(status_code=401, detail="Refresh token revoked")
+
+    revoked = await session.scalar(
+        update(RefreshTokenModel)
+        .where(
+            RefreshTokenModel.token_id == token_id,
+            RefreshTokenModel.user_id == user_id,
+            RefreshTokenModel.revoked_at.is_(None),
+        )
+        .values(revoked_at=datetime.now(timezone.utc))
+        .returning(RefreshTokenModel.id)
+        .execution_options(synchronize_session=False)
+    )
+    if revoked is None:
+        revoked_tokens.add(token_id, expires_at)
+        raise HTTPException(status_code=401, detail="Refresh token revoked")
+
+    user = await session.get(UserModel, user_id)
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=401, detail="User is inactive")
+
+    new_token = await issue_refresh_token(session, user_id, ip_address, user_agent)
+    revoked_tokens.add(token_id, expires_at)
+    return user, new_token
+
+
+async def revoke_refresh_tokens(session: AsyncSession, user_id: int, token: Optional[str] = None) -> int:
+    """Отозвать указанный refresh токен пользователя или все его активные токены"""
+    query = update(RefreshTokenModel).where(
+        RefreshTokenModel.user_id == user_id,
+        RefreshTokenModel.revoked_at.is_(None),
+    )
+    if token is not None:
+        token_id, _, _ = _decode_refresh_token(token)
+        query = query.where(RefreshTokenModel.token_id == token_id)
+
+    rows = (await session.execute(
+        query
+        .values(revoked_at=datetime.now(timezone.utc))
+        .returning(RefreshTokenModel.token_id, RefreshTokenModel.expires_at)
+        .execution_options(synchronize_session=False)
+    )).all()
+    revoked_tokens.add_many(rows)
+    return len(rows)
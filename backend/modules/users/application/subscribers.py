@@ -0,0 +1,13 @@
+"""Подписчики модуля пользователей на доменные события"""
+from core.dependencies import invalidate_user
+from core.events import DomainEvent, EventBus
+
+
+async def on_user_changed(event: DomainEvent) -> None:
+    """Сбросить пользователя из кэша этого процесса (логаут, смена роли, блокировка)"""
+    invalidate_user(event.payload["id"])
+
+
+def register_user_subscribers(bus: EventBus) -> None:
+    # Кэш пользователей свой в каждом воркере - сбрасывать нужно во всех
+    bus.subscribe("user:changed", on_user_changed, broadcast=True)
@@ -1,25 +1,48 @@
 """API роуты для авторизации"""
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.config import get_settings
 from core.database import get_session
 from core.schemas import (
     UserRegisterSchema,
     UserLoginSchema,
     UserWithTokensSchema,
     TokensResponseSchema,
+    RefreshTokenRequestSchema,
+    LogoutSchema,
     UserSchema,
     SuccessResponse
 )
-from core.dependencies import get_current_user, require_admin
-from core.models import UserModel
+from core.dependencies import get_current_user, require_admin, invalidate_user, CurrentUser
+from core.models import UserModel, UserProfileModel
+from core.touch import touches
+from core.events import publish
+from core.security import create_access_token, hash_password, verify_password
+from modules.users.application.refresh_tokens import (
+    issue_refresh_token,
+    rotate_refresh_token,
+    revoke_refresh_tokens,
+)
+
+settings = get_settings()
 
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
 
 
+def _client_info(request: Request):
+    """IP и User-Agent для записи refresh токена"""
+    return (request.client.host if request.client else None), request.headers.get("user-agent")
+
+
 @router.post("/register", response_model=UserWithTokensSchema, summary="Регистрация")
 async def register(
     data: UserRegisterSchema,
+    request: Request,
     session: AsyncSession = Depends(get_session)
 ):
     """
@@ -32,41 +55,30 @@ async def register(
 
     Возвращает пользователя с JWT токенами.
     """
-    # TODO: Реализовать регистрацию в БД
-    # Заглушка
-    from datetime import datetime, timedelta
-    from jose import jwt
-    from core.config import get_settings
-
-    settings = get_settings()
+    exists = await session.scalar(select(UserModel.id).where(UserModel.email == data.email))
+    if exists is not None:
+        raise HTTPException(status_code=409, detail="Email already registered")
 
     user = UserModel(
-        id=1,
         email=data.email,
+        password_hash=await hash_password(data.password),
         role="customer",
         is_active=True,
-        is_verified=True,
-        created_at=datetime.utcnow()
+        is_verified=False,
+        profile=UserProfileModel(first_name=data.first_name, last_name=data.last_name)
     )
+    session.add(user)
+    try:
+        await session.flush()
+    except IntegrityError:
+        # Параллельная регистрация с тем же email
+        raise HTTPException(status_code=409, detail="Email already registered")
+    await session.refresh(user, ["created_at"])
 
     # Генерация токенов
-    access_payload = {
-        "sub": str(user.id),
-        "email": user.email,
-        "role": user.role,
-        "type": "access"
-    }
-    access_token = jwt.encode(access_payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-
-    refresh_payload = {
-        "sub": str(user.id),
-        "type": "refresh"
-    }
-    refresh_token = jwt.encode(refresh_payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-
     tokens = TokensResponseSchema(
-        access_token=access_token,
-        refresh_token=refresh_token,
+        access_token=create_access_token(user.id, user.email, user.role),
+        refresh_token=await issue_refresh_token(session, user.id, *_client_info(request)),
         expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
     )
 
@@ -84,6 +96,7 @@ async def register(
 @router.post("/login", response_model=TokensResponseSchema, summary="Логин")
 async def login(
     data: UserLoginSchema,
+    request: Request,
     session: AsyncSession = Depends(get_session)
 ):
     """
@@ -94,29 +107,40 @@ async def login(
 
     Возвращает JWT токены (access + refresh).
     """
-    # TODO: Реализовать проверку пароля
-    from jose import jwt
-    from core.config import get_settings
-
-    settings = get_settings()
-
-    # Заглушка - всегда успешный логин
-    access_payload = {
-        "sub": "1",
-        "email": data.email,
-        "role": "customer",
-        "type": "access"
-    }
-    access_token = jwt.encode(access_payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-
-    refresh_payload = {
-        "sub": "1",
-        "type": "refresh"
-    }
-    refresh_token = jwt.encode(refresh_payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    user = await session.scalar(select(UserModel).where(UserModel.email == data.email))
+    valid, new_hash = await verify_password(data.password, user.password_hash if user else None)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    if not user.is_active:
+        raise HTTPException(status_code=403, detail="User is inactive")
+
+    if new_hash:
+        # Хэш создан с меньшим BCRYPT_ROUNDS - сохраняем пересчитанный
+        user.password_hash = new_hash
+    # last_login_at пишется пачкой фоновой задачей, а не UPDATE на каждый логин
+    touches.touch(UserModel.last_login_at, user.id)
 
     return TokensResponseSchema(
-        access_token=access_token,
+        access_token=create_access_token(user.id, user.email, user.role),
+        refresh_token=await issue_refresh_token(session, user.id, *_client_info(request)),
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    )
+
+
+@router.post("/refresh", response_model=TokensResponseSchema, summary="Обновить токены")
+async def refresh(
+    data: RefreshTokenRequestSchema,
+    request: Request,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Получить новую пару токенов по refresh токену.
+
+    Старый refresh токен отзывается и повторно не принимается.
+    """
+    user, refresh_token = await rotate_refresh_token(session, data.refresh_token, *_client_info(request))
+    return TokensResponseSchema(
+        access_token=create_access_token(user.id, user.email, user.role),
         refresh_token=refresh_token,
         expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
     )
@@ -124,20 +148,25 @@ async def login(
 
 @router.post("/logout", response_model=SuccessResponse, summary="Логаут")
 async def logout(
-    current_user: UserModel = Depends(get_current_user)
+    data: Optional[LogoutSchema] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
 ):
     """
     Выход из системы.
 
-    Отзывает refresh токен (текущий).
+    Отзывает переданный refresh токен; без него - все refresh токены пользователя.
     """
-    # TODO: Реализовать отзыв токена
+    await revoke_refresh_tokens(session, current_user.id, data.refresh_token if data else None)
+    invalidate_user(current_user.id)
+    # Остальные воркеры сбросят кэш по событию (broadcast)
+    await publish(session, "user:changed", {"id": current_user.id})
     return SuccessResponse(message="Logged out successfully")
 
 
 @router.get("/me", response_model=UserSchema, summary="Текущий пользователь")
 async def get_me(
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Получить информацию о текущем пользователе.
@@ -1,4 +1,5 @@
 """Конфигурация pytest для всех тестов"""
+import os
 import pytest
 import asyncio
 from typing import AsyncGenerator, Generator
@@ -7,9 +8,14 @@ from sqlalchemy.pool import StaticPool
 from httpx import AsyncClient, ASGITransport
 from functools import partial
 
+# Минимальный cost bcrypt - хэширование в тестах не должно занимать секунды
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
 from core.models import Base
 from core.config import get_settings
 from core.app import app
+from core.database import instrument_queries
+from core.rate_limit import reset_rate_limits
 
 settings = get_settings()
 
@@ -23,6 +29,7 @@ test_engine = create_async_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+instrument_queries(test_engine)
 
 TestSessionLocal = async_sessionmaker(
     test_engine,
@@ -53,6 +60,12 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@pytest.fixture(scope="function")
+def session_factory(db_session: AsyncSession) -> async_sessionmaker:
+    """Session factory bound to the test database (for background jobs)"""
+    return TestSessionLocal
+
+
 @pytest.fixture(scope="function")
 async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     """Create test HTTP client"""
@@ -63,13 +76,18 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         base_url="http://test"
     ) as ac:
         # Override dependency injection
-        from core.dependencies import get_session
+        from core.dependencies import get_session, get_session_maker, get_user_read_session
+        from core.database import get_read_session
         from unittest.mock import AsyncMock
 
         async def override_get_session():
             yield db_session
 
         app.dependency_overrides[get_session] = override_get_session
+        app.dependency_overrides[get_read_session] = override_get_session
+        app.dependency_overrides[get_user_read_session] = override_get_session
+        app.dependency_overrides[get_session_maker] = lambda: TestSessionLocal
+        reset_rate_limits()
 
         yield ac
 
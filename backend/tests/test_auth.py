@@ -0,0 +1,79 @@
+"""Tests for registration, login and password hashing"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from core import security
+from core.models import UserModel
+from core.security import hash_password, verify_password
+from database import seed
+
+CREDENTIALS = {"email": "new@example.com", "password": "secret-password"}
+
+
+class TestAuth:
+    """Tests for /api/auth/register and /api/auth/login"""
+
+    async def test_register_and_login(self, client, db_session):
+        response = await client.post("/api/auth/register", json={**CREDENTIALS, "first_name": "Ivan"})
+        assert response.status_code == 200
+        assert response.json()["tokens"]["access_token"]
+
+        duplicate = await client.post("/api/auth/register", json=CREDENTIALS)
+        assert duplicate.status_code == 409
+
+        login = await client.post("/api/auth/login", json=CREDENTIALS)
+        assert login.status_code == 200
+        wrong = await client.post("/api/auth/login", json={**CREDENTIALS, "password": "wrong-password"})
+        assert wrong.status_code == 401
+        unknown = await client.post("/api/auth/login", json={**CREDENTIALS, "email": "nobody@example.com"})
+        assert unknown.status_code == 401
+
+    async def test_login_upgrades_weak_hash(self, client, db_session, monkeypatch):
+        weak_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash(CREDENTIALS["password"])
+        db_session.add(UserModel(email=CREDENTIALS["email"], password_hash=weak_hash))
+        await db_session.commit()
+        monkeypatch.setattr(security, "pwd_context", CryptContext(
+            schemes=["bcrypt"], bcrypt__default_rounds=5, bcrypt__min_rounds=5
+        ))
+
+        response = await client.post("/api/auth/login", json=CREDENTIALS)
+
+        assert response.status_code == 200
+        stored = await db_session.scalar(select(UserModel.password_hash))
+        assert stored.startswith("$2b$05$")
+
+
+    async def test_malformed_stored_hash_returns_401(self, client, db_session):
+        db_session.add(UserModel(email=CREDENTIALS["email"], password_hash="$2b$12$truncated", role="customer"))
+        await db_session.commit()
+
+        response = await client.post("/api/auth/login", json=CREDENTIALS)
+        assert response.status_code == 401
+
+    async def test_seeded_demo_user_can_log_in(self, client, db_session, session_factory, monkeypatch):
+        monkeypatch.setattr(seed, "async_session_maker", session_factory)
+        await seed.seed_demo_data()
+
+        response = await client.post("/api/auth/login", json={"email": "test@example.com", "password": "password123"})
+        assert response.status_code == 200
+
+
+class TestPasswordHashing:
+    """Tests for the bounded hashing pool"""
+
+    async def test_hash_and_verify(self):
+        password_hash = await hash_password("secret-password")
+        assert await verify_password("secret-password", password_hash) == (True, None)
+        assert (await verify_password("other", password_hash))[0] is False
+
+    async def test_queue_timeout_returns_503(self, monkeypatch):
+        monkeypatch.setattr(security, "_hash_slots", asyncio.Semaphore(0))
+        monkeypatch.setattr(security.settings, "PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", 0.01)
+
+        with pytest.raises(HTTPException) as exc:
+            await hash_password("secret-password")
+        assert exc.value.status_code == 503
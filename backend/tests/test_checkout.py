@@ -0,0 +1,97 @@
+"""Integration tests for checkout"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select, func
+
+from core.models import UserModel, CartItemModel, ProductModel, OrderItemModel, OutboxEventModel
+from core.schemas import AddressSchema
+from modules.orders.application.checkout import place_order
+from modules.orders.application.order_number import OrderNumberAllocator
+
+ADDRESS = AddressSchema(
+    recipient_name="Test User",
+    phone="+79001234567",
+    city="Moscow",
+    street="Test Street",
+    building="1",
+    postal_code="123456"
+)
+
+
+async def _cart_with(session, helper, *items):
+    """Create user with cart; items are (product, quantity) pairs"""
+    user = UserModel(email="buyer@example.com", password_hash="hash", role="customer")
+    session.add(user)
+    await session.commit()
+    cart = await helper.create_cart(session, user_id=user.id)
+    session.add_all([
+        CartItemModel(cart_id=cart.id, product_id=p.id, quantity=q, unit_price=p.price)
+        for p, q in items
+    ])
+    await session.commit()
+    return user
+
+
+class TestCheckout:
+    """Tests for place_order"""
+
+    async def test_checkout_creates_order(self, db_session, test_helper):
+        phone = await test_helper.create_product(db_session, name="Phone", slug="phone", price=10000, stock=5)
+        case = await test_helper.create_product(db_session, name="Case", slug="case", price=500, stock=3)
+        user = await _cart_with(db_session, test_helper, (phone, 2), (case, 3))
+
+        placed = await place_order(db_session, user.id, ADDRESS, "call me")
+        await db_session.commit()
+
+        assert placed.order.total == 2 * 10000 + 3 * 500
+        assert placed.order.order_number.startswith("ORD-")
+        assert placed.order.city == "Moscow"
+        assert {(i.product_id, i.quantity) for i in placed.items} == {(phone.id, 2), (case.id, 3)}
+        assert [h.status for h in placed.status_history] == ["pending"]
+
+        stocks = dict((await db_session.execute(select(ProductModel.id, ProductModel.stock))).all())
+        assert stocks == {phone.id: 3, case.id: 0}
+        assert await db_session.scalar(select(func.count()).select_from(CartItemModel)) == 0
+        events = (await db_session.scalars(select(OutboxEventModel.event_type).order_by(OutboxEventModel.id))).all()
+        assert events == ["order:created", "product:stock_changed", "product:stock_changed"]
+
+    async def test_checkout_insufficient_stock(self, db_session, test_helper):
+        phone = await test_helper.create_product(db_session, name="Phone", slug="phone", stock=1)
+        user = await _cart_with(db_session, test_helper, (phone, 2))
+        phone_id, user_id = phone.id, user.id
+
+        with pytest.raises(HTTPException) as exc:
+            await place_order(db_session, user_id, ADDRESS)
+        await db_session.rollback()
+
+        assert exc.value.status_code == 409
+        assert exc.value.detail["product_ids"] == [phone_id]
+        assert await db_session.scalar(select(ProductModel.stock)) == 1
+        assert await db_session.scalar(select(func.count()).select_from(OrderItemModel)) == 0
+
+    async def test_checkout_empty_cart(self, db_session, test_helper):
+        user = await _cart_with(db_session, test_helper)
+
+        with pytest.raises(HTTPException) as exc:
+            await place_order(db_session, user.id, ADDRESS)
+
+        assert exc.value.status_code == 400
+
+
+class TestOrderNumberAllocator:
+    """Tests for order number allocation without a sequence"""
+
+    async def test_skips_numbers_in_other_formats(self, db_session, test_helper):
+        user = UserModel(email="buyer@example.com", password_hash="hash", role="customer")
+        db_session.add(user)
+        await db_session.commit()
+        order = await test_helper.create_order(db_session, user.id)
+        order.order_number = "ORD-2024-000042"
+        await db_session.commit()
+        legacy = await test_helper.create_order(db_session, user.id)
+        legacy.order_number = "LEGACY-ABC"
+        await db_session.commit()
+
+        allocator = OrderNumberAllocator(block_size=10)
+
+        assert await allocator.next_value(db_session) == 51
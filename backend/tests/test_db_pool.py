@@ -0,0 +1,48 @@
+"""Tests for connection pool instrumentation"""
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.database import InstrumentedPool
+from core.models import UserModel
+from core.security import create_access_token
+
+
+class TestInstrumentedPool:
+    """Tests for InstrumentedPool"""
+
+    async def test_counts_checkouts_and_timeouts(self):
+        engine = create_async_engine(
+            "sqlite+aiosqlite://",
+            poolclass=InstrumentedPool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                assert engine.pool.stats()["checked_out"] == 1
+
+                with pytest.raises(exc.TimeoutError):
+                    async with engine.connect():
+                        pass
+
+            stats = engine.pool.stats()
+            assert stats["checked_out"] == 0
+            assert stats["checkouts"] == 2
+            assert stats["timeouts"] == 1
+            assert stats["wait_seconds_max"] >= 0.05
+        finally:
+            await engine.dispose()
+
+    async def test_admin_endpoint(self, client, db_session):
+        admin = UserModel(email="admin@example.com", password_hash="hash", role="admin")
+        db_session.add(admin)
+        await db_session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(admin.id, admin.email, admin.role)}"}
+
+        response = await client.get("/api/admin/db/pool", headers=headers)
+
+        assert response.status_code == 200
+        assert {"checked_out", "overflow", "timeouts", "wait_seconds_total"} <= response.json().keys()
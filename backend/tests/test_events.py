@@ -0,0 +1,215 @@
+"""Tests for the outbox and event bus"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from core.dependencies import CurrentUser, user_cache
+from core.events import EventBus, publish
+from core.models import OutboxEventModel, OrderModel, UserModel
+from modules.notifications.application import emails
+from modules.orders.application.status import change_status
+from modules.users.application.subscribers import register_user_subscribers
+
+
+async def _outbox(session):
+    rows = await session.execute(
+        select(OutboxEventModel.event_type, OutboxEventModel.processed_at, OutboxEventModel.attempts)
+        .order_by(OutboxEventModel.id)
+    )
+    return rows.all()
+
+
+class TestEvents:
+    """Tests for publish and EventBus.drain"""
+
+    async def test_rolled_back_event_is_not_published(self, db_session):
+        await publish(db_session, "order:created", {"id": 1})
+        await db_session.rollback()
+
+        assert await _outbox(db_session) == []
+
+    async def test_drain_delivers_to_subscribers(self, db_session, session_factory):
+        bus = EventBus()
+        received = []
+
+        @bus.subscribe("order:created")
+        async def on_created(event):
+            received.append(event.payload["id"])
+
+        for order_id in (1, 2, 3):
+            await publish(db_session, "order:created", {"id": order_id})
+        await publish(db_session, "order:ignored", {"id": 4})
+        await db_session.commit()
+
+        assert await bus.drain(batch_size=2, session_factory=session_factory) == 4
+        assert received == [1, 2, 3]
+        assert all(processed_at is not None for _, processed_at, _ in await _outbox(db_session))
+        assert await bus.drain(session_factory=session_factory) == 0
+
+    async def test_failed_event_is_retried(self, db_session, session_factory):
+        bus = EventBus()
+        calls = []
+
+        async def flaky(event):
+            calls.append(event.id)
+            if len(calls) == 1:
+                raise RuntimeError("smtp down")
+
+        bus.subscribe("order:created", flaky)
+        await publish(db_session, "order:created", {"id": 1})
+        await db_session.commit()
+
+        assert await bus.drain(session_factory=session_factory) == 0
+        db_session.expire_all()
+        [(_, processed_at, attempts)] = await _outbox(db_session)
+        assert (processed_at, attempts) == (None, 1)
+
+        assert await bus.drain(session_factory=session_factory) == 1
+        assert len(calls) == 2
+
+    async def test_claimed_batch_is_dispatched_outside_the_transaction(self, db_session, session_factory):
+        bus, other = EventBus(), EventBus()
+        seen = []
+
+        @bus.subscribe("order:created")
+        async def on_created(event):
+            # Порция уже забрана и закоммичена: другой воркер её не получит
+            async with session_factory() as session:
+                seen.append(await session.scalar(select(OutboxEventModel.locked_until)))
+            assert await other.drain(session_factory=session_factory) == 0
+
+        await publish(db_session, "order:created", {"id": 1})
+        await db_session.commit()
+
+        assert await bus.drain(session_factory=session_factory) == 1
+        assert seen[0] is not None
+        db_session.expire_all()
+        assert await db_session.scalar(select(OutboxEventModel.locked_until)) is None
+
+    async def test_expired_claim_is_redelivered(self, db_session, session_factory):
+        bus = EventBus()
+        received = []
+        bus.subscribe("order:created", lambda event: _append(received, event))
+        await publish(db_session, "order:created", {"id": 1})
+        await db_session.execute(
+            update(OutboxEventModel).values(locked_until=datetime.now(timezone.utc) + timedelta(minutes=5))
+        )
+        await db_session.commit()
+
+        # Забрано воркером, который ещё работает
+        assert await bus.drain(session_factory=session_factory) == 0
+
+        await db_session.execute(
+            update(OutboxEventModel).values(locked_until=datetime.now(timezone.utc) - timedelta(seconds=1))
+        )
+        await db_session.commit()
+
+        assert await bus.drain(session_factory=session_factory) == 1
+        assert [event.payload["id"] for event in received] == [1]
+
+    async def test_status_change_publishes_events(self, db_session):
+        order = OrderModel(
+            order_number="ORD-2024-000001", user_id=1, status="pending", subtotal=100, total=100,
+            recipient_name="Test", phone="+79001234567", city="Moscow",
+            street="Street", building="1", postal_code="123456"
+        )
+        db_session.add(order)
+        await db_session.commit()
+
+        await change_status(db_session, [order.id], "cancelled", "changed my mind")
+        await db_session.commit()
+
+        assert [event_type for event_type, _, _ in await _outbox(db_session)] == [
+            "order:status_changed", "order:cancelled"
+        ]
+
+
+class TestBroadcast:
+    """Tests for broadcast subscribers (EventBus.poll)"""
+
+    async def test_every_process_gets_broadcast_events_once(self, db_session, session_factory):
+        buses = [EventBus(), EventBus()]
+        received = [[], []]
+        for bus, log in zip(buses, received):
+            bus.subscribe("user:changed", lambda event, log=log: _append(log, event.payload["id"]), broadcast=True)
+
+        await publish(db_session, "user:changed", {"id": 1})
+        await db_session.commit()
+        for bus in buses:
+            assert await bus.poll(session_factory=session_factory) == 0  # старт: история не повторяется
+
+        await publish(db_session, "user:changed", {"id": 2})
+        await db_session.commit()
+        for bus in buses:
+            assert await bus.poll(session_factory=session_factory) == 1
+            assert await bus.poll(session_factory=session_factory) == 0
+
+        assert received == [[2], [2]]
+        # drain (одна очередь на все воркеры) не мешает broadcast-рассылке
+        assert await buses[0].drain(session_factory=session_factory) == 2
+
+    async def test_late_commit_with_lower_id_is_delivered(self, db_session, session_factory):
+        bus = EventBus()
+        received = []
+        bus.subscribe("user:changed", lambda event: _append(received, event.id), broadcast=True)
+        await bus.poll(session_factory=session_factory)
+
+        db_session.add(OutboxEventModel(id=10, event_type="user:changed", payload='{"id": 1}'))
+        await db_session.commit()
+        await bus.poll(session_factory=session_factory)
+        # Транзакция, получившая id раньше, закоммичена позже
+        db_session.add(OutboxEventModel(id=5, event_type="user:changed", payload='{"id": 1}'))
+        await db_session.commit()
+        await bus.poll(session_factory=session_factory)
+
+        assert received == [10, 5]
+
+    async def test_user_changed_invalidates_cache(self, db_session, session_factory):
+        bus = EventBus()
+        register_user_subscribers(bus)
+        await bus.poll(session_factory=session_factory)
+        user_cache.set(7, CurrentUser(7, "a@example.com", "customer", True, False, None, None))
+
+        await publish(db_session, "user:changed", {"id": 7})
+        await db_session.commit()
+        await bus.poll(session_factory=session_factory)
+
+        assert user_cache.get(7) is None
+
+
+class TestEmails:
+    """Tests for order notification emails"""
+
+    async def test_order_events_send_emails(self, db_session, session_factory, monkeypatch):
+        sent = []
+
+        async def send_email(to, subject, body):
+            sent.append((to, subject))
+
+        monkeypatch.setattr(emails, "send_email", send_email)
+        bus = EventBus()
+        emails.register_email_subscribers(bus, session_factory)
+
+        user = UserModel(email="buyer@example.com", password_hash="hash", role="customer")
+        db_session.add(user)
+        await db_session.commit()
+        order = OrderModel(
+            order_number="ORD-2024-000001", user_id=user.id, status="pending", subtotal=100, total=100,
+            recipient_name="Test", phone="+79001234567", city="Moscow",
+            street="Street", building="1", postal_code="123456"
+        )
+        db_session.add(order)
+        await db_session.commit()
+        await publish(db_session, "order:created", {"id": order.id})
+        await change_status(db_session, [order.id], "cancelled")
+        await db_session.commit()
+
+        assert await bus.drain(session_factory=session_factory) == 3
+        assert sent == [
+            ("buyer@example.com", "Заказ ORD-2024-000001 оформлен"),
+            ("buyer@example.com", "Заказ ORD-2024-000001 отменён"),
+        ]
+
+
+async def _append(log, value):
+    log.append(value)
@@ -0,0 +1,80 @@
+"""Tests for Idempotency-Key handling"""
+import asyncio
+import pytest
+from fastapi import HTTPException, Response
+
+from core.idempotency import run_idempotent, REPLAYED_HEADER
+from core.models import UserModel
+
+
+async def _user(session):
+    user = UserModel(email="retry@example.com", password_hash="hash", role="customer")
+    session.add(user)
+    await session.commit()
+    return user.id
+
+
+class TestIdempotency:
+    """Tests for run_idempotent"""
+
+    async def test_replay_returns_stored_response(self, db_session):
+        user_id = await _user(db_session)
+        calls = []
+
+        async def handler():
+            calls.append(1)
+            return {"order_id": len(calls)}
+
+        first = await run_idempotent(db_session, Response(), user_id, "key-1", "cart:checkout", {"a": 1}, handler)
+        await db_session.commit()
+
+        response = Response()
+        second = await run_idempotent(db_session, response, user_id, "key-1", "cart:checkout", {"a": 1}, handler)
+
+        assert first == second == {"order_id": 1}
+        assert len(calls) == 1
+        assert response.headers[REPLAYED_HEADER] == "true"
+
+    async def test_key_reused_with_different_payload(self, db_session):
+        user_id = await _user(db_session)
+
+        async def handler():
+            return {"ok": True}
+
+        await run_idempotent(db_session, Response(), user_id, "key-2", "orders:create", {"a": 1}, handler)
+        await db_session.commit()
+
+        with pytest.raises(HTTPException) as exc:
+            await run_idempotent(db_session, Response(), user_id, "key-2", "orders:create", {"a": 2}, handler)
+        assert exc.value.status_code == 422
+
+    async def test_without_key_always_executes(self, db_session):
+        calls = []
+
+        async def handler():
+            calls.append(1)
+            return {}
+
+        await run_idempotent(db_session, Response(), 1, None, "cart:checkout", {}, handler)
+        await run_idempotent(db_session, Response(), 1, None, "cart:checkout", {}, handler)
+        assert len(calls) == 2
+
+    async def test_concurrent_duplicates_wait_for_in_flight_request(self, db_session, session_factory):
+        user_id = await _user(db_session)
+        calls = []
+
+        async def handler():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"order_id": 42}
+
+        async def request():
+            async with session_factory() as session:
+                result = await run_idempotent(session, Response(), user_id, "key-3", "cart:checkout", {}, handler)
+                await session.commit()
+                return result
+
+        results = await asyncio.gather(request(), request(), request())
+
+        assert results == [{"order_id": 42}] * 3
+        assert len(calls) == 1
@@ -0,0 +1,30 @@
+"""Regression tests for the app import time"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.import_profile import import_seconds, profile_imports
+
+# Бюджет на импорт core.app (без старта интерпретатора); переопределяется переменной окружения
+IMPORT_TIME_BUDGET_SECONDS = float(os.environ.get("IMPORT_TIME_BUDGET_SECONDS", "3.0"))
+
+# Загружаются при первом использовании, а не при импорте приложения
+LAZY_MODULES = ("jose.jwt", "passlib.context", "cryptography")
+
+
+@pytest.mark.slow
+class TestImportTime:
+    """Tests for core.app import cost"""
+
+    def test_heavy_dependencies_are_lazy(self):
+        code = f"import sys, core.app; print([m for m in {LAZY_MODULES!r} if m in sys.modules])"
+        output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+
+        assert output.strip().splitlines()[-1] == "[]"
+
+    def test_import_within_budget(self):
+        seconds = import_seconds(profile_imports("core.app"))
+
+        assert seconds < IMPORT_TIME_BUDGET_SECONDS
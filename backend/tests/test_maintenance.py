@@ -0,0 +1,80 @@
+"""Tests for background cleanup jobs"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, func
+
+from core.jobs import PeriodicJob
+from core.maintenance import purge_in_batches, purge_abandoned_carts, purge_expired_refresh_tokens
+from core.models import UserModel, RefreshTokenModel, CartModel, CartItemModel
+
+
+async def _add_user(session):
+    user = UserModel(email="sweeper@example.com", password_hash="hash", role="customer")
+    session.add(user)
+    await session.commit()
+    return user
+
+
+class TestSweeper:
+    """Tests for batched purge"""
+
+    async def test_purge_in_batches_deletes_all_matching_rows(self, db_session, session_factory):
+        user = await _add_user(db_session)
+        now = datetime.now(timezone.utc)
+        db_session.add_all([
+            RefreshTokenModel(token_id=f"expired-{i}", user_id=user.id, expires_at=now - timedelta(days=1))
+            for i in range(5)
+        ] + [
+            RefreshTokenModel(token_id="active", user_id=user.id, expires_at=now + timedelta(days=1))
+        ])
+        await db_session.commit()
+
+        deleted = await purge_in_batches(
+            RefreshTokenModel,
+            RefreshTokenModel.expires_at < now,
+            batch_size=2,
+            pause=0,
+            session_factory=session_factory,
+        )
+
+        assert deleted == 5
+        remaining = (await db_session.execute(select(RefreshTokenModel.token_id))).scalars().all()
+        assert remaining == ["active"]
+
+    async def test_expired_refresh_tokens_job(self, db_session, session_factory):
+        user = await _add_user(db_session)
+        now = datetime.now(timezone.utc)
+        db_session.add(RefreshTokenModel(token_id="old", user_id=user.id, expires_at=now - timedelta(hours=1)))
+        await db_session.commit()
+
+        assert await purge_expired_refresh_tokens(pause=0, session_factory=session_factory) == 1
+
+    async def test_purge_abandoned_carts_removes_items(self, db_session, session_factory):
+        old = datetime.now(timezone.utc) - timedelta(days=365)
+        stale = CartModel(user_id=None, updated_at=old)
+        fresh = CartModel(user_id=None)
+        db_session.add_all([stale, fresh])
+        await db_session.flush()
+        db_session.add_all([
+            CartItemModel(cart_id=stale.id, product_id=1, quantity=1, unit_price=100),
+            CartItemModel(cart_id=fresh.id, product_id=1, quantity=1, unit_price=100),
+        ])
+        await db_session.commit()
+
+        deleted = await purge_abandoned_carts(pause=0, session_factory=session_factory)
+
+        assert deleted == 2  # 1 item + 1 cart
+        assert (await db_session.execute(select(func.count()).select_from(CartModel))).scalar() == 1
+        assert (await db_session.execute(select(func.count()).select_from(CartItemModel))).scalar() == 1
+
+    async def test_job_metrics(self):
+        async def work():
+            return 3
+
+        job = PeriodicJob("test", work, interval=60)
+        await job.run_once()
+        await job.run_once()
+
+        assert job.metrics.runs == 2
+        assert job.metrics.rows_processed == 6
+        assert job.metrics.failures == 0
@@ -0,0 +1,73 @@
+"""Tests for request metrics and the /metrics endpoint"""
+import pytest
+
+from core.metrics import RequestMetrics, request_metrics
+
+TOKEN = {"Authorization": "Bearer metrics-secret"}
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr("core.dependencies.settings.METRICS_TOKEN", "metrics-secret")
+
+
+class TestRequestMetrics:
+    """Tests for RequestMetrics"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics = RequestMetrics(buckets=(0.1, 1.0))
+        metrics.observe("GET", "/items", 200, 0.05)
+        metrics.observe("GET", "/items", 200, 0.5)
+        metrics.observe("GET", "/items", 500, 3.0)
+
+        histogram, responses, in_flight = metrics.collect()
+        buckets = {sample[0]["le"]: sample[1] for sample in histogram[3] if sample[2] == "_bucket"}
+        assert buckets == {"0.1": 1, "1.0": 2, "+Inf": 3}
+        assert [s[1] for s in histogram[3] if s[2] == "_count"] == [3]
+        assert {s[0]["status"]: s[1] for s in responses[3]} == {200: 2, 500: 1}
+        assert in_flight[3] == [({}, 0)]
+
+
+class TestMetricsEndpoint:
+    """Tests for /metrics"""
+
+    async def test_requires_token(self, client, monkeypatch):
+        monkeypatch.setattr("core.dependencies.settings.METRICS_TOKEN", None)
+        assert (await client.get("/metrics", headers=TOKEN)).status_code == 404
+
+        monkeypatch.setattr("core.dependencies.settings.METRICS_TOKEN", "metrics-secret")
+        assert (await client.get("/metrics")).status_code == 401
+        assert (await client.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
+        assert (await client.get("/metrics", headers=TOKEN)).status_code == 200
+
+    async def test_labels_by_route_template(self, client, metrics_token):
+        request_metrics.clear()
+        await client.get("/api/products/12345")
+        await client.get("/api/products/67890")
+        await client.get("/no/such/path")
+
+        response = await client.get("/metrics", headers=TOKEN)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'http_request_duration_seconds_count{method="GET",route="/api/products/{product_id}"} 2.0' in body
+        assert 'http_responses_total{method="GET",route="/api/products/{product_id}",status="404"} 2.0' in body
+        assert 'route="unmatched"' in body
+        assert "/api/products/12345" not in body
+
+    async def test_exposes_pool_and_cache_stats(self, client, metrics_token):
+        body = (await client.get("/metrics", headers=TOKEN)).text
+
+        assert 'db_pool_checkouts_total{pool="primary"}' in body
+        assert 'cache_hits_total{cache="token"}' in body
+        assert "# TYPE cache_size gauge" in body
+        assert 'rate_limit_rejected_total{method="POST",route="/api/auth/login",key="ip"}' in body
+        assert "# TYPE http_request_duration_seconds histogram" in body
+
+    async def test_counters_have_total_suffix(self, client, metrics_token):
+        body = (await client.get("/metrics", headers=TOKEN)).text
+
+        counters = [line.split()[2] for line in body.splitlines() if line.startswith("# TYPE") and line.endswith(" counter")]
+        assert counters
+        assert all(name.endswith("_total") for name in counters)
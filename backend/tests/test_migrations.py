@@ -0,0 +1,87 @@
+"""Tests for Alembic migrations"""
+import asyncio
+import os
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+
+from core.models import Base
+from database.migrate import BACKEND_DIR, BASELINE_REVISION, alembic_config, migrate
+
+# Пустая PostgreSQL база для проверки init.sql (схема public пересоздаётся)
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+class TestMigrations:
+    """Tests for database.migrate"""
+
+    async def test_migrations_match_models(self, tmp_path):
+        path = tmp_path / "migrated.db"
+
+        # migrate() сам запускает event loop (CLI) - выполняем в отдельном потоке
+        await asyncio.to_thread(migrate, f"sqlite+aiosqlite:///{path}")
+
+        engine = create_engine(f"sqlite:///{path}")
+        with engine.connect() as conn:
+            diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+        engine.dispose()
+        assert diff == []
+
+    async def test_existing_schema_is_stamped_and_upgraded(self, tmp_path):
+        path = tmp_path / "legacy.db"
+        url = f"sqlite+aiosqlite:///{path}"
+        # База, созданная create_all до перехода на миграции: исходная схема без alembic_version
+        await asyncio.to_thread(migrate, url, BASELINE_REVISION)
+        engine = create_engine(f"sqlite:///{path}")
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE alembic_version"))
+            conn.execute(text("INSERT INTO users (id, email, password_hash, role) VALUES (1, 'a@example.com', 'x', 'customer')"))
+            conn.execute(text(
+                "INSERT INTO orders (id, order_number, user_id, status, subtotal, shipping_cost, discount, tax, total,"
+                " recipient_name, phone, city, street, building, postal_code)"
+                " VALUES (1, 'ORD-2024-000001', 1, 'pending', 300, 0, 0, 0, 300, 'A', '1', 'C', 'S', '1', '1')"
+            ))
+            conn.execute(text(
+                "INSERT INTO order_items (order_id, product_name, quantity, unit_price, subtotal)"
+                " VALUES (1, 'A', 1, 100, 100), (1, 'B', 2, 100, 200)"
+            ))
+
+        await asyncio.to_thread(migrate, url)
+
+        with engine.connect() as conn:
+            assert conn.scalar(text("SELECT version_num FROM alembic_version")) == ScriptDirectory.from_config(alembic_config()).get_current_head()
+            assert conn.scalar(text("SELECT items_count FROM orders WHERE id = 1")) == 2
+            diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+        engine.dispose()
+        assert diff == []
+
+    @pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+    async def test_init_sql_database_is_stamped_and_upgraded(self):
+        import asyncpg
+
+        dsn = TEST_POSTGRES_URL.replace("postgresql+asyncpg://", "postgresql://")
+        conn = await asyncpg.connect(dsn)
+        try:
+            await conn.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+            # Как docker-entrypoint-initdb.d в старом docker-compose
+            await conn.execute((BACKEND_DIR / "database" / "init.sql").read_text())
+        finally:
+            await conn.close()
+
+        await asyncio.to_thread(migrate, TEST_POSTGRES_URL)
+
+        conn = await asyncpg.connect(dsn)
+        try:
+            head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+            assert await conn.fetchval("SELECT version_num FROM alembic_version") == head
+            indexes = {row["indexname"] for row in await conn.fetch("SELECT indexname FROM pg_indexes WHERE tablename = 'orders'")}
+            assert "ix_orders_user_history" in indexes
+            assert "idx_orders_user_id" not in indexes
+            tables = {row["tablename"] for row in await conn.fetch("SELECT tablename FROM pg_tables WHERE schemaname = 'public'")}
+            assert {"orders_archive", "idempotency_keys", "sales_rollups", "outbox_events"} <= tables
+            assert await conn.fetchval("SELECT COUNT(*) FROM users WHERE has_archived_orders") == 0
+        finally:
+            await conn.close()
@@ -0,0 +1,139 @@
+"""Tests for archiving old orders"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, func
+
+from core.models import (
+    OutboxEventModel,
+    UserModel,
+    OrderModel,
+    OrderItemModel,
+    OrderStatusHistoryModel,
+    ProductModel,
+    orders_archive,
+    order_items_archive,
+)
+from modules.orders.application.archive import archive_orders, archive_horizon, get_archived_order
+from modules.orders.application import queries
+from modules.orders.application.queries import list_user_orders
+
+NOW = datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def _order(session, number, status, created_at, product_id):
+    order = OrderModel(
+        order_number=number,
+        user_id=1,
+        status=status,
+        subtotal=1000,
+        total=1000,
+        items_count=1,
+        created_at=created_at,
+        recipient_name="Test",
+        phone="+79001234567",
+        city="Moscow",
+        street="Street",
+        building="1",
+        postal_code="123456"
+    )
+    session.add(order)
+    await session.flush()
+    session.add_all([
+        OrderItemModel(
+            order_id=order.id, product_id=product_id, product_name="Phone",
+            quantity=1, unit_price=1000, subtotal=1000
+        ),
+        OrderStatusHistoryModel(order_id=order.id, status=status),
+    ])
+    await session.commit()
+    return order.id
+
+
+class TestOrderArchive:
+    """Tests for archive_orders and reads across the archive"""
+
+    async def _seed(self, session):
+        product = ProductModel(name="Phone", slug="phone", price=1000, stock=10)
+        session.add(product)
+        await session.flush()
+        old = NOW - timedelta(days=800)
+        return {
+            "old_delivered": await _order(session, "ORD-1", "delivered", old, product.id),
+            "old_pending": await _order(session, "ORD-2", "pending", old + timedelta(hours=1), product.id),
+            "old_cancelled": await _order(session, "ORD-3", "cancelled", old + timedelta(hours=2), product.id),
+            "recent_delivered": await _order(session, "ORD-4", "delivered", NOW - timedelta(days=1), product.id),
+        }
+
+    async def test_moves_only_old_final_orders(self, db_session, session_factory):
+        ids = await self._seed(db_session)
+
+        moved = await archive_orders(batch_size=1, pause=0, session_factory=session_factory)
+
+        assert moved == 2
+        hot = set((await db_session.scalars(select(OrderModel.id))).all())
+        assert hot == {ids["old_pending"], ids["recent_delivered"]}
+        archived = set((await db_session.scalars(select(orders_archive.c.id))).all())
+        assert archived == {ids["old_delivered"], ids["old_cancelled"]}
+        assert await db_session.scalar(select(func.count()).select_from(order_items_archive)) == 2
+        assert await db_session.scalar(
+            select(func.count()).select_from(OrderItemModel).where(OrderItemModel.order_id == ids["old_delivered"])
+        ) == 0
+
+    async def test_get_archived_order(self, db_session, session_factory):
+        ids = await self._seed(db_session)
+        await archive_orders(pause=0, session_factory=session_factory)
+
+        order, items, history = await get_archived_order(db_session, ids["old_delivered"], user_id=1)
+
+        assert order.order_number == "ORD-1"
+        assert [i.product_name for i in items] == ["Phone"]
+        assert [h.status for h in history] == ["delivered"]
+        assert await get_archived_order(db_session, ids["old_delivered"], user_id=2) is None
+
+    async def test_history_reads_across_archive(self, db_session, session_factory):
+        ids = await self._seed(db_session)
+        await archive_orders(pause=0, session_factory=session_factory)
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = await list_user_orders(db_session, 1, cursor=cursor, page_size=1)
+            seen.extend(row.id for row in rows)
+            if cursor is None:
+                break
+
+        assert seen == [ids["recent_delivered"], ids["old_cancelled"], ids["old_pending"], ids["old_delivered"]]
+
+    async def test_flags_owners_and_skips_archive_without_flag(self, db_session, session_factory, test_helper, monkeypatch):
+        user = await test_helper.create_user(db_session)
+        await self._seed(db_session)
+        assert user.id == 1 and not user.has_archived_orders
+
+        await archive_orders(pause=0, session_factory=session_factory)
+
+        assert await db_session.scalar(select(UserModel.has_archived_orders).where(UserModel.id == 1))
+        events = (await db_session.scalars(select(OutboxEventModel.event_type))).all()
+        assert events == ["user:changed"]
+
+        # Повторный перенос не публикует событие заново
+        await archive_orders(pause=0, session_factory=session_factory)
+        assert await db_session.scalar(select(func.count()).select_from(OutboxEventModel)) == 1
+
+        calls = []
+        list_archived = queries.list_archived_user_orders
+
+        async def spy(*args):
+            calls.append(args)
+            return await list_archived(*args)
+
+        monkeypatch.setattr(queries, "list_archived_user_orders", spy)
+
+        rows, _ = await list_user_orders(db_session, 1, page_size=20, has_archive=False)
+        assert len(rows) == 2 and calls == []
+
+        rows, _ = await list_user_orders(db_session, 1, page_size=20, has_archive=True)
+        assert len(rows) == 4 and len(calls) == 1
+
+    def test_horizon_is_month_aligned(self):
+        now = datetime(2025, 3, 15, 10, 30, tzinfo=timezone.utc)
+        assert archive_horizon(now, months=12) == datetime(2024, 3, 1, tzinfo=timezone.utc)
+        assert archive_horizon(now, months=3) == datetime(2024, 12, 1, tzinfo=timezone.utc)
@@ -0,0 +1,88 @@
+"""Tests for order detail loading"""
+import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
+
+from core.models import OrderModel, OrderItemModel, OrderStatusHistoryModel
+from modules.orders.application.queries import get_order_with_details, list_orders_with_details
+
+
+@contextmanager
+def count_queries(session):
+    """Count SQL statements executed through the session's engine"""
+    statements = []
+    engine = session.bind.sync_engine
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def _orders_with_details(session, count):
+    orders = []
+    for n in range(count):
+        order = OrderModel(
+            order_number=f"ORD-2024-{n:06d}",
+            user_id=1,
+            status="pending",
+            subtotal=3000,
+            total=3000,
+            items_count=3,
+            recipient_name="Test",
+            phone="+79001234567",
+            city="Moscow",
+            street="Street",
+            building="1",
+            postal_code="123456",
+            items=[
+                OrderItemModel(product_id=i, product_name=f"P{i}", quantity=1, unit_price=1000, subtotal=1000)
+                for i in range(3)
+            ],
+            status_history=[
+                OrderStatusHistoryModel(status="pending"),
+                OrderStatusHistoryModel(status="confirmed"),
+            ]
+        )
+        orders.append(order)
+    session.add_all(orders)
+    await session.commit()
+    session.expunge_all()
+    return orders
+
+
+class TestOrderDetail:
+    """Order details load in a fixed number of queries"""
+
+    async def test_single_order_three_queries(self, db_session):
+        orders = await _orders_with_details(db_session, 1)
+
+        with count_queries(db_session) as statements:
+            order = await get_order_with_details(db_session, orders[0].id, user_id=1)
+            items = [(i.product_name, i.quantity) for i in order.items]
+            history = [h.status for h in order.status_history]
+
+        assert len(statements) == 3
+        assert items == [("P0", 1), ("P1", 1), ("P2", 1)]
+        assert history == ["pending", "confirmed"]
+
+    async def test_other_user_order_not_found(self, db_session):
+        orders = await _orders_with_details(db_session, 1)
+
+        assert await get_order_with_details(db_session, orders[0].id, user_id=2) is None
+
+    async def test_admin_list_batches_across_orders(self, db_session):
+        await _orders_with_details(db_session, 10)
+
+        with count_queries(db_session) as statements:
+            orders, cursor = await list_orders_with_details(db_session, page_size=5)
+            loaded = sum(len(o.items) + len(o.status_history) for o in orders)
+
+        assert len(orders) == 5
+        assert cursor is not None
+        assert loaded == 5 * (3 + 2)
+        assert len(statements) == 3
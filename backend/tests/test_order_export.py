@@ -0,0 +1,69 @@
+"""Tests for streaming CSV export"""
+import csv
+import gzip
+import io
+from datetime import datetime, timedelta
+
+from core.models import OrderModel, OrderItemModel
+from modules.orders.application.archive import archive_orders
+from modules.orders.application.export import iter_orders_csv, gzip_stream, CSV_HEADER
+
+START = datetime(2024, 1, 1)
+
+
+async def _order(session, number, status, created_at, *items):
+    order = OrderModel(
+        order_number=number, user_id=1, status=status,
+        subtotal=sum(q * p for q, p in items), total=sum(q * p for q, p in items),
+        created_at=created_at, recipient_name="Test", phone="+79001234567",
+        city="Moscow", street="Street", building="1", postal_code="123456"
+    )
+    session.add(order)
+    await session.flush()
+    session.add_all([
+        OrderItemModel(
+            order_id=order.id, product_id=i + 1, product_name=f"Product {i + 1}",
+            quantity=q, unit_price=p, subtotal=q * p
+        )
+        for i, (q, p) in enumerate(items)
+    ])
+    await session.commit()
+
+
+async def _collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+class TestOrderExport:
+    """Tests for iter_orders_csv"""
+
+    async def test_streams_hot_and_archived_orders(self, db_session, session_factory):
+        await _order(db_session, "ORD-1", "delivered", START + timedelta(days=1), (2, 1050), (1, 99))
+        await _order(db_session, "ORD-2", "pending", START + timedelta(days=2), (1, 500))
+        await _order(db_session, "ORD-3", "pending", START + timedelta(days=40), (1, 500))
+        await archive_orders(pause=0, session_factory=session_factory)
+
+        body = await _collect(iter_orders_csv(
+            START, START + timedelta(days=31), chunk_rows=1, session_factory=session_factory
+        ))
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+
+        assert [(r["order_number"], r["product_name"]) for r in rows] == [
+            ("ORD-1", "Product 1"), ("ORD-1", "Product 2"), ("ORD-2", "Product 1")
+        ]
+        assert rows[0]["unit_price"] == "10.50"
+        assert rows[0]["item_subtotal"] == "21.00"
+        assert rows[0]["order_total"] == "21.99"
+
+    async def test_empty_range_has_header(self, db_session, session_factory):
+        body = await _collect(iter_orders_csv(START, START + timedelta(days=1), session_factory=session_factory))
+        assert body.decode().strip() == ",".join(CSV_HEADER)
+
+    async def test_gzip_stream(self, db_session, session_factory):
+        await _order(db_session, "ORD-1", "pending", START, (1, 100))
+
+        compressed = await _collect(gzip_stream(iter_orders_csv(
+            START, START + timedelta(days=1), session_factory=session_factory
+        )))
+
+        assert "ORD-1" in gzip.decompress(compressed).decode()
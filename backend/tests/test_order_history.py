@@ -0,0 +1,67 @@
+"""Tests for order history keyset pagination"""
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+
+from core.models import OrderModel
+from modules.orders.application.queries import list_user_orders, encode_cursor, decode_cursor
+
+BASE_TIME = datetime(2024, 5, 1, 12, 0, 0)
+
+
+async def _orders(session, user_id, statuses):
+    orders = [
+        OrderModel(
+            order_number=f"ORD-2024-{user_id:02d}{i:04d}",
+            user_id=user_id,
+            status=status,
+            subtotal=1000,
+            total=1000,
+            items_count=i + 1,
+            created_at=BASE_TIME + timedelta(hours=i),
+            recipient_name="Test",
+            phone="+79001234567",
+            city="Moscow",
+            street="Street",
+            building="1",
+            postal_code="123456"
+        )
+        for i, status in enumerate(statuses)
+    ]
+    session.add_all(orders)
+    await session.commit()
+    return orders
+
+
+class TestOrderHistory:
+    """Tests for list_user_orders"""
+
+    async def test_pages_follow_newest_first(self, db_session):
+        await _orders(db_session, 1, ["pending", "delivered", "pending", "shipped", "delivered"])
+        await _orders(db_session, 2, ["pending"])
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = await list_user_orders(db_session, 1, cursor=cursor, page_size=2)
+            seen.extend(row.items_count for row in rows)
+            if cursor is None:
+                break
+
+        assert seen == [5, 4, 3, 2, 1]
+
+    async def test_status_filter(self, db_session):
+        await _orders(db_session, 1, ["pending", "delivered", "pending", "delivered"])
+
+        first, cursor = await list_user_orders(db_session, 1, status="delivered", page_size=1)
+        second, last = await list_user_orders(db_session, 1, status="delivered", cursor=cursor, page_size=1)
+
+        assert [r.items_count for r in first + second] == [4, 2]
+        assert last is None
+
+    def test_cursor_roundtrip(self):
+        assert decode_cursor(encode_cursor(BASE_TIME, 42)) == (BASE_TIME, 42)
+
+    def test_invalid_cursor(self):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor("not-a-cursor")
+        assert exc.value.status_code == 400
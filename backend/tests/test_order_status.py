@@ -0,0 +1,92 @@
+"""Tests for order status transitions"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from core.models import OrderModel, OrderItemModel, OrderStatusHistoryModel, ProductModel
+from modules.orders.application.status import change_status, can_transition, USER_CANCELLABLE
+
+
+async def _orders(session, *statuses):
+    orders = [
+        OrderModel(
+            order_number=f"ORD-2024-{i:06d}",
+            user_id=1,
+            status=status,
+            subtotal=1000,
+            total=1000,
+            recipient_name="Test",
+            phone="+79001234567",
+            city="Moscow",
+            street="Street",
+            building="1",
+            postal_code="123456"
+        )
+        for i, status in enumerate(statuses)
+    ]
+    session.add_all(orders)
+    await session.commit()
+    return [order.id for order in orders]
+
+
+async def _statuses(session):
+    return dict((await session.execute(select(OrderModel.id, OrderModel.status))).all())
+
+
+class TestOrderStatus:
+    """Tests for change_status"""
+
+    def test_transitions(self):
+        assert can_transition("pending", "confirmed")
+        assert can_transition("processing", "shipped")
+        assert not can_transition("pending", "shipped")
+        assert not can_transition("cancelled", "pending")
+
+    async def test_bulk_update_applies_valid_transitions(self, db_session):
+        processing, pending, shipped = await _orders(db_session, "processing", "pending", "processing")
+
+        result = await change_status(db_session, [processing, pending, shipped, 999], "shipped", "batch 42")
+        await db_session.commit()
+
+        assert result.updated == [processing, shipped]
+        assert set(result.rejected) == {pending, 999}
+        assert await _statuses(db_session) == {processing: "shipped", pending: "pending", shipped: "shipped"}
+        history = (await db_session.execute(
+            select(OrderStatusHistoryModel.order_id, OrderStatusHistoryModel.comment)
+        )).all()
+        assert sorted(history) == [(processing, "batch 42"), (shipped, "batch 42")]
+
+    async def test_unknown_status(self, db_session):
+        with pytest.raises(HTTPException) as exc:
+            await change_status(db_session, [1], "lost")
+        assert exc.value.status_code == 422
+
+    async def test_cancel_restocks_products(self, db_session, test_helper):
+        phone = await test_helper.create_product(db_session, name="Phone", slug="phone", stock=1)
+        phone_id = phone.id
+        order_id, = await _orders(db_session, "confirmed")
+        db_session.add(OrderItemModel(
+            order_id=order_id, product_id=phone_id, product_name="Phone",
+            quantity=3, unit_price=1000, subtotal=3000
+        ))
+        await db_session.commit()
+
+        result = await change_status(
+            db_session, [order_id], "cancelled", user_id=1, allowed_from=USER_CANCELLABLE
+        )
+        await db_session.commit()
+
+        assert result.updated == [order_id]
+        assert await db_session.scalar(select(ProductModel.stock).where(ProductModel.id == phone_id)) == 4
+
+    async def test_cancel_respects_owner_and_allowed_statuses(self, db_session):
+        processing, = await _orders(db_session, "processing")
+
+        not_owner = await change_status(db_session, [processing], "cancelled", user_id=2)
+        too_late = await change_status(
+            db_session, [processing], "cancelled", user_id=1, allowed_from=USER_CANCELLABLE
+        )
+
+        assert not_owner.rejected == {processing: "Order not found"}
+        assert processing in too_late.rejected
+        assert await _statuses(db_session) == {processing: "processing"}
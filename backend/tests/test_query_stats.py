@@ -0,0 +1,82 @@
+"""Tests for per-request SQL instrumentation"""
+import logging
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from core import database
+from core.database import QueryStats, query_stats, statement_shape
+from core.metrics import QueryStatsMiddleware
+from core.models import UserModel
+from tests.conftest import TestSessionLocal
+
+
+def _app(queries: int) -> QueryStatsMiddleware:
+    app = FastAPI()
+
+    @app.get("/users/{user_id}")
+    async def users(user_id: int) -> dict:
+        async with TestSessionLocal() as session:
+            for index in range(queries):
+                await session.execute(select(UserModel).where(UserModel.id == index))
+        return {"count": query_stats.get().count}
+
+    return QueryStatsMiddleware(app, server_timing=True, n_plus_one_threshold=3)
+
+
+async def _get(app, path: str):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(path)
+
+
+class TestStatementShape:
+    """Tests for statement_shape"""
+
+    def test_placeholder_lists_collapse(self):
+        assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?) AND x = ?") == \
+            statement_shape("SELECT * FROM t WHERE id IN (?) AND x = ?")
+        assert statement_shape("SELECT * FROM t WHERE id IN ($1, $2) AND x = $3") == \
+            "SELECT * FROM t WHERE id IN (?) AND x = ?"
+
+    def test_repeated_shapes(self):
+        stats = QueryStats()
+        for _ in range(3):
+            stats.record("SELECT * FROM t WHERE id = ?", 0.001)
+        stats.record("SELECT 1", 0.001)
+
+        assert stats.count == 4
+        assert stats.repeated(3) == {"SELECT * FROM t WHERE id = ?": 3}
+
+
+class TestQueryStatsMiddleware:
+    """Tests for QueryStatsMiddleware"""
+
+    async def test_counts_queries_and_sets_server_timing(self, db_session, caplog):
+        with caplog.at_level(logging.WARNING, logger="core.metrics"):
+            response = await _get(_app(2), "/users/1")
+
+        assert response.json() == {"count": 2}
+        assert response.headers["server-timing"].startswith("db;dur=")
+        assert 'desc="2 queries"' in response.headers["server-timing"]
+        assert "Possible N+1" not in caplog.text
+
+    async def test_logs_repeated_statements(self, db_session, caplog):
+        with caplog.at_level(logging.WARNING, logger="core.metrics"):
+            await _get(_app(4), "/users/1")
+
+        assert "Possible N+1 in GET /users/{user_id}: 4 x SELECT" in caplog.text
+
+    async def test_outside_request_is_not_tracked(self, db_session):
+        await db_session.execute(select(UserModel))
+
+        assert query_stats.get() is None
+
+    async def test_logs_slow_queries_with_parameters(self, db_session, monkeypatch, caplog):
+        monkeypatch.setattr(database.settings, "SLOW_QUERY_SECONDS", 0.0)
+
+        with caplog.at_level(logging.WARNING, logger="core.database"):
+            await db_session.execute(select(UserModel).where(UserModel.email == "slow@example.com"))
+
+        assert "Slow query" in caplog.text
+        assert "slow@example.com" in caplog.text
@@ -0,0 +1,92 @@
+"""Tests for the token bucket rate limiter"""
+import json
+
+from core.rate_limit import MAX_KEY_BODY_BYTES, TokenBucketLimiter, rate_limit_policies
+
+CREDENTIALS = {"email": "user@example.com", "password": "secret-password"}
+
+
+class TestTokenBucketLimiter:
+    """Tests for TokenBucketLimiter"""
+
+    def test_burst_then_refill(self):
+        now = [0.0]
+        limiter = TokenBucketLimiter(rate=1, burst=2, clock=lambda: now[0])
+
+        assert limiter.acquire("a") == 0
+        assert limiter.acquire("a") == 0
+        assert limiter.acquire("a") == 1.0
+        assert limiter.acquire("b") == 0
+
+        now[0] = 1.0
+        assert limiter.acquire("a") == 0
+        assert limiter.rejected == 1
+
+    def test_idle_and_excess_keys_evicted(self):
+        now = [0.0]
+        limiter = TokenBucketLimiter(rate=1, burst=2, max_keys=4, shards=1, clock=lambda: now[0])
+        for i in range(10):
+            limiter.acquire(f"key-{i}")
+        assert len(limiter) == 4
+
+        now[0] = 5.0
+        limiter.acquire("fresh")
+        assert len(limiter) == 1
+
+
+class TestRateLimitMiddleware:
+    """Tests for RateLimitMiddleware"""
+
+    async def test_login_limited_per_account_before_hashing(self, client, db_session, monkeypatch):
+        limit = rate_limit_policies[("POST", "/api/auth/login")][1].limiter.burst
+        calls = []
+
+        async def verify_password(password, password_hash):
+            calls.append(password)
+            return False, None
+
+        monkeypatch.setattr("modules.users.presentation.api.routes.verify_password", verify_password)
+
+        statuses = [(await client.post("/api/auth/login", json=CREDENTIALS)).status_code for _ in range(limit + 1)]
+
+        assert statuses == [401] * limit + [429]
+        assert len(calls) == limit
+
+        rejected = await client.post("/api/auth/login", json=CREDENTIALS)
+        assert int(rejected.headers["Retry-After"]) >= 1
+        other = await client.post("/api/auth/login", json={**CREDENTIALS, "email": "other@example.com"})
+        assert other.status_code == 401
+
+    async def test_chunked_body_is_limited_per_account(self, client, db_session):
+        limit = rate_limit_policies[("POST", "/api/auth/login")][1].limiter.burst
+        body = json.dumps(CREDENTIALS).encode()
+
+        async def chunked(data: bytes):
+            # Без Content-Length: httpx отправит Transfer-Encoding: chunked
+            for start in range(0, len(data), 8):
+                yield data[start:start + 8]
+
+        statuses = []
+        for _ in range(limit + 1):
+            response = await client.post(
+                "/api/auth/login", content=chunked(body), headers={"content-type": "application/json"}
+            )
+            statuses.append(response.status_code)
+
+        assert statuses == [401] * limit + [429]
+
+    async def test_oversized_body_is_rejected(self, client, db_session):
+        body = json.dumps({**CREDENTIALS, "padding": "x" * MAX_KEY_BODY_BYTES}).encode()
+
+        async def chunked():
+            yield body
+
+        sized = await client.post("/api/auth/login", content=body, headers={"content-type": "application/json"})
+        streamed = await client.post("/api/auth/login", content=chunked(), headers={"content-type": "application/json"})
+
+        assert sized.status_code == streamed.status_code == 413
+
+    async def test_unlimited_routes_pass_through(self, client, db_session):
+        for _ in range(30):
+            response = await client.get("/health")
+            assert response.status_code == 200
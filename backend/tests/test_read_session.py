@@ -0,0 +1,57 @@
+"""Tests for the read-only session used by catalog routes"""
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.database import ReadOnlySession, read_session_maker
+from core.models import CategoryModel, ProductModel
+from tests.conftest import test_engine
+
+
+@pytest.fixture
+def read_session_factory(db_session) -> async_sessionmaker:
+    return async_sessionmaker(
+        test_engine.execution_options(isolation_level="AUTOCOMMIT"),
+        class_=AsyncSession,
+        sync_session_class=ReadOnlySession,
+        expire_on_commit=False,
+    )
+
+
+async def _catalog(db_session) -> ProductModel:
+    category = CategoryModel(name="Phones", slug="phones")
+    db_session.add(category)
+    await db_session.flush()
+    product = ProductModel(name="Phone", slug="phone", price=100000, stock=5, category_id=category.id)
+    db_session.add(product)
+    await db_session.commit()
+    return product
+
+
+class TestReadSession:
+    """Tests for get_read_session"""
+
+    def test_read_sessions_use_autocommit(self):
+        assert read_session_maker.kw["bind"].sync_engine.get_execution_options()["isolation_level"] == "AUTOCOMMIT"
+        assert read_session_maker.kw["sync_session_class"] is ReadOnlySession
+
+    async def test_reads_and_rejects_writes(self, db_session, read_session_factory):
+        product = await _catalog(db_session)
+
+        async with read_session_factory() as session:
+            assert await session.scalar(select(ProductModel.name)) == "Phone"
+
+            loaded = await session.get(ProductModel, product.id)
+            loaded.stock = 0
+            with pytest.raises(RuntimeError):
+                await session.flush()
+
+    async def test_catalog_routes(self, client, db_session):
+        product = await _catalog(db_session)
+
+        listing = await client.get("/api/products", params={"category_id": product.category_id})
+        assert listing.status_code == 200
+        assert listing.json()["total"] == 1
+
+        assert (await client.get(f"/api/products/{product.id}")).json()["slug"] == "phone"
+        assert [c["slug"] for c in (await client.get("/api/products/categories/list")).json()] == ["phones"]
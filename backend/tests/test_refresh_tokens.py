@@ -0,0 +1,120 @@
+"""Tests for refresh token rotation and revocation"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, update
+
+from core.models import OutboxEventModel, RefreshTokenModel
+from modules.users.application.refresh_tokens import RevokedTokens, revoked_tokens
+
+CREDENTIALS = {"email": "user@example.com", "password": "secret-password"}
+
+
+@pytest.fixture(autouse=True)
+def clear_revoked_tokens():
+    revoked_tokens._expires.clear()
+    yield
+    revoked_tokens._expires.clear()
+
+
+async def _register(client) -> dict:
+    response = await client.post("/api/auth/register", json=CREDENTIALS)
+    assert response.status_code == 200
+    return response.json()["tokens"]
+
+
+class TestRefreshTokens:
+    """Tests for /api/auth/refresh and /api/auth/logout"""
+
+    async def test_rotation_accepts_token_once(self, client, db_session):
+        tokens = await _register(client)
+
+        rotated = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert rotated.status_code == 200
+        assert rotated.json()["refresh_token"] != tokens["refresh_token"]
+
+        reused = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert reused.status_code == 401
+        assert len(revoked_tokens) == 1
+
+        again = await client.post("/api/auth/refresh", json={"refresh_token": rotated.json()["refresh_token"]})
+        assert again.status_code == 200
+
+    async def test_revoked_token_rejected_from_memory(self, client, db_session):
+        tokens = await _register(client)
+        await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+        # Строка удалена из БД - отказ всё равно приходит из набора в памяти
+        await db_session.execute(RefreshTokenModel.__table__.delete())
+        await db_session.commit()
+        reused = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+        assert reused.status_code == 401
+        assert reused.json()["detail"] == "Refresh token revoked"
+
+    async def test_logout_revokes_given_or_all_tokens(self, client, db_session):
+        first = await _register(client)
+        second = (await client.post("/api/auth/login", json=CREDENTIALS)).json()
+        third = (await client.post("/api/auth/login", json=CREDENTIALS)).json()
+        await db_session.commit()  # get_current_user читает пользователя в своей сессии
+        headers = {"Authorization": f"Bearer {first['access_token']}"}
+
+        response = await client.post("/api/auth/logout", json={"refresh_token": second["refresh_token"]}, headers=headers)
+        assert response.status_code == 200
+        active = await db_session.scalar(
+            select(func.count()).select_from(RefreshTokenModel).where(RefreshTokenModel.revoked_at.is_(None))
+        )
+        assert active == 2
+        await db_session.commit()
+
+        await client.post("/api/auth/logout", headers=headers)
+        for token in (first, second, third):
+            reused = await client.post("/api/auth/refresh", json={"refresh_token": token["refresh_token"]})
+            assert reused.status_code == 401
+        # Кэш пользователя в остальных воркерах сбрасывается broadcast-событием
+        events = await db_session.scalars(select(OutboxEventModel.event_type))
+        assert list(events).count("user:changed") == 2
+
+    async def test_invalid_token(self, client):
+        response = await client.post("/api/auth/refresh", json={"refresh_token": "not-a-jwt"})
+        assert response.status_code == 401
+
+    async def test_load_revoked_tokens(self, client, db_session, session_factory):
+        tokens = await _register(client)
+        await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        await db_session.commit()
+
+        fresh = RevokedTokens()
+        assert await fresh.load(session_factory) == 1
+        token_id = await db_session.scalar(
+            select(RefreshTokenModel.token_id).where(RefreshTokenModel.revoked_at.is_not(None))
+        )
+        assert token_id in fresh
+
+    async def test_load_skips_old_revocations_and_db_still_rejects(self, client, db_session, session_factory):
+        tokens = await _register(client)
+        await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        await db_session.execute(
+            update(RefreshTokenModel)
+            .where(RefreshTokenModel.revoked_at.is_not(None))
+            .values(revoked_at=datetime.now(timezone.utc) - timedelta(hours=2))
+        )
+        await db_session.commit()
+
+        fresh = RevokedTokens()
+        assert await fresh.load(session_factory, minutes=60) == 0
+
+        revoked_tokens._expires.clear()
+        reused = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert reused.status_code == 401
+
+    def test_size_is_bounded(self):
+        tokens = RevokedTokens(max_size=2)
+        expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+
+        for token_id in ("a", "b", "c"):
+            tokens.add(token_id, expires_at)
+
+        assert len(tokens) == 2
+        assert "a" not in tokens
+        assert "b" in tokens and "c" in tokens
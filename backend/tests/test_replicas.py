@@ -0,0 +1,163 @@
+"""Tests for read replica routing"""
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from core.database import (
+    LAST_WRITE_COOKIE, ReadYourWritesMiddleware, ReplicaRouter, WriteMarker, get_read_session, get_session,
+    read_sessions, request_writes,
+)
+from core.models import Base, CategoryModel
+from tests.conftest import TestSessionLocal
+
+
+async def _replica(path) -> async_sessionmaker:
+    """Вторая SQLite база - замена реплики"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text("INSERT INTO categories (name, slug) VALUES ('Replica', 'replica')"))
+    return read_sessions(engine)
+
+
+class TestReplicaRouter:
+    """Tests for ReplicaRouter"""
+
+    async def test_round_robin_and_unavailable_fallback(self, db_session, tmp_path):
+        first, second = await _replica(tmp_path / "r1.db"), await _replica(tmp_path / "r2.db")
+        broken = read_sessions(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'r.db'}"))
+        router = ReplicaRouter(TestSessionLocal, [first, second, broken], max_lag=5, sticky_seconds=30)
+
+        async with router.session() as session:
+            assert await session.scalar(select(CategoryModel.slug)) == "replica"
+
+        assert await router.check_lag() == 2
+        assert {router.session_maker() for _ in range(4)} == {first, second}
+
+        fallback = ReplicaRouter(TestSessionLocal, [broken], max_lag=5, sticky_seconds=30)
+        assert await fallback.check_lag() == 0
+        assert fallback.session_maker() is TestSessionLocal
+        assert fallback.primary_fallbacks == 1
+
+    async def test_reads_stick_to_primary_after_write(self, db_session, tmp_path):
+        replica = await _replica(tmp_path / "r.db")
+        router = ReplicaRouter(TestSessionLocal, [replica], max_lag=5, sticky_seconds=30)
+
+        assert router.session_maker(time.time() - 1) is TestSessionLocal
+        assert router.session_maker(time.time() - 60) is replica
+        assert router.session_maker(time.time() + 3600) is replica
+        assert router.session_maker() is replica
+
+
+async def _run_session(marker: WriteMarker, work=None) -> None:
+    token = request_writes.set(marker)
+    try:
+        sessions = get_session()
+        session = await sessions.__anext__()
+        if work is not None:
+            await work(session)
+        with pytest.raises(StopAsyncIteration):
+            await sessions.__anext__()
+    finally:
+        request_writes.reset(token)
+
+
+class TestWriteMarker:
+    """Tests for read-your-writes marking in get_session"""
+
+    async def test_only_sessions_with_changes_mark_a_write(self, db_session, monkeypatch):
+        monkeypatch.setattr("core.database.async_session_maker", TestSessionLocal)
+
+        async def read(session):
+            await session.execute(select(CategoryModel))
+
+        async def add(session):
+            session.add(CategoryModel(name="New", slug="new"))
+
+        async def bulk_update(session):
+            await session.execute(update(CategoryModel).values(name="Renamed"))
+
+        marks = []
+        for work in (None, read, add, bulk_update):
+            marker = WriteMarker()
+            await _run_session(marker, work)
+            marks.append(marker.wrote)
+
+        assert marks == [False, False, True, True]
+
+
+def _app(router: ReplicaRouter) -> ReadYourWritesMiddleware:
+    app = FastAPI()
+
+    @app.post("/categories")
+    async def create(session: AsyncSession = Depends(get_session)) -> dict:
+        session.add(CategoryModel(name="Created", slug="created"))
+        return {}
+
+    @app.post("/noop")
+    async def noop(session: AsyncSession = Depends(get_session)) -> dict:
+        return {}
+
+    @app.get("/categories")
+    async def read() -> dict:
+        marker = request_writes.get()
+        async with router.session(marker.last_write) as session:
+            return {"slug": await session.scalar(select(CategoryModel.slug))}
+
+    return ReadYourWritesMiddleware(app, sticky_seconds=30)
+
+
+class TestReadYourWritesMiddleware:
+    """Tests for ReadYourWritesMiddleware"""
+
+    async def test_cookie_routes_reads_to_primary_on_any_worker(self, db_session, monkeypatch, tmp_path):
+        monkeypatch.setattr("core.database.async_session_maker", TestSessionLocal)
+        replica = await _replica(tmp_path / "r.db")
+        router = ReplicaRouter(TestSessionLocal, [replica], max_lag=5, sticky_seconds=30)
+        app = _app(router)
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/categories")).json() == {"slug": "replica"}
+
+            noop = await client.post("/noop")
+            assert "set-cookie" not in noop.headers
+
+            created = await client.post("/categories")
+            assert f"{LAST_WRITE_COOKIE}=" in created.headers["set-cookie"]
+            assert "Max-Age=30" in created.headers["set-cookie"]
+            assert (await client.get("/categories")).json() == {"slug": "created"}
+
+        # Другой воркер: состояния процесса нет, метку несёт только cookie
+        other = ReplicaRouter(TestSessionLocal, [replica], max_lag=5, sticky_seconds=30)
+        cookies = {LAST_WRITE_COOKIE: created.cookies[LAST_WRITE_COOKIE]}
+        async with AsyncClient(transport=ASGITransport(app=_app(other)), base_url="http://test", cookies=cookies) as client:
+            assert (await client.get("/categories")).json() == {"slug": "created"}
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test", cookies={LAST_WRITE_COOKIE: "garbage"}
+        ) as client:
+            assert (await client.get("/categories")).json() == {"slug": "replica"}
+
+    async def test_catalog_reads_honour_the_cookie(self, db_session, monkeypatch, tmp_path):
+        replica = await _replica(tmp_path / "r.db")
+        monkeypatch.setattr(
+            "core.database.replica_router", ReplicaRouter(TestSessionLocal, [replica], max_lag=5, sticky_seconds=30)
+        )
+        db_session.add(CategoryModel(name="Edited", slug="edited"))
+        await db_session.commit()
+
+        app = FastAPI()
+
+        @app.get("/categories")
+        async def read(session: AsyncSession = Depends(get_read_session)) -> dict:
+            return {"slug": await session.scalar(select(CategoryModel.slug))}
+
+        app = ReadYourWritesMiddleware(app, sticky_seconds=30)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/categories")).json() == {"slug": "replica"}
+            client.cookies.set(LAST_WRITE_COOKIE, str(time.time()))
+            assert (await client.get("/categories")).json() == {"slug": "edited"}
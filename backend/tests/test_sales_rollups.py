@@ -0,0 +1,127 @@
+"""Tests for sales rollups"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from core.models import UserModel, CartItemModel, OrderModel, OrderItemModel, SalesRollupModel
+from core.schemas import AddressSchema
+from core.security import create_access_token
+from modules.analytics.application.queries import sales_by_bucket, top_products, granularity_for
+from modules.analytics.application.rollups import _upsert, backfill_sales_rollups, bucket_start
+from modules.orders.application.checkout import place_order
+from modules.orders.application.status import change_status
+
+ADDRESS = AddressSchema(
+    recipient_name="Test User",
+    phone="+79001234567",
+    city="Moscow",
+    street="Test Street",
+    building="1",
+    postal_code="123456"
+)
+
+TODAY = bucket_start(datetime.now(timezone.utc), "day")
+
+
+async def _rollups(session, granularity):
+    rows = await session.execute(
+        select(SalesRollupModel.product_id, SalesRollupModel.units, SalesRollupModel.revenue)
+        .where(SalesRollupModel.granularity == granularity)
+        .order_by(SalesRollupModel.product_id)
+    )
+    return rows.all()
+
+
+class TestSalesRollups:
+    """Tests for incremental rollups, backfill and reports"""
+
+    async def test_checkout_and_cancel_update_rollups(self, db_session, test_helper):
+        phone = await test_helper.create_product(db_session, name="Phone", slug="phone", price=10000, stock=5)
+        user = UserModel(email="buyer@example.com", password_hash="hash")
+        db_session.add(user)
+        await db_session.commit()
+        cart = await test_helper.create_cart(db_session, user_id=user.id)
+        db_session.add(CartItemModel(cart_id=cart.id, product_id=phone.id, quantity=2, unit_price=10000))
+        await db_session.commit()
+        phone_id = phone.id
+
+        placed = await place_order(db_session, user.id, ADDRESS)
+        order_id = placed.order.id
+        await db_session.commit()
+
+        assert await _rollups(db_session, "hour") == [(phone_id, 2, 20000)]
+        assert await _rollups(db_session, "day") == [(phone_id, 2, 20000)]
+
+        await change_status(db_session, [order_id], "cancelled")
+        await db_session.commit()
+
+        assert await _rollups(db_session, "day") == [(phone_id, 0, 0)]
+
+    async def test_backfill_and_reports(self, db_session, session_factory, test_helper):
+        phone = await test_helper.create_product(db_session, name="Phone", slug="phone", price=1000)
+        case = await test_helper.create_product(db_session, name="Case", slug="case", price=100)
+        phone_id, case_id = phone.id, case.id
+        yesterday = TODAY - timedelta(days=1)
+        for i, (status, product_id, quantity, price) in enumerate([
+            ("delivered", phone_id, 1, 1000),
+            ("pending", case_id, 5, 100),
+            ("cancelled", phone_id, 3, 1000),
+        ]):
+            order = OrderModel(
+                order_number=f"ORD-2024-{i:06d}", user_id=1, status=status,
+                subtotal=quantity * price, total=quantity * price,
+                created_at=yesterday + timedelta(hours=10 + i),
+                recipient_name="Test", phone="+79001234567", city="Moscow",
+                street="Street", building="1", postal_code="123456"
+            )
+            db_session.add(order)
+            await db_session.flush()
+            db_session.add(OrderItemModel(
+                order_id=order.id, product_id=product_id, product_name="x",
+                quantity=quantity, unit_price=price, subtotal=quantity * price
+            ))
+        await db_session.commit()
+
+        assert await backfill_sales_rollups(days=2, session_factory=session_factory) == 2
+
+        daily = await sales_by_bucket(db_session, "day", yesterday, TODAY)
+        assert [(r.units, r.revenue) for r in daily] == [(6, 1500)]
+        hourly = await sales_by_bucket(db_session, "hour", yesterday, TODAY)
+        assert [r.units for r in hourly] == [1, 5]
+
+        by_revenue = await top_products(db_session, yesterday, TODAY)
+        assert [(r.product_id, r.product_name) for r in by_revenue] == [(phone_id, "Phone"), (case_id, "Case")]
+        by_units = await top_products(db_session, yesterday, TODAY, order_by="units", limit=1)
+        assert [r.product_id for r in by_units] == [case_id]
+
+    async def test_backfill_upsert_writes_absolute_values(self, db_session):
+        row = {
+            "granularity": "day", "bucket_start": TODAY, "product_id": 1, "category_id": None,
+            "orders_count": 1, "units": 2, "revenue": 200,
+        }
+        await db_session.execute(_upsert(db_session, [row]))
+        await db_session.execute(_upsert(db_session, [row]))
+        assert await _rollups(db_session, "day") == [(1, 4, 400)]
+
+        await db_session.execute(_upsert(db_session, [row], replace=True))
+        assert await _rollups(db_session, "day") == [(1, 2, 200)]
+
+    async def test_reports_accept_mixed_timezones(self, client, db_session):
+        admin = UserModel(email="admin@example.com", password_hash="hash", role="admin")
+        db_session.add(admin)
+        await db_session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(admin.id, admin.email, admin.role)}"}
+        mixed = {"date_from": "2024-01-01T00:00:00", "date_to": "2024-01-02T00:00:00+03:00"}
+
+        revenue = await client.get("/api/analytics/revenue", params=mixed, headers=headers)
+        assert revenue.status_code == 200
+        assert revenue.json()["date_to"].startswith("2024-01-01T21:00:00")
+
+        inverted = {"date_from": "2024-01-02T00:00:00+00:00", "date_to": "2024-01-01T00:00:00"}
+        for path in ("/api/analytics/revenue", "/api/orders/export"):
+            response = await client.get(path, params=inverted, headers=headers)
+            assert response.status_code == 400
+
+    def test_granularity_for(self):
+        assert granularity_for(TODAY - timedelta(days=7), TODAY) == "day"
+        assert granularity_for(TODAY, TODAY + timedelta(hours=5)) == "hour"
@@ -0,0 +1,48 @@
+"""Tests for JWT issuing and the verified-token cache"""
+import time
+import pytest
+from jose import jwt, JWTError
+
+from core.config import get_settings
+from core.security import create_access_token, decode_access_token, token_cache
+
+settings = get_settings()
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+class TestTokens:
+    """Tests for decode_access_token"""
+
+    def test_access_token_has_exp_and_is_cached(self):
+        token = create_access_token(7, "user@example.com", "customer")
+        hits = token_cache.hits
+
+        claims = decode_access_token(token)
+        again = decode_access_token(token)
+
+        assert claims["sub"] == "7"
+        assert claims["exp"] > time.time()
+        assert again is claims
+        assert token_cache.hits == hits + 1
+
+    def test_cached_entry_respects_exp(self, monkeypatch):
+        token = create_access_token(1, "user@example.com", "customer")
+        claims = decode_access_token(token)
+
+        # Запись в кэше не переживает exp токена - дальше токен проверяется заново
+        monkeypatch.setattr("core.security.time.time", lambda: claims["exp"] + 1)
+        assert decode_access_token(token) is not claims
+        assert len(token_cache) == 0
+
+    def test_rejects_refresh_and_tampered_tokens(self):
+        with pytest.raises(JWTError):
+            decode_access_token(jwt.encode({"sub": "1", "type": "refresh"}, settings.SECRET_KEY))
+        with pytest.raises(JWTError):
+            decode_access_token(create_access_token(1, "a@example.com", "customer") + "x")
+        assert len(token_cache) == 0
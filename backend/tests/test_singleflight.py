@@ -0,0 +1,93 @@
+"""Tests for single-flight request coalescing"""
+import asyncio
+
+import pytest
+
+from core.singleflight import SingleFlight
+from modules.products.presentation.api import routes as product_routes
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight"""
+
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"items": []}
+
+        results = await asyncio.gather(*(flight.do("key", load) for _ in range(5)))
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert flight.stats() == {"in_flight": 0, "executions": 1, "shared": 4}
+
+    async def test_sequential_calls_are_not_cached(self):
+        flight = SingleFlight()
+
+        async def load():
+            return object()
+
+        assert await flight.do("key", load) is not await flight.do("key", load)
+        assert flight.executions == 2
+
+    async def test_error_reaches_every_waiter(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+
+        assert [type(result) for result in results] == [ValueError, ValueError]
+        assert len(flight) == 0
+
+    async def test_waiter_retries_when_leader_is_cancelled(self):
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def load():
+            return "fresh"
+
+        leader = asyncio.create_task(flight.do("key", hang))
+        await started.wait()
+        waiter = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await waiter == "fresh"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+
+class TestProductListCoalescing:
+    """Tests for list_products coalescing"""
+
+    async def test_identical_requests_share_a_query(self, client, monkeypatch):
+        calls = []
+        product_page = product_routes._product_page
+
+        async def slow_page(*args):
+            calls.append(args[1:])
+            await asyncio.sleep(0.05)
+            return await product_page(*args)
+
+        monkeypatch.setattr(product_routes, "_product_page", slow_page)
+
+        first, second, other_page = await asyncio.gather(
+            client.get("/api/products", params={"category_id": 1, "search": "Tea"}),
+            client.get("/api/products", params={"search": "tea", "category_id": 1}),
+            client.get("/api/products", params={"category_id": 1, "search": "Tea", "page": 2}),
+        )
+
+        assert first.status_code == second.status_code == other_page.status_code == 200
+        assert first.json() == second.json()
+        assert len(calls) == 2
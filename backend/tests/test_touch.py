@@ -0,0 +1,61 @@
+"""Tests for batched touch-column writes"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from core.models import UserModel
+from core.touch import TouchCoalescer, touches
+
+
+class TestTouchCoalescer:
+    """Tests for TouchCoalescer"""
+
+    async def test_flush_writes_latest_touch_per_row(self, db_session, session_factory):
+        users = [UserModel(email=f"user{i}@example.com", password_hash="hash") for i in range(3)]
+        db_session.add_all(users)
+        await db_session.commit()
+        ids = [user.id for user in users]
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        coalescer = TouchCoalescer()
+
+        for minutes in range(5):
+            coalescer.touch(UserModel.last_login_at, ids[0], base + timedelta(minutes=minutes))
+        coalescer.touch(UserModel.last_login_at, ids[1], base)
+        assert len(coalescer) == 2
+
+        assert await coalescer.flush(batch_size=1, session_factory=session_factory) == 2
+        assert len(coalescer) == 0
+
+        db_session.expire_all()
+        rows = dict((await db_session.execute(select(UserModel.id, UserModel.last_login_at))).all())
+        assert rows[ids[0]].replace(tzinfo=timezone.utc) == base + timedelta(minutes=4)
+        assert rows[ids[1]].replace(tzinfo=timezone.utc) == base
+        assert rows[ids[2]] is None
+
+    async def test_older_touch_does_not_overwrite(self, db_session, session_factory):
+        recent = datetime(2026, 6, 1, tzinfo=timezone.utc)
+        user = UserModel(email="user@example.com", password_hash="hash", last_login_at=recent)
+        db_session.add(user)
+        await db_session.commit()
+        coalescer = TouchCoalescer()
+
+        coalescer.touch(UserModel.last_login_at, user.id, recent - timedelta(days=1))
+        await coalescer.flush(session_factory=session_factory)
+
+        db_session.expire_all()
+        stored = await db_session.scalar(select(UserModel.last_login_at))
+        assert stored.replace(tzinfo=timezone.utc) == recent
+
+    async def test_login_defers_last_login_at(self, client, db_session, session_factory):
+        credentials = {"email": "new@example.com", "password": "secret-password"}
+        await client.post("/api/auth/register", json=credentials)
+        await db_session.commit()
+        touches._pending.clear()
+
+        assert (await client.post("/api/auth/login", json=credentials)).status_code == 200
+        await db_session.commit()
+        assert await db_session.scalar(select(UserModel.last_login_at)) is None
+
+        assert await touches.flush(session_factory=session_factory) == 1
+        db_session.expire_all()
+        assert await db_session.scalar(select(UserModel.last_login_at)) is not None
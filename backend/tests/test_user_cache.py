@@ -0,0 +1,90 @@
+"""Tests for the cached get_current_user dependency"""
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from core.cache import TTLCache
+from core.config import get_settings
+from core.dependencies import get_current_user, invalidate_user, user_cache
+from core.models import UserModel
+
+settings = get_settings()
+
+
+def _credentials(sub) -> HTTPAuthorizationCredentials:
+    token = jwt.encode({"sub": sub, "type": "access"}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+class CountingSessionMaker:
+    """Session factory that counts opened sessions"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.opened = 0
+
+    def __call__(self):
+        self.opened += 1
+        return self.factory()
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+class TestUserCache:
+    """Tests for get_current_user caching"""
+
+    async def test_cache_hit_skips_database(self, db_session, session_factory):
+        user = UserModel(email="admin@example.com", password_hash="hash", role="admin")
+        db_session.add(user)
+        await db_session.commit()
+        sessions = CountingSessionMaker(session_factory)
+
+        first = await get_current_user(_credentials(str(user.id)), sessions)
+        second = await get_current_user(_credentials(str(user.id)), sessions)
+
+        assert (first.id, first.email, first.role) == (user.id, "admin@example.com", "admin")
+        assert second is first
+        assert sessions.opened == 1
+
+    async def test_invalidate_reloads_user(self, db_session, session_factory):
+        user = UserModel(email="user@example.com", password_hash="hash", role="customer")
+        db_session.add(user)
+        await db_session.commit()
+        await get_current_user(_credentials(str(user.id)), session_factory)
+
+        user.is_active = False
+        await db_session.commit()
+        invalidate_user(user.id)
+
+        with pytest.raises(HTTPException) as exc:
+            await get_current_user(_credentials(str(user.id)), session_factory)
+        assert exc.value.status_code == 401
+
+    async def test_unknown_user_and_bad_subject(self, db_session, session_factory):
+        for sub in ("999", "not-a-number", None):
+            with pytest.raises(HTTPException) as exc:
+                await get_current_user(_credentials(sub), session_factory)
+            assert exc.value.status_code == 401
+
+
+class TestTTLCache:
+    """Tests for TTLCache"""
+
+    def test_expiry_and_lru(self):
+        now = [0.0]
+        cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)  # вытесняет "b"
+
+        assert cache.get("b") is None
+        now[0] = 11
+        assert cache.get("a") is None
+        assert cache.stats()["hits"] == 1
@@ -5,13 +5,12 @@
 const Orders = {
     currentFilters: {
         status: null,
-        page: 1,
+        cursor: null,
         page_size: 10
     },
     pagination: {
-        total: 0,
-        total_pages: 0,
-        page: 1,
+        next_cursor: null,
+        previous: [],   // курсоры уже просмотренных страниц
         page_size: 10
     },
 
@@ -32,12 +31,8 @@ const Orders = {
         try {
             const response = await APIService.orders.list(this.currentFilters);
 
-            this.pagination = {
-                total: response.total,
-                total_pages: response.total_pages,
-                page: response.page,
-                page_size: response.page_size
-            };
+            this.pagination.next_cursor = response.next_cursor;
+            this.pagination.page_size = response.page_size;
 
             UI.hideLoading();
             this.renderOrders(response.items);
@@ -308,63 +303,57 @@ const Orders = {
      */
     filterByStatus(status) {
         this.currentFilters.status = status || null;
-        this.currentFilters.page = 1;
+        this.currentFilters.cursor = null;
+        this.pagination.previous = [];
         this.loadOrders();
     },
 
     /**
-     * Render pagination
+     * Render pagination (курсорная: только "назад" и "вперёд")
      */
     renderPagination() {
         const container = document.querySelector('.pagination');
         if (!container) return;
 
-        if (this.pagination.total_pages <= 1) {
+        const hasPrevious = this.pagination.previous.length > 0;
+        const hasNext = Boolean(this.pagination.next_cursor);
+
+        if (!hasPrevious && !hasNext) {
             container.innerHTML = '';
             return;
         }
 
-        const currentPage = this.pagination.page;
-        const totalPages = this.pagination.total_pages;
-
-        let html = `
+        container.innerHTML = `
             <button class="pagination-btn"
-                    onclick="Orders.goToPage(${currentPage - 1})"
-                    ${currentPage === 1 ? 'disabled' : ''}>
+                    onclick="Orders.previousPage()"
+                    ${hasPrevious ? '' : 'disabled'}>
                 ←
             </button>
-        `;
-
-        for (let i = 1; i <= totalPages; i++) {
-            if (i === 1 || i === totalPages || (i >= currentPage - 2 && i <= currentPage + 2)) {
-                html += `
-                    <button class="pagination-btn ${i === currentPage ? 'active' : ''}"
-                            onclick="Orders.goToPage(${i})">
-                        ${i}
-                    </button>
-                `;
-            } else if (i === currentPage - 3 || i === currentPage + 3) {
-                html += `<span class="pagination-ellipsis">...</span>`;
-            }
-        }
-
-        html += `
             <button class="pagination-btn"
-                    onclick="Orders.goToPage(${currentPage + 1})"
-                    ${currentPage === totalPages ? 'disabled' : ''}>
+                    onclick="Orders.nextPage()"
+                    ${hasNext ? '' : 'disabled'}>
                 →
             </button>
         `;
+    },
 
-        container.innerHTML = html;
+    /**
+     * Go to next page
+     */
+    nextPage() {
+        if (!this.pagination.next_cursor) return;
+        this.pagination.previous.push(this.currentFilters.cursor);
+        this.currentFilters.cursor = this.pagination.next_cursor;
+        this.loadOrders();
+        window.scrollTo({ top: 0, behavior: 'smooth' });
     },
 
     /**
-     * Go to page
+     * Go to previous page
      */
-    goToPage(page) {
-        if (page < 1 || page > this.pagination.total_pages) return;
-        this.currentFilters.page = page;
+    previousPage() {
+        if (this.pagination.previous.length === 0) return;
+        this.currentFilters.cursor = this.pagination.previous.pop();
         this.loadOrders();
         window.scrollTo({ top: 0, behavior: 'smooth' });
     },